@@ -0,0 +1,123 @@
+# benchmarks/fixtures.py — Deterministic corpora, embeddings and backends for offline retrieval benchmarks
+
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+DIM = 64
+WORDS_PER_TOPIC = 12
+NOISE_VOCAB = 5000
+TOPIC_WORDS_PER_CHUNK = 14
+NOISE_WORDS_PER_CHUNK = 10
+CHUNKS_PER_TOPIC = 100
+BUILD_BATCH = 8192  # bounds the (batch, words, dim) temporary during corpus build
+
+
+class Corpus:
+    """
+    Synthetic chunk corpus with known relevance: every chunk belongs to one topic,
+    and a query built from a topic's words is relevant to exactly that topic's chunks.
+
+    Generated from a seed, so the same size always yields the same corpus and queries.
+    """
+
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.n_topics = max(10, size // CHUNKS_PER_TOPIC)
+        rng = np.random.default_rng(seed)
+
+        self.vocab = [f"topic{t}word{w}" for t in range(self.n_topics) for w in range(WORDS_PER_TOPIC)]
+        self.vocab += [f"noise{n}" for n in range(NOISE_VOCAB)]
+        self.word_ids = {w: i for i, w in enumerate(self.vocab)}
+        self.word_vectors = rng.standard_normal((len(self.vocab), DIM)).astype(np.float32)
+
+        self.topics = np.arange(size, dtype=np.int32) % self.n_topics
+        topic_words = self.topics[:, None] * WORDS_PER_TOPIC + rng.integers(0, WORDS_PER_TOPIC, (size, TOPIC_WORDS_PER_CHUNK))
+        noise_words = self.n_topics * WORDS_PER_TOPIC + rng.integers(0, NOISE_VOCAB, (size, NOISE_WORDS_PER_CHUNK))
+        self.tokens = np.concatenate([topic_words, noise_words], axis=1).astype(np.int32)
+
+        self.vectors = np.empty((size, DIM), dtype=np.float32)
+        for start in range(0, size, BUILD_BATCH):
+            self.vectors[start:start + BUILD_BATCH] = _normalize(self.word_vectors[self.tokens[start:start + BUILD_BATCH]].sum(axis=1))
+
+        self._postings: Optional[Dict[int, np.ndarray]] = None
+
+    def chunk(self, i: int) -> Dict:
+        return {
+            "content": " ".join(self.vocab[t] for t in self.tokens[i]),
+            "metadata": {"source": f"doc-{i}", "title": f"Doc {i}", "page": 1, "topic": int(self.topics[i])},
+        }
+
+    def queries(self, n: int, seed: int = 1) -> List[Tuple[str, int]]:
+        rng = np.random.default_rng(seed)
+        out = []
+        for topic in rng.integers(0, self.n_topics, n):
+            words = rng.choice(WORDS_PER_TOPIC, 4, replace=False)
+            out.append((" ".join(f"topic{topic}word{w}" for w in words), int(topic)))
+        return out
+
+    # === Embeddings ===
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Bag-of-words embedding; unknown words hash into the vocabulary.
+        """
+        rows = []
+        for text in texts:
+            ids = [self.word_ids.get(w, zlib.crc32(w.encode("utf-8")) % len(self.vocab)) for w in text.split()]
+            rows.append(self.word_vectors[ids].sum(axis=0) if ids else np.zeros(DIM, dtype=np.float32))
+        return _normalize(np.asarray(rows, dtype=np.float32))
+
+    # === Stand-in Backends ===
+    def vector_search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        scores = self.vectors @ self.embed([query])[0]
+        k = min(top_k, self.size)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(i), float(max(scores[i], 0.0))) for i in best]
+
+    def keyword_search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        postings = self._keyword_postings()
+        hits: Dict[int, float] = {}
+        for word in query.split():
+            for i in postings.get(self.word_ids.get(word, -1), ()):
+                hits[int(i)] = hits.get(int(i), 0.0) + 1.0
+        return sorted(hits.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]
+
+    def _keyword_postings(self) -> Dict[int, np.ndarray]:
+        if self._postings is None:
+            flat = self.tokens.ravel()
+            order = np.argsort(flat, kind="stable")
+            words, starts = np.unique(flat[order], return_index=True)
+            rows = (order // self.tokens.shape[1]).astype(np.int32)
+            bounds = list(starts[1:]) + [len(order)]
+            self._postings = {int(w): np.unique(rows[s:e]) for w, s, e in zip(words, starts, bounds)}
+        return self._postings
+
+
+class FakeKnowledgeBase:
+    """
+    Mimics bedrock-agent-runtime.retrieve over a Corpus, including nextToken paging.
+    """
+
+    MAX_RESULTS = 100
+
+    def __init__(self, corpus: Corpus):
+        self.corpus = corpus
+        self.calls = 0
+
+    def retrieve(self, knowledgeBaseId, retrievalQuery, retrievalConfiguration, nextToken=None):
+        self.calls += 1
+        page_size = retrievalConfiguration["vectorSearchConfiguration"]["numberOfResults"]
+        offset = int(nextToken or 0)
+        hits = self.corpus.vector_search(retrievalQuery["text"], min(offset + page_size, self.MAX_RESULTS))[offset:]
+        results = [
+            {**self.corpus.chunk(i), "score": score} for i, score in hits
+        ]
+        end = offset + len(results)
+        return {"retrievalResults": results, "nextToken": str(end) if results and end < self.MAX_RESULTS else None}
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
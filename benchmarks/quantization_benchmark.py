@@ -0,0 +1,87 @@
+# benchmarks/quantization_benchmark.py — Recall loss vs. memory saved for quantized vector storage
+#
+# Usage:
+#   python -m benchmarks.quantization_benchmark --size 100000 --queries 200 --output quant.json
+#
+# Exact float32 top-k over the fixture corpus is the reference; each storage
+# dtype / coarse-prefix setting reports recall@k against it, bytes per vector and
+# per-query latency of the dequantized kernel.
+
+import json
+import time
+import argparse
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.fixtures import Corpus, DIM
+from chatbot.utils import quantization
+
+DTYPES = ("float32", "float16", "int8")
+COARSE_OVERSAMPLE = 4
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+def _search(codes, scales, query: np.ndarray, k: int, coarse_dims: Optional[int]) -> np.ndarray:
+    if not coarse_dims:
+        return _top_k(quantization.dot_scores(codes, scales, query), k)
+    shortlist = _top_k(quantization.dot_scores(codes, scales, query, dims=coarse_dims), COARSE_OVERSAMPLE * k)
+    full = quantization.dot_scores(codes[shortlist], scales[shortlist] if scales is not None else None, query)
+    return shortlist[_top_k(full, k)]
+
+
+def run(size: int, n_queries: int, top_k: int, coarse_dims: List[int], seed: int = 0) -> Dict:
+    corpus = Corpus(size, seed=seed)
+    queries = corpus.embed([q for q, _ in corpus.queries(n_queries, seed=seed + 1)])
+    reference = [set(_top_k(corpus.vectors @ q, top_k)) for q in queries]
+
+    results = []
+    for dtype in DTYPES:
+        codes, scales = quantization.encode(corpus.vectors, dtype)
+        stored_bytes = codes.nbytes + (scales.nbytes if scales is not None else 0)
+        for dims in [0] + coarse_dims:
+            latencies, recalls = [], []
+            for q, ref in zip(queries, reference):
+                start = time.perf_counter()
+                found = _search(codes, scales, q, top_k, dims)
+                latencies.append((time.perf_counter() - start) * 1000)
+                recalls.append(len(ref & set(found)) / top_k)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            results.append({
+                "dtype": dtype,
+                "coarse_dims": dims or DIM,
+                "bytes_per_vector": quantization.bytes_per_vector(DIM, dtype),
+                "memory_mb": round(stored_bytes / 2**20, 2),
+                "memory_saved": round(1 - stored_bytes / corpus.vectors.nbytes, 4),
+                "recall_at_k": round(float(np.mean(recalls)), 4),
+                "latency_ms": {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3)},
+            })
+    return {"meta": {"corpus_size": size, "dim": DIM, "queries": n_queries, "top_k": top_k, "seed": seed},
+            "results": results}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Quantized vector storage benchmark")
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--coarse-dims", default="16,32", help="comma-separated prefix sizes for the coarse pass")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    dims = [int(d) for d in args.coarse_dims.split(",") if d]
+    text = json.dumps(run(args.size, args.queries, args.top_k, dims, seed=args.seed), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# benchmarks/retrieval_benchmark.py — Offline latency/quality benchmark for the retrieval stack
+#
+# Usage:
+#   python -m benchmarks.retrieval_benchmark --sizes 1000,100000,1000000 --queries 200 --output bench.json
+#
+# Runs get_relevant_chunks, rerank_chunks and hybrid_rag_router against deterministic
+# stand-in backends (benchmarks/fixtures.py), so numbers are comparable between releases.
+
+import json
+import time
+import argparse
+import platform
+import resource
+from contextlib import ExitStack
+from typing import Callable, Dict, List
+from unittest.mock import patch
+
+import numpy as np
+
+from benchmarks.fixtures import Corpus, FakeKnowledgeBase
+from chatbot import ranking
+from chatbot.rag import retrieval_layer, rag_router
+
+TARGETS = ("get_relevant_chunks", "rerank_chunks", "hybrid_rag_router")
+RERANK_CANDIDATES = 20
+
+
+class CountingEmbedder:
+    def __init__(self, embed_fn: Callable[[List[str]], np.ndarray]):
+        self.embed_fn = embed_fn
+        self.calls = 0
+        self.texts = 0
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        self.calls += 1
+        self.texts += len(texts)
+        return self.embed_fn(texts)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def _keyword_backend(corpus: Corpus):
+    def query_keyword(query: str, top_k: int, metadata_filter=None) -> List[Dict]:
+        return [{**corpus.chunk(i), "score": score, "source": rag_router.keyword_backend}
+                for i, score in corpus.keyword_search(query, top_k)]
+    return query_keyword
+
+
+def _patched(corpus: Corpus, embedder: CountingEmbedder) -> ExitStack:
+    stack = ExitStack()
+    stack.enter_context(patch.multiple(
+        retrieval_layer,
+        bedrock_agent=FakeKnowledgeBase(corpus),
+        RETRIEVAL_BACKEND="bedrock",
+        embedding_engine="bedrock",
+        _embed_batch=embedder,
+    ))
+    stack.enter_context(patch.multiple(ranking, embed_texts_bedrock=embedder, EMBEDDING_ENGINE="bedrock"))
+    stack.enter_context(patch.multiple(
+        rag_router,
+        query_keyword=_keyword_backend(corpus),
+        _embed_batch=embedder,
+        CACHE_ENABLED=False,
+        call_claude=lambda *args, **kwargs: "",
+    ))
+    return stack
+
+
+def _returned_topics(target: str, result: List[Dict], corpus: Corpus) -> List[int]:
+    if target == "hybrid_rag_router":
+        # One synthesized chunk; its source lists the chunks that were used
+        sources = result[0]["metadata"].get("source", "") if result else ""
+        return [int(corpus.topics[int(s[4:])]) for s in sources.split("+") if s.startswith("doc-")]
+    return [c["metadata"]["topic"] for c in result]
+
+
+def run_target(target: str, corpus: Corpus, queries, top_k: int) -> Dict:
+    embedder = CountingEmbedder(corpus.embed)
+    latencies, recalls = [], []
+
+    with _patched(corpus, embedder):
+        for query, topic in queries:
+            if target == "rerank_chunks":
+                candidates = [corpus.chunk(i) for i, _ in corpus.vector_search(query, RERANK_CANDIDATES)]
+                start = time.perf_counter()
+                result = retrieval_layer.rerank_chunks(query, candidates, top_k=top_k)
+            elif target == "get_relevant_chunks":
+                start = time.perf_counter()
+                result = retrieval_layer.get_relevant_chunks(query, top_k=top_k)
+            else:
+                start = time.perf_counter()
+                result = rag_router.hybrid_rag_router(query, top_k=top_k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            returned = _returned_topics(target, result, corpus)[:top_k]
+            relevant = int(np.sum(corpus.topics == topic))
+            recalls.append(sum(t == topic for t in returned) / min(top_k, relevant))
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "target": target,
+        "corpus_size": corpus.size,
+        "queries": len(queries),
+        "top_k": top_k,
+        "latency_ms": {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3),
+                       "mean": round(float(np.mean(latencies)), 3)},
+        "recall_at_k": round(float(np.mean(recalls)), 4),
+        "embed_calls_per_query": round(embedder.calls / len(queries), 3),
+        "embed_texts_per_query": round(embedder.texts / len(queries), 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run(sizes: List[int], n_queries: int, top_k: int, targets=TARGETS, seed: int = 0) -> Dict:
+    results = []
+    for size in sizes:
+        corpus = Corpus(size, seed=seed)
+        queries = corpus.queries(n_queries, seed=seed + 1)
+        for target in targets:
+            # One untimed warm-up query so lazy imports/initialization don't land in p99
+            run_target(target, corpus, queries[:1], top_k)
+            results.append(run_target(target, corpus, queries, top_k))
+    return {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "seed": seed,
+                 "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())},
+        "results": results,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="comma-separated corpus sizes")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run([int(s) for s in args.sizes.split(",")], args.queries, args.top_k,
+                 targets=args.targets.split(","), seed=args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,263 @@
 # chatbot/agent.py
 
 import json
-import boto3
-from typing import List, Dict, Optional
+from concurrent.futures import Future
+from typing import Iterator, List, Dict, Optional
 from chatbot.utils.constants import (
     BEDROCK_MODEL_ID,
-    BEDROCK_REGION,
     BEDROCK_AGENT_ID,
     BEDROCK_AGENT_ALIAS_ID,
     SYSTEM_MESSAGE,
     MAX_CHUNKS,
 )
+from chatbot.utils.bedrock_client import get_client, submit, run_async
+from chatbot.utils.response_cache import response_cache, cache_enabled
+from chatbot.utils.singleflight import singleflight, make_key
+from chatbot.utils.rate_limiter import call_with_retry, is_throttling_error, BedrockThrottledError
 from chatbot.ranking import rank_chunks_by_similarity
 from chatbot.logger import logger
 
-# Bedrock clients
-bedrock = boto3.client("bedrock-runtime", region_name=BEDROCK_REGION)
-agent_runtime = boto3.client("bedrock-agent-runtime", region_name=BEDROCK_REGION)
+# Bedrock clients (shared, pooled, keep-alive)
+bedrock = get_client("bedrock-runtime")
+agent_runtime = get_client("bedrock-agent-runtime")
 
 
-def call_claude(user_input: str, context: str = "") -> str:
-    """
-    Calls Claude 3 Sonnet on Bedrock with optional RAG context.
-    """
+def _build_claude_payload(user_input: str, context: str = "", history: Optional[List[Dict]] = None) -> dict:
     messages = [
         {"role": "system", "content": SYSTEM_MESSAGE},
+        *(history or []),
         {"role": "user", "content": f"{context}\n\n{user_input}".strip()}
     ]
 
-    payload = {
+    return {
         "anthropic_version": "bedrock-2023-05-31",
         "messages": messages,
         "max_tokens": 1024,
         "temperature": 0.7,
     }
 
+
+def _invoke_claude(body: str):
+    response = call_with_retry(
+        BEDROCK_MODEL_ID,
+        bedrock.invoke_model,
+        modelId=BEDROCK_MODEL_ID,
+        contentType="application/json",
+        accept="application/json",
+        body=body
+    )
+    return json.loads(response["body"].read()).get("content")
+
+
+def _cache_context(context: str, history: Optional[List[Dict]]) -> str:
+    # Prior turns change the answer, so they are part of the cache key
+    return f"{context}|{json.dumps(history, sort_keys=True)}" if history else context
+
+
+def call_claude(user_input: str, context: str = "", history: Optional[List[Dict]] = None,
+                use_cache: bool = True) -> str:
+    """
+    Calls Claude 3 Sonnet on Bedrock with optional RAG context and prior turns.
+    Repeated and near-identical prompts are served from the response cache, and
+    identical concurrent calls share a single in-flight request.
+
+    Pass use_cache=False for prompts whose answer must not be shared between
+    near-identical inputs (e.g. per-conversation summaries).
+    """
+    cache_context = _cache_context(context, history)
+    use_cache = use_cache and cache_enabled()
+    if use_cache:
+        cached = response_cache.get(user_input, cache_context, BEDROCK_MODEL_ID)
+        if cached is not None:
+            logger.info("[Claude] Served from response cache")
+            return cached
+
+    body = json.dumps(_build_claude_payload(user_input, context, history))
+
     try:
-        response = bedrock.invoke_model(
+        content = singleflight.do(make_key("claude", BEDROCK_MODEL_ID, body), _invoke_claude, body)
+        if content is None:
+            return "[Claude returned no content]"
+
+        if use_cache:
+            response_cache.put(user_input, cache_context, BEDROCK_MODEL_ID, content)
+        return content
+
+    except BedrockThrottledError as e:
+        logger.warning(f"[Claude] Throttled past deadline: {e}")
+        return "⚠️ Claude error: Bedrock is busy right now. Please retry in a few seconds."
+
+    except Exception as e:
+        logger.exception("Claude invocation failed")
+        return f"⚠️ Claude error: {str(e)}"
+
+
+def stream_claude(user_input: str, context: str = "", history: Optional[List[Dict]] = None) -> Iterator[str]:
+    """
+    Streams Claude 3 Sonnet's reply as text deltas via InvokeModelWithResponseStream.
+    Suitable for st.write_stream inside st.chat_message.
+    """
+    cache_context = _cache_context(context, history)
+    use_cache = cache_enabled()
+    if use_cache:
+        cached = response_cache.get(user_input, cache_context, BEDROCK_MODEL_ID)
+        if cached is not None:
+            logger.info("[Claude] Served stream from response cache")
+            yield cached
+            return
+
+    payload = _build_claude_payload(user_input, context, history)
+    parts = []
+
+    try:
+        response = call_with_retry(
+            BEDROCK_MODEL_ID,
+            bedrock.invoke_model_with_response_stream,
             modelId=BEDROCK_MODEL_ID,
             contentType="application/json",
             accept="application/json",
             body=json.dumps(payload)
         )
-        body = json.loads(response["body"].read())
-        return body.get("content", "[Claude returned no content]")
+        for event in response["body"]:
+            chunk = event.get("chunk")
+            if not chunk:
+                continue
+            data = json.loads(chunk["bytes"])
+            if data.get("type") == "content_block_delta":
+                text = data.get("delta", {}).get("text", "")
+                if text:
+                    parts.append(text)
+                    yield text
+
+        if use_cache and parts:
+            response_cache.put(user_input, cache_context, BEDROCK_MODEL_ID, "".join(parts))
+
+    except BedrockThrottledError as e:
+        logger.warning(f"[Claude] Stream throttled past deadline: {e}")
+        yield "⚠️ Claude error: Bedrock is busy right now. Please retry in a few seconds."
 
     except Exception as e:
-        logger.exception("Claude invocation failed")
-        return f"⚠️ Claude error: {str(e)}"
+        logger.exception("Claude streaming failed")
+        yield f"⚠️ Claude error: {str(e)}"
+
+
+def _invoke_agent(user_input: str, session_id: Optional[str]) -> dict:
+    if not session_id:
+        session_id = f"session-{abs(hash(user_input))}"
+
+    return call_with_retry(
+        BEDROCK_AGENT_ID,
+        agent_runtime.invoke_agent,
+        agentId=BEDROCK_AGENT_ID,
+        agentAliasId=BEDROCK_AGENT_ALIAS_ID,
+        sessionId=session_id,
+        input={"text": user_input}
+    )
+
+
+def _iter_agent_completion(completion) -> Iterator[str]:
+    """
+    Yields text from an InvokeAgent completion event stream as chunks arrive.
+    Also accepts an already-buffered {"content": "<json>"} completion.
+    """
+    if isinstance(completion, dict):
+        body = completion.get("content", "")
+        if body:
+            message = json.loads(body).get("message")
+            if message:
+                yield message
+        return
+
+    for event in completion:
+        chunk = event.get("chunk")
+        if chunk and chunk.get("bytes"):
+            yield chunk["bytes"].decode("utf-8")
 
 
 def call_bedrock_agent(user_input: str, session_id: Optional[str] = None, fallback_to_claude: bool = True) -> str:
     """
     Invokes a Bedrock Agent via InvokeAgent, with optional fallback to Claude.
     """
-    if not session_id:
-        session_id = f"session-{abs(hash(user_input))}"
-
     try:
-        response = agent_runtime.invoke_agent(
-            agentId=BEDROCK_AGENT_ID,
-            agentAliasId=BEDROCK_AGENT_ALIAS_ID,
-            sessionId=session_id,
-            input={"text": user_input}
-        )
+        response = _invoke_agent(user_input, session_id)
+        message = "".join(_iter_agent_completion(response.get("completion", {})))
+        return message or "[Agent returned no message]"
 
-        body = response.get("completion", {}).get("content", "")
-        if body:
-            content = json.loads(body)
-            return content.get("message", "[Agent returned no message]")
-        return "[Agent returned no message]"
+    except BedrockThrottledError as e:
+        # Falling back to Claude here would only add load to an already throttled account
+        logger.warning(f"[Agent] Throttled past deadline, not falling back: {e}")
+        return "⚠️ Agent error: Bedrock is busy right now. Please retry in a few seconds."
 
     except Exception as e:
         logger.exception("Bedrock Agent invocation failed")
-        if fallback_to_claude:
+        if fallback_to_claude and not is_throttling_error(e):
             logger.warning("Falling back to Claude due to Agent failure")
             return call_claude(user_input)
         return f"⚠️ Agent error: {str(e)}"
 
 
+def stream_bedrock_agent(user_input: str, session_id: Optional[str] = None, fallback_to_claude: bool = True) -> Iterator[str]:
+    """
+    Streams a Bedrock Agent reply chunk-by-chunk from the InvokeAgent event stream.
+    Falls back to streaming Claude if the Agent fails before producing any text.
+    """
+    produced = False
+    try:
+        response = _invoke_agent(user_input, session_id)
+        for text in _iter_agent_completion(response.get("completion", {})):
+            produced = True
+            yield text
+
+    except BedrockThrottledError as e:
+        logger.warning(f"[Agent] Stream throttled past deadline, not falling back: {e}")
+        if not produced:
+            yield "⚠️ Agent error: Bedrock is busy right now. Please retry in a few seconds."
+        return
+
+    except Exception as e:
+        logger.exception("Bedrock Agent streaming failed")
+        if produced:
+            return
+        if not fallback_to_claude or is_throttling_error(e):
+            yield f"⚠️ Agent error: {str(e)}"
+            return
+
+    if not produced and fallback_to_claude:
+        logger.warning("Falling back to Claude due to empty or failed Agent stream")
+        yield from stream_claude(user_input)
+    elif not produced:
+        yield "[Agent returned no message]"
+
+
+# === Non-blocking Invocation (shared Bedrock pool) ===
+def submit_claude(user_input: str, context: str = "") -> Future:
+    """
+    Schedules call_claude on the shared Bedrock pool and returns its Future.
+    """
+    return submit(call_claude, user_input, context)
+
+
+def submit_bedrock_agent(user_input: str, session_id: Optional[str] = None, fallback_to_claude: bool = True) -> Future:
+    """
+    Schedules call_bedrock_agent on the shared Bedrock pool and returns its Future.
+    """
+    return submit(call_bedrock_agent, user_input, session_id, fallback_to_claude)
+
+
+async def acall_claude(user_input: str, context: str = "") -> str:
+    """
+    Awaitable variant of call_claude for asyncio callers.
+    """
+    return await run_async(call_claude, user_input, context)
+
+
+async def acall_bedrock_agent(user_input: str, session_id: Optional[str] = None, fallback_to_claude: bool = True) -> str:
+    """
+    Awaitable variant of call_bedrock_agent for asyncio callers.
+    """
+    return await run_async(call_bedrock_agent, user_input, session_id, fallback_to_claude)
+
+
 def get_ranked_chunks(query: str, all_chunks: List[Dict]) -> List[Dict]:
     """
     Return top-N relevant chunks using local vector similarity.
@@ -10,17 +10,32 @@ from chatbot.utils.streamlit_widgets import (
     generate_arch, generate_cdk, generate_cfn,
     generate_cost_estimate, generate_doc, generate_drawio
 )
-from chatbot.memory.router import recall_similar_memories
+from chatbot.memory.router import recall_similar_memories, summarize_and_store
 from chatbot.utils.conversation_manager import ConversationManager
 from chatbot.utils.fallback_router import fallback_router
 from chatbot.utils.prompt_cleaner import sanitize_prompt
 from chatbot.utils.enums import PlannerStage
+from chatbot.utils.embedding_server import embedding_server
+from chatbot.rag.retrieval_layer import embedding_engine
+
+# --- Helpers ---
+def render_response(response) -> str:
+    """Render a planner reply token-by-token (or in one go) and return the full text."""
+    if isinstance(response, str):
+        st.markdown(response)
+        return response
+    return st.write_stream(response)
+
 
 # --- Setup ---
 st.set_page_config(page_title="DevGenius AI", layout="wide")
 inject_custom_css()
 init_session()
 
+# --- Local Embedding Warm-up (model loads in the background, once per process) ---
+if embedding_engine == "huggingface" and embedding_server is not None:
+    embedding_server.warm_up()
+
 # --- Session Metadata ---
 if 'conversation_id' not in st.session_state:
     st.session_state['conversation_id'] = str(uuid.uuid4())
@@ -40,10 +55,17 @@ with col2:
 # --- Mode Toggle ---
 mode = st.radio("Select Assistant Mode:", ["Claude", "Agent", "RAG+Chunks"], horizontal=True, key="chat_mode")
 
+# --- Chat UI Loop ---
+for msg in conversation.messages:
+    with st.chat_message(msg["role"]):
+        st.markdown(msg["content"])
+
 # --- Chat Input ---
 if prompt := st.chat_input("What do you want to build today?"):
     clean_prompt = sanitize_prompt(prompt)
     conversation.append_user(clean_prompt)
+    with st.chat_message("user"):
+        st.markdown(clean_prompt)
 
     similar_memories = recall_similar_memories(clean_prompt)
     if similar_memories:
@@ -53,16 +75,21 @@ if prompt := st.chat_input("What do you want to build today?"):
 
     try:
         with track_usage(model=mode, user_input=clean_prompt) as usage:
-            response = planner(conversation.messages, mode=mode)
+            with st.chat_message("assistant"):
+                response = render_response(planner(conversation.messages, mode=mode, stream=True))
         conversation.append_assistant(response)
         st.markdown(f"💰 Estimated cost: <span style='color:green;'>**${get_cost_estimate(usage)}**</span>", unsafe_allow_html=True)
     except Exception:
         st.error("❗ Error occurred. Trying fallback strategy.")
         fallback = fallback_router(mode)
         with track_usage(model=fallback, user_input=clean_prompt) as usage:
-            response = planner(conversation.messages, mode=fallback)
+            with st.chat_message("assistant"):
+                response = render_response(planner(conversation.messages, mode=fallback, stream=True))
         conversation.append_assistant(response)
 
+    # Queued per session; the summary is built off the request path
+    summarize_and_store(conversation.messages, st.session_state["conversation_id"])
+
 # --- Optional: Memory & Sources ---
 if mode == "RAG+Chunks":
     sources = st.session_state.get("rag_sources_used", [])
@@ -72,11 +99,6 @@ if mode == "RAG+Chunks":
 if st.session_state.get("memory_summary_used"):
     st.markdown("🧠 Summary memory was used to shape this response.")
 
-# --- Chat UI Loop ---
-for msg in conversation.messages:
-    with st.chat_message(msg["role"]):
-        st.markdown(msg["content"])
-
 # --- Planner Stage Gate ---
 stage = st.session_state.get("planner_stage", PlannerStage.GATHERING.value)
 
@@ -0,0 +1,64 @@
+# chatbot/ingestion/chunker.py — Token-window chunking of cleaned document text
+
+import os
+import re
+from typing import Dict, List
+
+from chatbot.utils.constants import CHUNK_SIZE, CHUNK_OVERLAP
+from chatbot.utils.text_utils import clean_text
+
+CHARS_PER_TOKEN = 4  # same estimate as cost_utils.count_tokens
+TEXT_EXTENSIONS = (".txt", ".md", ".markdown")
+
+
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Split text into ~chunk_size-token windows on word boundaries; consecutive
+    windows share ~overlap tokens. Paragraph breaks inside a window are kept,
+    so the context packer can still split on them.
+    """
+    words: List[str] = []
+    separators: List[str] = []  # separators[i] goes before words[i] within a window
+    for paragraph in re.split(r"\n\s*\n", text):
+        for i, word in enumerate(paragraph.split()):
+            separators.append("\n\n" if i == 0 and words else " ")
+            words.append(word)
+    budget, overlap_budget = chunk_size * CHARS_PER_TOKEN, overlap * CHARS_PER_TOKEN
+    chunks: List[str] = []
+    start = 0
+
+    while start < len(words):
+        end, used = start, 0
+        while end < len(words) and (end == start or used + len(words[end]) + len(separators[end]) <= budget):
+            used += len(words[end]) + len(separators[end])
+            end += 1
+        chunks.append(words[start] + "".join(separators[i] + words[i] for i in range(start + 1, end)))
+        if end == len(words):
+            break
+
+        # Step back far enough to carry ~overlap tokens into the next window
+        back, carried = end, 0
+        while back > start + 1 and carried + len(words[back - 1]) + 1 <= overlap_budget:
+            back -= 1
+            carried += len(words[back]) + 1
+        start = back
+
+    return chunks
+
+
+def chunk_document(path: str, relpath: str, content_hash: str) -> List[Dict]:
+    """
+    Read, clean once and chunk a single document. Runs inside a worker process.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        text = clean_text(f.read())
+
+    title = os.path.splitext(os.path.basename(relpath))[0]
+    return [
+        {
+            "id": f"{relpath}#{i}",
+            "content": chunk,
+            "metadata": {"source": relpath, "title": title, "chunk_index": i, "content_hash": content_hash},
+        }
+        for i, chunk in enumerate(chunk_text(text))
+    ]
@@ -0,0 +1,151 @@
+# chatbot/ingestion/pipeline.py — Incremental, parallel ingestion into the chunk store and local indexes
+
+import os
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from chatbot.ingestion.chunker import chunk_document, TEXT_EXTENSIONS
+from chatbot.rag.local_index import load_chunk_store, local_index
+from chatbot.rag.bm25_index import bm25_index, chunk_key
+from chatbot.rag.retrieval_cache import bump_corpus_version
+from chatbot.rag.retrieval_layer import _embed_batch, embedding_engine
+from chatbot.utils.constants import (
+    CHUNK_DB_PATH,
+    INGEST_SOURCE_DIR,
+    INGEST_MANIFEST_PATH,
+    HF_EMBEDDING_MODEL,
+    BEDROCK_EMBEDDING_MODEL_ID,
+)
+from chatbot.utils.config_loader import get_config_value
+from chatbot.logger import logger
+
+INGEST_WORKERS = int(get_config_value("ingest_workers", 0)) or os.cpu_count() or 1
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data) -> None:
+    # Write-then-rename: readers never see a half-written store or manifest
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _scan(source_dir: str) -> Dict[str, str]:
+    found = {}
+    for root, _, files in os.walk(source_dir):
+        for name in sorted(files):
+            if name.lower().endswith(TEXT_EXTENSIONS):
+                path = os.path.join(root, name)
+                found[os.path.relpath(path, source_dir).replace(os.sep, "/")] = path
+    return found
+
+
+def _chunk_all(jobs: List[tuple], workers: int) -> List[List[Dict]]:
+    if workers <= 1 or len(jobs) <= 1:
+        return [chunk_document(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return list(pool.map(chunk_document, *zip(*jobs), chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def ingest_directory(
+    source_dir: str = INGEST_SOURCE_DIR,
+    chunk_store_path: str = CHUNK_DB_PATH,
+    manifest_path: str = INGEST_MANIFEST_PATH,
+    workers: int = INGEST_WORKERS,
+    update_indexes: bool = True,
+) -> Dict[str, int]:
+    """
+    Chunk new and changed documents under source_dir (a local stand-in for the S3
+    bucket) and rewrite the chunk store in one bulk write.
+
+    Documents whose content hash matches the manifest are skipped, and documents
+    that disappeared are dropped. Text is cleaned once here, so retrieval serves
+    stored chunks as-is. Afterwards the BM25 and local vector indexes are brought
+    up to date and the corpus version is bumped, which invalidates cached retrievals
+    and makes indexes already loaded by a serving process reload from disk.
+    """
+    manifest: Dict[str, Dict] = _read_json(manifest_path, {})
+    found = _scan(source_dir)
+    hashes = {relpath: file_hash(path) for relpath, path in found.items()}
+
+    changed = [r for r in found if manifest.get(r, {}).get("sha256") != hashes[r]]
+    deleted = [r for r in manifest if r not in found]
+    stats = {"scanned": len(found), "skipped": len(found) - len(changed), "ingested": len(changed),
+             "deleted": len(deleted), "chunks_added": 0, "chunks_removed": 0}
+    if not changed and not deleted:
+        logger.info(f"[Ingest] {len(found)} documents unchanged, nothing to do")
+        return stats
+
+    new_chunks = [c for doc in _chunk_all([(found[r], r, hashes[r]) for r in changed], workers) for c in doc]
+
+    stale_sources = set(changed) | set(deleted)
+    existing = load_chunk_store(chunk_store_path) if os.path.exists(chunk_store_path) else []
+    kept = [c for c in existing if c.get("metadata", {}).get("source") not in stale_sources]
+    removed = [c for c in existing if c.get("metadata", {}).get("source") in stale_sources]
+    # Unchanged chunks keep their positions and new ones are appended, so append-only indexes stay aligned
+    _write_json(chunk_store_path, kept + new_chunks)
+
+    for relpath in changed:
+        manifest[relpath] = {"sha256": hashes[relpath], "chunks": sum(1 for c in new_chunks if c["metadata"]["source"] == relpath)}
+    for relpath in deleted:
+        manifest.pop(relpath, None)
+    _write_json(manifest_path, manifest)
+
+    stats["chunks_added"], stats["chunks_removed"] = len(new_chunks), len(removed)
+    logger.info(f"[Ingest] {stats}")
+
+    if update_indexes:
+        _update_indexes(chunk_store_path, new_chunks, removed)
+    bump_corpus_version()
+    return stats
+
+
+def _update_indexes(chunk_store_path: str, added: List[Dict], removed: List[Dict]) -> None:
+    if bm25_index.exists():
+        for chunk in removed:
+            bm25_index.delete(chunk_key(chunk))
+        for chunk in added:
+            bm25_index.add(chunk_key(chunk), chunk["content"], chunk["metadata"])
+        bm25_index.save()
+
+    if local_index.exists():
+        # Tombstone the stale rows and embed only the new chunks; the files stay in
+        # place throughout, so serving processes never see a missing index
+        with local_index.build_lock():
+            local_index.remove(chunk_key(chunk) for chunk in removed)
+            model = HF_EMBEDDING_MODEL if embedding_engine == "huggingface" else BEDROCK_EMBEDDING_MODEL_ID
+            local_index.build_from_chunk_store(_embed_batch, path=chunk_store_path, engine=embedding_engine, model=model)
+            if local_index.needs_compaction():
+                local_index.compact()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Incrementally ingest documents into the local chunk store")
+    parser.add_argument("source_dir", nargs="?", default=INGEST_SOURCE_DIR)
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument("--no-index", action="store_true", help="only write the chunk store and manifest")
+    args = parser.parse_args(argv)
+    print(json.dumps(ingest_directory(args.source_dir, workers=args.workers, update_indexes=not args.no_index)))
+
+
+if __name__ == "__main__":
+    main()
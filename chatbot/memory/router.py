@@ -1,27 +1,43 @@
 # memory/router.py — Routes interaction history into long-term memory (e.g., Chroma)
 
+import atexit
 from datetime import datetime
-from chatbot.memory.summarizer import summarize_messages
+from chatbot.memory.summarizer import rolling_summarizer
+from chatbot.memory.worker import MemoryWorker
 from chatbot.vector_store.chroma import store_summary_if_relevant
 from chatbot.logger import logger
 
 
-def summarize_and_store(messages: list[dict]) -> None:
+def summarize_and_store(messages: list[dict], conversation_id: str) -> None:
     """
-    If messages exceed threshold, summarize and store in ChromaDB.
+    If messages exceed threshold, queue them for summarization and storage in ChromaDB.
+    Returns immediately; the LLM call and the vector write run on the memory worker.
+    Jobs are merged per conversation_id, so it must identify the session.
     """
     if not messages or len(messages) < 4:
         return
 
-    try:
-        summary = summarize_messages(messages)
-        metadata = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "tags": list(set(msg.get("type", "qa") for msg in messages)),
-            "user": "session_user"  # Customize per auth context
-        }
-        store_summary_if_relevant(summary, metadata)
-        logger.info("[Memory] Summary stored to Chroma vector memory.")
-
-    except Exception as e:
-        logger.warning("[Memory] Summarization failed: %s", str(e))
+    if not memory_worker.enqueue(conversation_id, messages):
+        logger.warning("[Memory] Memory queue full, skipped summary for %s", conversation_id)
+
+
+def _summarize_and_store_now(conversation_id: str, messages: list[dict]) -> None:
+    """
+    Fold the new turns into the conversation's rolling summary and store it.
+    Raises on failure so the worker can retry.
+    """
+    summary = rolling_summarizer.summarize(conversation_id, messages)
+    metadata = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "conversation_id": conversation_id,
+        "tags": list(set(msg.get("type", "qa") for msg in messages)),
+        "user": "session_user"  # Customize per auth context
+    }
+    # One row per conversation: each rolling summary supersedes the previous one
+    store_summary_if_relevant(summary, metadata, doc_id=f"summary-{conversation_id}")
+    logger.info("[Memory] Summary stored to Chroma vector memory.")
+
+
+# === Process-wide Instance (resumes jobs persisted by the previous run) ===
+memory_worker = MemoryWorker(process_fn=_summarize_and_store_now)
+atexit.register(memory_worker.stop)
@@ -1,7 +1,24 @@
 # Summarizes conversation history using Claude (or fallback)
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
 from chatbot.agent import call_claude
+from chatbot.utils.config_loader import get_config_value
+from chatbot.utils.context_builder import truncate_to_tokens
+from chatbot.utils.cost_utils import count_tokens
 from chatbot.logger import logger
 
+# === Rolling Summary Bounds ===
+SUMMARY_MAX_TOKENS = int(get_config_value("memory_summary_max_tokens", 300))  # hard cap on the running summary
+FOLD_MAX_TOKENS = int(get_config_value("memory_fold_max_tokens", 1500))       # new-turn tokens per Claude call
+MAX_TRACKED_CONVERSATIONS = 1000
+FAILURE_PREFIXES = ("⚠️", "[Claude returned")
+
+
+def _transcript(messages: List[dict]) -> str:
+    return "\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in messages)
+
 
 def summarize_messages(messages: list[dict]) -> str:
     """
@@ -15,7 +32,7 @@ def summarize_messages(messages: list[dict]) -> str:
         return "No conversation to summarize."
 
     try:
-        transcript = "\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in messages)
+        transcript = _transcript(messages)
         prompt = f"""
         Please summarize the following conversation into a short, fact-preserving narrative
         for long-term memory storage. Focus on intent, decisions, and knowledge shared.
@@ -25,9 +42,123 @@ def summarize_messages(messages: list[dict]) -> str:
 
         Summary:
         """
-        return call_claude(prompt)
+        return call_claude(prompt, use_cache=False)
 
     except Exception as e:
         logger.exception("[Summarizer] Failed to summarize: %s", e)
         return "⚠️ Summarization failed."
 
+
+def fold_turns(summary: str, turns: List[dict], max_tokens: int = SUMMARY_MAX_TOKENS) -> str:
+    """
+    Folds new turns into an existing summary with one Claude call and caps the
+    result at max_tokens. Raises on failure so the caller keeps its old state.
+    """
+    words = max(max_tokens * 3 // 4, 20)
+    prompt = f"""
+        Update the running summary of a conversation for long-term memory storage.
+        Merge the new turns into it, keeping intent, decisions, and knowledge shared,
+        and dropping detail that no longer matters. Answer in at most {words} words.
+
+        Current summary:
+        {summary or "(empty)"}
+
+        New turns:
+        {_transcript(turns)}
+
+        Updated summary:
+        """
+    # Fold prompts are one template with no context, so a semantic cache hit could
+    # hand this conversation another conversation's summary
+    updated = call_claude(prompt, use_cache=False).strip()
+    if not updated or updated.startswith(FAILURE_PREFIXES):
+        raise RuntimeError(f"summarization failed: {updated[:120]}")
+    return truncate_to_tokens(updated, max_tokens)
+
+
+def _key(message: Dict) -> tuple:
+    return message.get("role"), message.get("content")
+
+
+class _SummaryState:
+    def __init__(self):
+        self.summary: str = ""
+        self.upto: int = 0  # high-water mark: messages already folded into summary
+        self.last_folded: Optional[tuple] = None
+
+
+class RollingSummarizer:
+    """
+    Keeps a running summary and high-water mark per conversation, so each call
+    folds only the turns added since the last one. New turns go to Claude in
+    windows of at most fold_max_tokens, and the summary never exceeds
+    max_tokens, so every Claude call has bounded input regardless of how long
+    the conversation has run.
+
+    If the transcript no longer extends what was folded (history cleared or
+    rewritten), the conversation starts a fresh summary.
+    """
+
+    def __init__(
+        self,
+        fold_fn: Callable[[str, List[dict], int], str] = fold_turns,
+        max_tokens: int = SUMMARY_MAX_TOKENS,
+        fold_max_tokens: int = FOLD_MAX_TOKENS,
+    ):
+        self.fold_fn = fold_fn
+        self.max_tokens = max_tokens
+        self.fold_max_tokens = fold_max_tokens
+        self._states: "OrderedDict[str, _SummaryState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def summarize(self, conversation_id: str, messages: List[dict]) -> str:
+        state = self._state_for(conversation_id)
+        if not self._extends(state, messages):
+            logger.info(f"[Summarizer] Transcript for {conversation_id} diverged; starting a new summary")
+            state.summary, state.upto, state.last_folded = "", 0, None
+
+        for window in self._windows(messages[state.upto:]):
+            # Advance only after a successful fold so a retry resumes from here
+            state.summary = self.fold_fn(state.summary, window, self.max_tokens)
+            state.upto += len(window)
+            state.last_folded = _key(window[-1])
+        return state.summary
+
+    def reset(self, conversation_id: str) -> None:
+        with self._lock:
+            self._states.pop(conversation_id, None)
+
+    def _state_for(self, conversation_id: str) -> _SummaryState:
+        with self._lock:
+            state = self._states.pop(conversation_id, None) or _SummaryState()
+            self._states[conversation_id] = state
+            while len(self._states) > MAX_TRACKED_CONVERSATIONS:
+                self._states.popitem(last=False)
+            return state
+
+    @staticmethod
+    def _extends(state: _SummaryState, messages: List[dict]) -> bool:
+        if state.upto == 0:
+            return True
+        return len(messages) >= state.upto and _key(messages[state.upto - 1]) == state.last_folded
+
+    def _windows(self, turns: List[dict]) -> List[List[dict]]:
+        windows, current, used = [], [], 0
+        for turn in turns:
+            cost = count_tokens(turn["content"])
+            if current and used + cost > self.fold_max_tokens:
+                windows.append(current)
+                current, used = [], 0
+            # A single oversized turn is clipped rather than sent whole
+            if cost > self.fold_max_tokens:
+                turn = {**turn, "content": truncate_to_tokens(turn["content"], self.fold_max_tokens)}
+                cost = self.fold_max_tokens
+            current.append(turn)
+            used += cost
+        if current:
+            windows.append(current)
+        return windows
+
+
+# === Process-wide Instance ===
+rolling_summarizer = RollingSummarizer()
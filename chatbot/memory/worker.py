@@ -0,0 +1,185 @@
+# memory/worker.py — Background queue for long-term memory summarization and storage
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from chatbot.utils.constants import MEMORY_QUEUE_PATH
+from chatbot.utils.config_loader import get_config_value
+from chatbot.logger import logger
+
+# === Configurable Queue Policy ===
+MAX_PENDING = int(get_config_value("memory_queue_max_pending", 100))
+OVERFLOW_POLICY = get_config_value("memory_queue_overflow_policy", "drop_oldest")  # drop_oldest | drop_new
+MAX_ATTEMPTS = int(get_config_value("memory_job_max_attempts", 3))
+
+
+class MemoryWorker:
+    """
+    Bounded background queue of memory jobs, one pending job per conversation.
+
+    - enqueue() never blocks on the LLM or the vector store
+    - Merge: a newer snapshot of a conversation replaces its pending job, so a
+      chatty session costs one summarization, not one per turn
+    - Backpressure: when max_pending distinct conversations are waiting, the
+      oldest job is dropped (drop_oldest) or the new one is refused (drop_new)
+    - Persistence: pending jobs, including the one in flight, are written to
+      persist_path on every enqueue and state change and reloaded on start, so
+      a restart resumes them instead of losing them
+    """
+
+    def __init__(
+        self,
+        process_fn: Callable[[str, List[dict]], None],
+        persist_path: Optional[str] = MEMORY_QUEUE_PATH,
+        max_pending: int = MAX_PENDING,
+        overflow_policy: str = OVERFLOW_POLICY,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        if overflow_policy not in ("drop_oldest", "drop_new"):
+            raise ValueError(f"Unknown overflow policy '{overflow_policy}'")
+        self.process_fn = process_fn
+        self.persist_path = persist_path
+        self.max_pending = max_pending
+        self.overflow_policy = overflow_policy
+        self.max_attempts = max_attempts
+
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._in_flight: Optional[Dict] = None
+        self._cond = threading.Condition()
+        self._dirty = False
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"enqueued": 0, "merged": 0, "dropped": 0, "processed": 0, "failed": 0, "retried": 0}
+        self._load()
+
+    # === Public API ===
+    def enqueue(self, conversation_id: str, messages: List[dict]) -> bool:
+        """
+        Queue a memory job; returns False if it was refused under backpressure.
+        """
+        job = {"conversation_id": conversation_id, "messages": list(messages), "attempts": 0, "queued_at": time.time()}
+        with self._cond:
+            if conversation_id in self._jobs:
+                self._jobs[conversation_id] = job
+                self._stats["merged"] += 1
+            else:
+                if len(self._jobs) >= self.max_pending:
+                    if self.overflow_policy == "drop_new":
+                        self._stats["dropped"] += 1
+                        logger.warning(f"[MemoryWorker] Queue full, dropped new job for {conversation_id}")
+                        return False
+                    dropped, _ = self._jobs.popitem(last=False)
+                    self._stats["dropped"] += 1
+                    logger.warning(f"[MemoryWorker] Queue full, dropped oldest job for {dropped}")
+                self._jobs[conversation_id] = job
+            self._stats["enqueued"] += 1
+            self._dirty = True
+            # Written here, not only by the worker: it may be blocked in a Claude call for seconds
+            self._persist()
+            self._cond.notify()
+        self._ensure_started()
+        return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {**self._stats, "pending": len(self._jobs), "in_flight": self._in_flight is not None}
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """
+        Wait until every queued job is processed (tests, shutdown hooks).
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._jobs or self._in_flight is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._cond:
+            self._persist()
+
+    # === Worker Loop ===
+    def _ensure_started(self) -> None:
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="memory-worker", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._jobs and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                _, job = self._jobs.popitem(last=False)
+                self._in_flight = job
+                self._persist()
+
+            self._process(job)
+
+            with self._cond:
+                self._in_flight = None
+                self._dirty = True
+                self._persist()
+                self._cond.notify_all()
+
+    def _process(self, job: Dict) -> None:
+        job["attempts"] += 1
+        try:
+            self.process_fn(job["conversation_id"], job["messages"])
+            with self._cond:
+                self._stats["processed"] += 1
+        except Exception as e:
+            with self._cond:
+                retry = job["attempts"] < self.max_attempts and job["conversation_id"] not in self._jobs
+                if retry:
+                    # Back of the queue; a newer snapshot of the conversation supersedes the retry
+                    self._jobs[job["conversation_id"]] = job
+                    self._stats["retried"] += 1
+                else:
+                    self._stats["failed"] += 1
+            logger.warning(f"[MemoryWorker] Job for {job['conversation_id']} failed (attempt {job['attempts']}): {e}")
+
+    # === Persistence (call with lock held) ===
+    def _persist(self) -> None:
+        if not self.persist_path or not self._dirty and self._in_flight is None:
+            return
+        pending = ([self._in_flight] if self._in_flight else []) + list(self._jobs.values())
+        try:
+            os.makedirs(os.path.dirname(self.persist_path) or ".", exist_ok=True)
+            tmp_path = f"{self.persist_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(pending, f)
+            os.replace(tmp_path, self.persist_path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"[MemoryWorker] Could not persist pending jobs: {e}")
+
+    def _load(self) -> None:
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path) as f:
+                pending = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"[MemoryWorker] Ignoring unreadable job file: {e}")
+            return
+        for job in pending[-self.max_pending:]:
+            self._jobs[job["conversation_id"]] = job
+        if self._jobs:
+            logger.info(f"[MemoryWorker] Resuming {len(self._jobs)} pending memory jobs")
+            self._ensure_started()
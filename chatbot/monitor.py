@@ -18,6 +18,11 @@ from chatbot.utils.monitor_utils import (
 from chatbot.utils.email_alert import send_cost_alert
 from chatbot.utils.config_loader import get_config_value
 from chatbot.utils.auth_utils import is_admin_user
+from chatbot.utils.response_cache import response_cache
+from chatbot.utils.embedding_cache import embedding_cache
+from chatbot.utils.embedding_server import embedding_server
+from chatbot.rag.retrieval_cache import retrieval_cache
+from chatbot.utils.rate_limiter import limiter_metrics
 
 # === Access Control ===
 if not is_admin_user():
@@ -72,6 +77,51 @@ col1.metric("💰 Total Cost", f"${total_cost:,.2f}")
 col2.metric("🔢 Total Tokens", f"{total_tokens:,}")
 col3.metric("👥 Unique Users", unique_users)
 
+# === Response Cache ===
+st.subheader("⚡ Claude Response Cache")
+cache_stats = response_cache.stats()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("🎯 Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+col2.metric("✅ Exact Hits", cache_stats["exact_hits"])
+col3.metric("🧭 Semantic Hits", cache_stats["semantic_hits"])
+col4.metric("❌ Misses", cache_stats["misses"])
+st.caption(f"{cache_stats['entries']} cached responses · {cache_stats['evictions']} evicted · {cache_stats['expired']} expired")
+
+# === Embedding Cache ===
+st.subheader("🧬 Embedding Cache")
+embed_stats = embedding_cache.stats()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("🎯 Hit Rate", f"{embed_stats['hit_rate']:.0%}")
+col2.metric("🧠 Memory Hits", embed_stats["memory_hits"])
+col3.metric("💾 Disk Hits", embed_stats["disk_hits"])
+col4.metric("❌ Misses", embed_stats["misses"])
+st.caption(f"{embed_stats['memory_entries']} vectors in memory · {embed_stats['disk_entries']} on disk")
+if embedding_server is not None:
+    server_stats = embedding_server.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("⏳ HF Model Load", f"{server_stats['load_seconds']}s" if server_stats["load_seconds"] is not None else "not loaded")
+    col2.metric("📦 Avg Batch Size", server_stats["avg_batch_texts"])
+    col3.metric("⚡ Batch p50", f"{server_stats['batch_ms_p50'] or 0:.1f} ms")
+    col4.metric("🐢 Batch p95", f"{server_stats['batch_ms_p95'] or 0:.1f} ms")
+
+# === Retrieval Cache ===
+st.subheader("🗂️ RAG Retrieval Cache")
+rag_stats = retrieval_cache.stats()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("🎯 Hit Rate", f"{rag_stats['hit_rate']:.0%}")
+col2.metric("⏱️ Time Saved", f"{rag_stats['saved_ms'] / 1000:,.1f}s")
+col3.metric("💵 Cost Saved", f"${rag_stats['saved_usd']:,.3f}")
+col4.metric("♻️ Stale (corpus changed)", rag_stats["stale"])
+st.caption(f"{rag_stats['entries']} cached results · {rag_stats['bytes'] / 1e6:.1f} MB · {rag_stats['evictions']} evicted · {rag_stats['expired']} expired")
+
+# === Bedrock Rate Limiter ===
+st.subheader("🚦 Bedrock Rate Limiter")
+limiter_df = pd.DataFrame(limiter_metrics())
+if not limiter_df.empty:
+    st.dataframe(limiter_df, use_container_width=True)
+else:
+    st.info("No Bedrock calls made by this task yet.")
+
 # === Usage Summary Table ===
 st.subheader("📊 Usage Summary by Mode")
 df_usage = summarize_usage_by_mode(usage_records)
@@ -38,6 +38,23 @@ with st.form("config_form"):
         index=["bedrock", "huggingface"].index(config.get("embedding_engine", "bedrock"))
     )
 
+    config["rag_mmr_lambda"] = st.slider(
+        "Context Diversity (MMR λ: 1.0 = relevance only)", 0.0, 1.0, float(config.get("rag_mmr_lambda", 0.7)), 0.05)
+
+    st.subheader("⚡ Response Cache")
+
+    config["response_cache_enabled"] = st.checkbox(
+        "Enable Claude Response Cache", bool(config.get("response_cache_enabled", True)))
+
+    config["response_cache_ttl_seconds"] = st.slider(
+        "Cache TTL (seconds)", 60, 86400, int(config.get("response_cache_ttl_seconds", 3600)), 60)
+
+    config["response_cache_max_entries"] = st.slider(
+        "Max Cached Responses", 16, 4096, int(config.get("response_cache_max_entries", 512)))
+
+    config["response_cache_similarity"] = st.slider(
+        "Semantic Match Threshold", 0.80, 1.0, float(config.get("response_cache_similarity", 0.95)), 0.01)
+
     submitted = st.form_submit_button("💾 Save Changes")
 
     if submitted:
@@ -1,23 +1,27 @@
 import streamlit as st
+from typing import Iterator, Union
 from chatbot.utils.prompt_router import route_prompt
-from chatbot.agent import call_claude, call_bedrock_agent
+from chatbot.agent import call_claude, call_bedrock_agent, stream_claude, stream_bedrock_agent
 from chatbot.rag.rag_router import hybrid_rag_router
+from chatbot.utils.context_builder import context_builder
 from chatbot.logger import logger
 from chatbot.utils.constants import PLANNER_STAGES
 
 
-def planner(messages: list[dict], mode: str = "Claude") -> str:
+def planner(messages: list[dict], mode: str = "Claude", stream: bool = False) -> Union[str, Iterator[str]]:
     """
     Central planning hub that decides how to process user input.
 
     Args:
         messages: Full conversation history.
         mode: Claude | Agent | RAG+Chunks
+        stream: Return a generator of text deltas instead of a full string
 
     Returns:
-        LLM response string
+        LLM response string, or a text generator when stream=True
     """
     user_input = messages[-1]["content"]
+    conversation_id = st.session_state.get("conversation_id", "anon")
     intent = route_prompt(user_input)
     logger.info(f"[Planner] User intent routed as: {intent}")
 
@@ -44,13 +48,16 @@ def planner(messages: list[dict], mode: str = "Claude") -> str:
     try:
         if mode == "Claude":
             logger.info("[Planner] Mode: Claude")
-            return call_claude(user_input)
+            return _claude(conversation_id, messages, stream)
 
         elif mode == "Agent":
             logger.info("[Planner] Mode: Bedrock Agent")
             session_id = st.session_state.get("agent_session_id") or f"session-{st.session_state.get('conversation_id', 'anon')}"
             st.session_state.agent_session_id = session_id
 
+            if stream:
+                return stream_bedrock_agent(user_input, session_id=session_id)
+
             agent_response = call_bedrock_agent(user_input, session_id=session_id)
             if "[Agent returned no message]" in agent_response:
                 logger.warning("[Planner] Agent failed, falling back to Claude")
@@ -64,24 +71,19 @@ def planner(messages: list[dict], mode: str = "Claude") -> str:
                 chunks = hybrid_rag_router(user_input)
                 if not chunks:
                     logger.warning("[RAG] No relevant chunks found — falling back to Claude")
-                    return call_claude(user_input)
-
-                context = "\n\n".join(
-                    f"[{c['metadata'].get('title', 'Doc')}] "
-                    f"(Page {c['metadata'].get('page', '?')}) "
-                    f"from {c['metadata'].get('source', 'Unknown')}:\n{c['content']}"
-                    for c in chunks
-                )
+                    return _claude(conversation_id, messages, stream)
+
+                # The router already packed each chunk under its own citation
+                context = "\n\n".join(c["content"] for c in chunks)
                 st.session_state.rag_sources_used = list({
                     c['metadata'].get('source', 'Unknown') for c in chunks
                 })
 
-                combined_prompt = f"""Here is helpful context:\n\n{context}\n\nNow answer this:\n{user_input}"""
-                return call_claude(combined_prompt)
+                return _claude(conversation_id, messages, stream, rag_context=context)
 
             except Exception as rag_error:
                 logger.exception("[RAG] Retrieval failed, fallback to Claude: %s", str(rag_error))
-                return call_claude(user_input)
+                return _claude(conversation_id, messages, stream)
 
         else:
             logger.warning(f"[Planner] Unknown mode received: '{mode}'")
@@ -90,3 +92,14 @@ def planner(messages: list[dict], mode: str = "Claude") -> str:
     except Exception as e:
         logger.exception("Planner failed during mode routing: %s", str(e))
         return "⚠️ Sorry, an error occurred while planning your request."
+
+
+# === Helper: Budgeted, Blocking or Streaming Claude Call ===
+def _claude(conversation_id: str, messages: list[dict], stream: bool, rag_context: str = "") -> Union[str, Iterator[str]]:
+    built = context_builder.build(conversation_id, messages, rag_context=rag_context)
+    logger.info(f"[Planner] Context: {len(built['history'])} turns, ~{built['input_tokens']} input tokens")
+
+    user_input = messages[-1]["content"]
+    if stream:
+        return stream_claude(user_input, context=built["context"], history=built["history"])
+    return call_claude(user_input, context=built["context"], history=built["history"])
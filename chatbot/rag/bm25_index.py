@@ -0,0 +1,259 @@
+# chatbot/rag/bm25_index.py — In-process BM25 keyword index over the local chunk store
+
+import os
+import re
+import json
+import math
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from chatbot.utils.constants import BM25_INDEX_DIR, CHUNK_DB_PATH
+from chatbot.rag.local_index import load_chunk_store, chunk_key
+from chatbot.rag.metadata_index import MetadataIndex
+from chatbot.rag.retrieval_cache import get_corpus_version
+from chatbot.utils.filters import metadata_matches
+from chatbot.logger import logger
+
+# === BM25 Parameters ===
+K1 = 1.2
+B = 0.75
+COMPACT_RATIO = 0.25  # compact on save once this share of docs is deleted
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where", "which", "with",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in re.findall(r"\w+", (text or "").lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index whose postings are compact typed arrays
+    (doc ids and term frequencies per term).
+
+    Documents are addressed by a caller-supplied key so they can be replaced or
+    deleted incrementally. Deletes are tombstoned and compacted on save.
+
+    A persisted index reloads from disk when the corpus version changes, so a
+    serving process picks up what the ingestion CLI saved.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None):
+        self.index_dir = index_dir
+        self._lock = threading.RLock()
+        self._loaded = index_dir is None
+        self._version: Optional[int] = None
+        self._reset()
+
+    # === Public API ===
+    def add(self, key: str, content: str, metadata: Optional[Dict] = None) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            if key in self._doc_ids:
+                self._delete(key)
+
+            doc_id = len(self._docs)
+            terms = tokenize(content)
+            counts: Dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+
+            for term, tf in counts.items():
+                term_id = self._vocab.get(term)
+                if term_id is None:
+                    term_id = self._vocab[term] = len(self._postings_ids)
+                    self._postings_ids.append(array("i"))
+                    self._postings_tfs.append(array("i"))
+                    self._df.append(0)
+                self._postings_ids[term_id].append(doc_id)
+                self._postings_tfs[term_id].append(tf)
+                self._df[term_id] += 1
+
+            self._docs.append({"key": key, "content": content, "metadata": dict(metadata or {})})
+            self._meta_index.add(doc_id, metadata or {})
+            self._doc_lengths.append(len(terms))
+            self._deleted.append(0)
+            self._doc_ids[key] = doc_id
+            self._live += 1
+            self._total_length += len(terms)
+            self._dirty = True
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            if key not in self._doc_ids:
+                return False
+            self._delete(key)
+            self._dirty = True
+            return True
+
+    def search(self, query: str, top_k: int, metadata_filter: Optional[Dict] = None) -> List[Tuple[Dict, float]]:
+        """
+        Return up to top_k (document, BM25 score) pairs, best first.
+        A metadata filter restricts scoring to matching documents.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if not self._live:
+                return []
+
+            n_docs = len(self._docs)
+            avgdl = self._total_length / self._live or 1.0
+            lengths = np.frombuffer(self._doc_lengths, dtype=np.int32, count=n_docs).astype(np.float32)
+            norm = K1 * (1 - B + B * lengths / avgdl)
+            scores = np.zeros(n_docs, dtype=np.float32)
+
+            for term in set(tokenize(query)):
+                term_id = self._vocab.get(term)
+                if term_id is None or not self._df[term_id]:
+                    continue
+                df = self._df[term_id]
+                idf = math.log(1 + (self._live - df + 0.5) / (df + 0.5))
+                ids = np.frombuffer(self._postings_ids[term_id], dtype=np.int32)
+                tfs = np.frombuffer(self._postings_tfs[term_id], dtype=np.int32).astype(np.float32)
+                scores[ids] += idf * tfs * (K1 + 1) / (tfs + norm[ids])
+
+            scores[np.frombuffer(self._deleted, dtype=np.uint8).astype(bool)] = 0.0
+            if metadata_filter:
+                allowed = self._meta_index.resolve(metadata_filter)
+                if allowed is None:
+                    allowed = [i for i, d in enumerate(self._docs) if metadata_matches(d["metadata"], metadata_filter)]
+                mask = np.zeros(n_docs, dtype=bool)
+                mask[np.asarray(allowed, dtype=np.int64)] = True
+                scores[~mask] = 0.0
+            hits = np.flatnonzero(scores > 0)
+            if not len(hits):
+                return []
+            k = min(top_k, len(hits))
+            best = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+            best = best[np.argsort(-scores[best])]
+            return [(self._docs[i], float(scores[i])) for i in best]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return self._live
+
+    def save(self) -> None:
+        """
+        Persist as CSR arrays (offsets, doc ids, tfs) plus vocabulary and documents.
+        """
+        with self._lock:
+            if self.index_dir is None or not self._dirty:
+                return
+            if self._docs and (len(self._docs) - self._live) / len(self._docs) >= COMPACT_RATIO:
+                self._compact()
+
+            os.makedirs(self.index_dir, exist_ok=True)
+            lengths = [len(p) for p in self._postings_ids]
+            offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            np.savez(
+                os.path.join(self.index_dir, "postings.npz"),
+                offsets=offsets,
+                ids=np.frombuffer(b"".join(p.tobytes() for p in self._postings_ids), dtype=np.int32),
+                tfs=np.frombuffer(b"".join(p.tobytes() for p in self._postings_tfs), dtype=np.int32),
+                doc_lengths=np.frombuffer(self._doc_lengths, dtype=np.int32),
+                deleted=np.frombuffer(self._deleted, dtype=np.uint8),
+            )
+            with open(os.path.join(self.index_dir, "vocab.json"), "w") as f:
+                json.dump(self._vocab, f)
+            with open(os.path.join(self.index_dir, "docs.jsonl"), "w") as f:
+                for doc in self._docs:
+                    f.write(json.dumps(doc) + "\n")
+            self._dirty = False
+            logger.info(f"[BM25] Saved {self._live} docs, {len(self._vocab)} terms to {self.index_dir}")
+
+    def build_from_chunk_store(self, path: str = CHUNK_DB_PATH) -> int:
+        """
+        Add chunks from the chunk store that are not indexed yet, then persist.
+        """
+        added = 0
+        with self._lock:
+            self._ensure_loaded()
+            for chunk in load_chunk_store(path):
+                key = chunk_key(chunk)
+                if key not in self._doc_ids:
+                    self.add(key, chunk.get("content", ""), chunk.get("metadata", {}))
+                    added += 1
+            self.save()
+        logger.info(f"[BM25] Indexed {added} new chunks from {path}")
+        return added
+
+    def exists(self) -> bool:
+        return self.index_dir is not None and os.path.exists(os.path.join(self.index_dir, "postings.npz"))
+
+    # === Internals (call with lock held) ===
+    def _reset(self) -> None:
+        self._vocab: Dict[str, int] = {}
+        self._postings_ids: List[array] = []
+        self._postings_tfs: List[array] = []
+        self._df: List[int] = []
+        self._docs: List[Dict] = []
+        self._doc_ids: Dict[str, int] = {}
+        self._doc_lengths = array("i")
+        self._deleted = array("B")
+        self._live = 0
+        self._total_length = 0
+        self._dirty = False
+        self._meta_index = MetadataIndex()
+
+    def _delete(self, key: str) -> None:
+        doc_id = self._doc_ids.pop(key)
+        self._deleted[doc_id] = 1
+        self._live -= 1
+        self._total_length -= self._doc_lengths[doc_id]
+        for term in set(tokenize(self._docs[doc_id]["content"])):
+            self._df[self._vocab[term]] -= 1
+
+    def _compact(self) -> None:
+        live_docs = [doc for doc, gone in zip(self._docs, self._deleted) if not gone]
+        self._reset()
+        for doc in live_docs:
+            self.add(doc["key"], doc["content"], doc["metadata"])
+
+    def _ensure_loaded(self) -> None:
+        if self.index_dir is None:
+            return
+        version = get_corpus_version()
+        if self._loaded:
+            # Unsaved local edits are newer than the disk copy; keep them
+            if version == self._version or self._dirty:
+                return
+            logger.info(f"[BM25] Corpus version {self._version} -> {version}, reloading {self.index_dir}")
+            self._reset()
+        self._loaded = True
+        self._version = version
+        if not self.exists():
+            return
+
+        data = np.load(os.path.join(self.index_dir, "postings.npz"))
+        with open(os.path.join(self.index_dir, "vocab.json")) as f:
+            self._vocab = json.load(f)
+        with open(os.path.join(self.index_dir, "docs.jsonl")) as f:
+            self._docs = [json.loads(line) for line in f if line.strip()]
+
+        offsets, ids, tfs = data["offsets"], data["ids"], data["tfs"]
+        self._postings_ids = [array("i", ids[offsets[t]:offsets[t + 1]].tobytes()) for t in range(len(offsets) - 1)]
+        self._postings_tfs = [array("i", tfs[offsets[t]:offsets[t + 1]].tobytes()) for t in range(len(offsets) - 1)]
+        self._doc_lengths = array("i", data["doc_lengths"].tobytes())
+        self._deleted = array("B", data["deleted"].tobytes())
+
+        deleted = data["deleted"].astype(bool)
+        self._df = [int((~deleted[p]).sum()) for p in (np.frombuffer(ids_, dtype=np.int32) for ids_ in self._postings_ids)]
+        self._doc_ids = {doc["key"]: i for i, doc in enumerate(self._docs) if not deleted[i]}
+        for doc_id, doc in enumerate(self._docs):
+            self._meta_index.add(doc_id, doc.get("metadata", {}))
+        self._live = len(self._doc_ids)
+        self._total_length = int(data["doc_lengths"][~deleted].sum())
+        logger.info(f"[BM25] Loaded {self._live} docs, {len(self._vocab)} terms from {self.index_dir}")
+
+
+# === Process-wide Instance (loaded lazily on first use) ===
+bm25_index = BM25Index(BM25_INDEX_DIR)
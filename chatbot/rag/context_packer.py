@@ -0,0 +1,104 @@
+# chatbot/rag/context_packer.py — Sentence-level, token-budgeted packing of RAG context
+
+import re
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from chatbot.utils.embeddings import normalize_rows
+from chatbot.utils.cost_utils import count_tokens
+from chatbot.utils.synthesizer import format_citation, synthesize_chunks
+from chatbot.rag.retrieval_layer import _embed_batch
+from chatbot.logger import logger
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+_WORD = re.compile(r"\w+")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text or "") if s and s.strip()]
+
+
+def _lexical_scores(query: str, sentences: List[str]) -> np.ndarray:
+    terms = set(_WORD.findall(query.lower()))
+    return np.asarray([
+        len(terms & set(_WORD.findall(s.lower()))) / (len(terms) or 1) for s in sentences
+    ], dtype=np.float32)
+
+
+def _sentence_scores(query: str, sentences: List[str], embed_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+    try:
+        vectors = normalize_rows(np.asarray(embed_fn([query] + sentences), dtype=np.float32))
+        return vectors[1:] @ vectors[0]
+    except Exception as e:
+        logger.warning(f"[Packer] Sentence embedding failed, scoring by term overlap: {e}")
+        return _lexical_scores(query, sentences)
+
+
+def pack_context(
+    query: str,
+    chunks: List[Dict],
+    token_budget: int,
+    embed_fn: Optional[Callable[[List[str]], np.ndarray]] = None,
+) -> str:
+    """
+    Build the RAG context block from the best sentences of each chunk, keeping
+    each sentence under its own chunk's citation.
+
+    Sentences are scored against the query in one embedding batch. Each chunk's
+    best sentence is packed first so no source is dropped, then the rest are
+    packed by score until token_budget is spent. Kept sentences stay in their
+    original order under the chunk's citation, and gaps are marked with "…".
+    Context that already fits the budget is returned verbatim.
+    """
+    verbatim = synthesize_chunks(chunks)
+    if count_tokens(verbatim) <= token_budget:
+        return verbatim
+
+    embed_fn = embed_fn or _embed_batch
+    per_chunk = [split_sentences(c.get("content", "")) for c in chunks]
+    flat = [(ci, si) for ci, sentences in enumerate(per_chunk) for si in range(len(sentences))]
+    if not flat:
+        return verbatim
+    scores = _sentence_scores(query, [per_chunk[ci][si] for ci, si in flat], embed_fn)
+
+    # +1 token per piece covers the separators and "…" gap markers added on assembly
+    header_costs = [count_tokens(format_citation(c)) + 1 for c in chunks]
+    kept: Dict[int, set] = {}
+    used = 0
+
+    def _try_add(idx: int) -> None:
+        nonlocal used
+        ci, si = flat[idx]
+        cost = count_tokens(per_chunk[ci][si]) + 1 + (0 if ci in kept else header_costs[ci])
+        if used + cost <= token_budget:
+            kept.setdefault(ci, set()).add(si)
+            used += cost
+
+    order = np.argsort(-scores, kind="stable")
+    # Pass 1: best sentence of every chunk, strongest chunks first
+    best_per_chunk: Dict[int, int] = {}
+    for idx in order:
+        best_per_chunk.setdefault(flat[idx][0], int(idx))
+    for idx in sorted(best_per_chunk.values(), key=lambda i: -scores[i]):
+        _try_add(idx)
+    # Pass 2: remaining sentences by score
+    for idx in order:
+        ci, si = flat[idx]
+        if si not in kept.get(ci, ()):
+            _try_add(int(idx))
+
+    blocks = []
+    for ci in sorted(kept):
+        parts, previous = [], None
+        for si in sorted(kept[ci]):
+            if previous is not None and si != previous + 1:
+                parts.append("…")
+            parts.append(per_chunk[ci][si])
+            previous = si
+        blocks.append(f"{format_citation(chunks[ci])}\n{' '.join(parts)}")
+
+    packed = "\n\n".join(blocks)
+    logger.info(f"[Packer] Packed {sum(len(s) for s in kept.values())}/{len(flat)} sentences "
+                f"from {len(kept)}/{len(chunks)} chunks (~{count_tokens(packed)}/{count_tokens(verbatim)} tokens)")
+    return packed
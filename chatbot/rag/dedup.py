@@ -0,0 +1,110 @@
+# chatbot/rag/dedup.py — MinHash LSH near-duplicate collapse for retrieved chunks
+
+import re
+import zlib
+from typing import Dict, List, Set
+
+import numpy as np
+
+from chatbot.utils.config_loader import get_config_value
+from chatbot.logger import logger
+
+# === MinHash / LSH Parameters ===
+NUM_PERM = 64
+BANDS = 16                      # 16 bands x 4 rows: candidate pairs from ~0.5 Jaccard upwards
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5                # word 5-grams
+DEDUP_THRESHOLD = float(get_config_value("rag_dedup_threshold", 0.8))
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)  # a*x + b stays below 2**64 for 32-bit x
+_B = _rng.integers(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    words = re.findall(r"\w+", (text or "").lower())
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+def minhash(shingle_set: Set[int]) -> np.ndarray:
+    if not shingle_set:
+        return np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    hashes = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+    # Universal hashing (a*x + b) mod p, minimised per permutation
+    return ((np.outer(hashes, _A) + _B) % _MERSENNE).min(axis=0)
+
+
+def _similarity(sig_a: np.ndarray, sig_b: np.ndarray, size_a: int, size_b: int) -> float:
+    """
+    Max of estimated Jaccard and containment, so a window nested inside a
+    longer overlapping window still counts as a duplicate.
+    """
+    jaccard = float(np.mean(sig_a == sig_b))
+    if not size_a or not size_b:
+        return jaccard
+    containment = jaccard * (size_a + size_b) / ((1 + jaccard) * min(size_a, size_b))
+    return max(jaccard, min(containment, 1.0))
+
+
+def _merge_into(rep: Dict, dup: Dict) -> None:
+    rep_meta = rep.setdefault("metadata", {})
+    dup_meta = dup.get("metadata", {})
+    for key, value in dup_meta.items():
+        rep_meta.setdefault(key, value)
+
+    dup_source = dup_meta.get("source")
+    if dup_source and dup_source != rep_meta.get("source"):
+        rep_meta.setdefault("duplicate_sources", [])
+        if dup_source not in rep_meta["duplicate_sources"]:
+            rep_meta["duplicate_sources"].append(dup_source)
+
+    for backend in dup.get("backends", [dup.get("source")] if dup.get("source") else []):
+        rep.setdefault("backends", [])
+        if backend not in rep["backends"]:
+            rep["backends"].append(backend)
+    if dup.get("confidence") is not None:
+        rep["confidence"] = max(rep.get("confidence") or 0.0, dup["confidence"])
+    rep["duplicates_collapsed"] = rep.get("duplicates_collapsed", 0) + 1
+
+
+def collapse_near_duplicates(chunks: List[Dict], threshold: float = DEDUP_THRESHOLD) -> List[Dict]:
+    """
+    Collapse near-duplicate chunks, keeping the best-scored copy of each group
+    and merging the others' metadata into it. Output keeps score order.
+    """
+    if len(chunks) < 2:
+        return chunks
+
+    ordered = sorted(chunks, key=lambda c: c.get("score", 0.0), reverse=True)
+    buckets: Dict[tuple, List[int]] = {}
+    reps: List[Dict] = []
+    signatures: List[np.ndarray] = []
+    sizes: List[int] = []
+
+    for chunk in ordered:
+        shingle_set = shingles(chunk.get("content", ""))
+        sig = minhash(shingle_set)
+        bands = [(b, sig[b * ROWS:(b + 1) * ROWS].tobytes()) for b in range(BANDS)]
+
+        candidates = {i for band in bands for i in buckets.get(band, [])}
+        match = next(
+            (i for i in sorted(candidates)
+             if _similarity(sig, signatures[i], len(shingle_set), sizes[i]) >= threshold),
+            None,
+        )
+        if match is not None:
+            _merge_into(reps[match], chunk)
+            continue
+
+        reps.append(dict(chunk, metadata=dict(chunk.get("metadata", {}))))
+        signatures.append(sig)
+        sizes.append(len(shingle_set))
+        for band in bands:
+            buckets.setdefault(band, []).append(len(reps) - 1)
+
+    if len(reps) < len(chunks):
+        logger.info(f"[Dedup] Collapsed {len(chunks) - len(reps)} near-duplicate chunks ({len(chunks)} → {len(reps)})")
+    return reps
@@ -0,0 +1,136 @@
+# chatbot/rag/fusion.py — Fuse per-backend retrieval results from their native scores
+
+import hashlib
+from typing import Callable, Dict, List, Optional, Sequence
+
+from chatbot.utils.config_loader import get_config_value
+from chatbot.logger import logger
+
+# === Configurable Fusion Settings ===
+FUSION_METHOD = get_config_value("rag_fusion_method", "weighted")  # weighted | rrf
+FUSION_WEIGHTS: Dict[str, float] = get_config_value("rag_fusion_weights", {"bedrock_kb": 1.0, "opensearch": 1.0})
+RRF_K = int(get_config_value("rag_rrf_k", 60))
+RERANK_MARGIN = float(get_config_value("rag_rerank_margin", 0.1))
+
+# Backends whose native scores are already calibrated relevance in [0, 1]
+BOUNDED_BACKENDS = {"bedrock_kb", "local_index"}
+
+
+def _content_key(chunk: Dict) -> str:
+    return hashlib.sha1(" ".join(chunk.get("content", "").split()).encode("utf-8")).hexdigest()
+
+
+def _normalized_scores(backend: str, chunks: List[Dict]) -> List[float]:
+    scores = [float(c.get("score") or 0.0) for c in chunks]
+    if backend in BOUNDED_BACKENDS or not scores:
+        return [min(max(s, 0.0), 1.0) for s in scores]
+    # Unbounded scores (BM25): scale by the best hit so the top result is 1.0
+    top = max(scores)
+    return [s / top if top > 0 else 0.0 for s in scores]
+
+
+def fuse_results(results: Dict[str, List[Dict]], method: str = FUSION_METHOD) -> List[Dict]:
+    """
+    Merge per-backend result lists into one list sorted by fused score in [0, 1].
+
+    weighted: weighted mean of normalized native scores across the backends that
+              returned the chunk.
+    rrf:      reciprocal rank fusion, normalized so rank 1 in every list scores 1.0.
+
+    Identical content returned by several backends is collapsed into one chunk;
+    each chunk keeps its backend score as "native_score".
+
+    "score" is only meaningful for ordering: max-normalization makes the top
+    keyword hit 1.0 however weak it is. "confidence" carries the best calibrated
+    native score (bounded backends only) and is None for keyword-only chunks;
+    see calibrate_confidence.
+    """
+    fused: Dict[str, Dict] = {}
+    totals: Dict[str, float] = {}
+    norms: Dict[str, float] = {}
+
+    for backend, chunks in results.items():
+        weight = float(FUSION_WEIGHTS.get(backend, 1.0))
+        ranked = sorted(chunks, key=lambda c: float(c.get("score") or 0.0), reverse=True)
+        normalized = _normalized_scores(backend, ranked)
+
+        for rank, (chunk, norm_score) in enumerate(zip(ranked, normalized), start=1):
+            key = _content_key(chunk)
+            if method == "rrf":
+                contribution, best = weight / (RRF_K + rank), weight / (RRF_K + 1)
+            else:
+                contribution, best = weight * norm_score, weight
+
+            if key not in fused:
+                fused[key] = {**chunk, "native_score": chunk.get("score"), "backends": [backend], "confidence": None}
+            elif backend not in fused[key]["backends"]:
+                fused[key]["backends"].append(backend)
+            if backend in BOUNDED_BACKENDS:
+                fused[key]["confidence"] = max(fused[key]["confidence"] or 0.0, norm_score)
+            totals[key] = totals.get(key, 0.0) + contribution
+            norms[key] = norms.get(key, 0.0) + best
+
+    for key, chunk in fused.items():
+        chunk["score"] = round(totals[key] / norms[key], 6) if norms[key] else 0.0
+
+    return sorted(fused.values(), key=lambda c: c["score"], reverse=True)
+
+
+def rerank_ambiguous(
+    query: str,
+    fused: List[Dict],
+    top_k: int,
+    rerank_fn: Callable[[str, List[Dict]], List[Dict]],
+    margin: float = RERANK_MARGIN,
+) -> List[Dict]:
+    """
+    Run the embedding reranker only on candidates whose fused score is within
+    `margin` of the top_k cut-off. Chunks clearly above the cut stay in place and
+    chunks clearly below it are dropped, so confident queries skip reranking.
+    """
+    if len(fused) <= top_k:
+        return fused
+
+    cutoff = fused[top_k - 1]["score"]
+    ambiguous = [i for i, c in enumerate(fused) if abs(c["score"] - cutoff) <= margin]
+    if ambiguous[-1] < top_k:
+        # Nothing below the cut is close enough to swap in
+        logger.info("[Fusion] Ranking is unambiguous, rerank skipped")
+        return fused[:top_k]
+
+    start, end = ambiguous[0], ambiguous[-1] + 1
+    window = [dict(c) for c in fused[start:end]]
+    try:
+        reranked = rerank_fn(query, window)
+    except Exception as e:
+        logger.warning(f"[Fusion] Rerank of ambiguous slice failed, keeping fused order: {e}")
+        return fused[:top_k]
+
+    fused_scores = {_content_key(c): c["score"] for c in fused[start:end]}
+    for chunk in reranked:
+        # Keep the fused score for ordering; the reranker's cosine becomes the confidence
+        chunk["rerank_score"] = chunk.pop("score", None)
+        chunk["score"] = fused_scores[_content_key(chunk)]
+        if chunk["rerank_score"] is not None:
+            chunk["confidence"] = chunk["rerank_score"]
+
+    logger.info(f"[Fusion] Reranked {len(window)} ambiguous of {len(fused)} fused chunks")
+    return (fused[:start] + reranked + fused[end:])[:top_k]
+
+
+def calibrate_confidence(chunks: List[Dict], relevance: Optional[Sequence[float]]) -> List[Dict]:
+    """
+    Fill in "confidence" for chunks that have no calibrated score yet (keyword-only
+    hits) from relevance, the query cosine of each chunk (aligned with chunks) --
+    the same measure the reranker scores with -- so a fixed threshold means the
+    same thing whichever backend found the chunk. The caller computes relevance
+    from vectors it reuses for MMR, so calibration costs no extra embedding call.
+    With relevance None (embedding failed), pending chunks get confidence 0.0 and
+    fall below any positive threshold.
+    """
+    pending = [i for i, c in enumerate(chunks) if c.get("confidence") is None]
+    if pending and relevance is None:
+        logger.warning(f"[Fusion] No relevance scores for {len(pending)} keyword-only chunks")
+    for i in pending:
+        chunks[i]["confidence"] = float(relevance[i]) if relevance is not None else 0.0
+    return chunks
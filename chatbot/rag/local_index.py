@@ -0,0 +1,484 @@
+# chatbot/rag/local_index.py — In-process IVF vector index over the local chunk store
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from chatbot.utils.constants import CHUNK_DB_PATH, LOCAL_INDEX_DIR
+from chatbot.utils.embeddings import normalize_rows
+from chatbot.utils import quantization
+from chatbot.utils.filters import metadata_matches
+from chatbot.rag.metadata_index import MetadataIndex
+from chatbot.rag.retrieval_cache import get_corpus_version
+from chatbot.utils.config_loader import get_config_value
+from chatbot.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: single-process use only
+    fcntl = None
+
+# === Tuning Knobs ===
+NPROBE = int(get_config_value("local_index_nprobe", 8))  # more lists probed = higher recall, more latency
+MIN_TRAIN_SIZE = 1024  # below this, search is exact (brute force is already sub-millisecond)
+RETRAIN_GROWTH = 4     # retrain once count > RETRAIN_GROWTH * nlist², i.e. the ideal sqrt(count) lists doubled
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 20_000
+VECTOR_DTYPE = get_config_value("local_index_dtype", "float32")  # float32 | float16 | int8 (new indexes only)
+COARSE_DIMS = int(get_config_value("local_index_coarse_dims", 0))  # 0 = single full-dimension pass
+COARSE_OVERSAMPLE = 4  # coarse pass keeps this many times top_k rows for full scoring
+COMPACT_RATIO = 0.25   # compact once this share of rows is deleted
+
+
+def load_chunk_store(path: str = CHUNK_DB_PATH) -> List[Dict]:
+    """
+    Read the chunk store: a JSON list of {"content", "metadata"} (or {"chunks": [...]}).
+    """
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("chunks", []) if isinstance(data, dict) else data
+
+
+def chunk_key(chunk: Dict) -> str:
+    return chunk.get("id") or hashlib.sha1(chunk.get("content", "").encode("utf-8")).hexdigest()
+
+
+def _row_key(row: Dict) -> str:
+    # Rows written before ids were recorded: rebuild the chunker's "<source>#<index>" id
+    metadata = row.get("metadata", {})
+    if not row.get("id") and "source" in metadata and "chunk_index" in metadata:
+        return f"{metadata['source']}#{metadata['chunk_index']}"
+    return chunk_key(row)
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means on normalized rows; returns (k, dim) normalized centroids.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(k):
+            members = vectors[assign == c]
+            # Re-seed empty clusters from a random point
+            centroids[c] = members.sum(axis=0) if len(members) else vectors[rng.integers(len(vectors))]
+        centroids = normalize_rows(centroids)
+    return centroids
+
+
+class LocalVectorIndex:
+    """
+    IVF-Flat index: vectors are clustered into nlist inverted lists and a query
+    only scores the nprobe closest lists.
+
+    Vectors live in a file opened with np.memmap and are loaded lazily on first
+    use. Inserts append to the file and go straight into their nearest list, so
+    the index never needs a full rebuild to stay searchable. The lists are
+    re-clustered whenever the index outgrows them (see RETRAIN_GROWTH), so list
+    sizes stay near sqrt(count) as the corpus grows and drifts.
+
+    Removed chunks are tombstoned (deleted.u8) and skipped at search time, so
+    re-ingesting an edited document only embeds its new chunks; compact() rewrites
+    the index without them once they make up COMPACT_RATIO of the rows.
+
+    The loaded state is tied to the corpus version: once ingestion (possibly in
+    another process) bumps it, the next call drops everything and reloads from disk.
+
+    Vectors are stored as float32, float16 or int8 (per-row scale in scales.f32);
+    the dtype is fixed when the index is created and recorded in meta.json. With
+    coarse_dims set, candidates are first ranked on a prefix of the dimensions and
+    only the best COARSE_OVERSAMPLE * top_k are scored in full.
+    """
+
+    def __init__(self, index_dir: str, nprobe: int = NPROBE, dtype: str = VECTOR_DTYPE, coarse_dims: int = COARSE_DIMS):
+        quantization.storage_dtype(dtype)
+        self.index_dir = index_dir
+        self.nprobe = nprobe
+        self.configured_dtype = dtype  # for new indexes; self.dtype follows whatever is on disk
+        self.coarse_dims = coarse_dims
+        self.scales_path = os.path.join(index_dir, "scales.f32")
+        self.assign_path = os.path.join(index_dir, "assign.i32")
+        self.chunks_path = os.path.join(index_dir, "chunks.jsonl")
+        self.meta_path = os.path.join(index_dir, "meta.json")
+        self.centroids_path = os.path.join(index_dir, "centroids.npy")
+        self.deleted_path = os.path.join(index_dir, "deleted.u8")
+        self.lock_path = f"{os.path.normpath(index_dir)}.lock"  # outside the directory, so it survives a swap
+
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._version: Optional[int] = None
+        self._clear()
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.index_dir, f"vectors.{quantization.STORAGE_DTYPES[self.dtype][1]}")
+
+    # === Public API ===
+    def exists(self) -> bool:
+        return os.path.exists(self.meta_path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._keys)
+
+    @contextmanager
+    def build_lock(self):
+        """
+        Cross-process lock for writers: ingestion holds it while updating the
+        index, and a serving process takes it before building a missing index.
+        """
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def search(self, query_vec: np.ndarray, top_k: int, nprobe: Optional[int] = None,
+               metadata_filter: Optional[Dict] = None) -> List[Tuple[Dict, float]]:
+        """
+        Return up to top_k (chunk, cosine score) pairs, best first.
+        A metadata filter is resolved to candidate rows before scoring, so filtered
+        queries still return top_k matches when they exist.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if not self.count:
+                return []
+
+            query = normalize_rows(query_vec)
+            if query.shape[-1] != self.meta["dim"]:
+                logger.warning(f"[LocalIndex] Query dim {query.shape[-1]} != index dim {self.meta['dim']}; rebuild the index")
+                return []
+
+            candidates = self._live_rows(self._candidate_rows(query, nprobe or self.nprobe))
+            if metadata_filter:
+                candidates = self._filter_candidates(candidates, metadata_filter, top_k)
+                if not len(candidates):
+                    return []
+            candidates, scores = self._score(candidates, query, top_k)
+
+        k = min(top_k, len(candidates))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(self._chunks[candidates[i]], float(scores[i])) for i in best]
+
+    def add(self, chunks: List[Dict], vectors: np.ndarray, engine: str = "", model: str = "") -> None:
+        """
+        Append chunks with their embeddings; each goes into its nearest inverted list.
+        """
+        if not chunks:
+            return
+        vectors = normalize_rows(vectors)
+
+        with self._lock:
+            self._ensure_loaded()
+            if not self.meta:
+                os.makedirs(self.index_dir, exist_ok=True)
+                self.meta = {"dim": int(vectors.shape[1]), "engine": engine, "model": model, "nlist": 0, "dtype": self.dtype}
+                open(self.vectors_path, "wb").close()
+                if self.dtype == "int8":
+                    open(self.scales_path, "wb").close()
+                open(self.assign_path, "wb").close()
+                self._write_meta()
+
+            start = self.count
+            self._ensure_capacity(start + len(chunks))
+            codes, scales = quantization.encode(vectors, self.dtype)
+            self._vectors[start:start + len(chunks)] = codes
+            self._vectors.flush()
+            if scales is not None:
+                self._scales[start:start + len(chunks)] = scales
+                self._scales.flush()
+
+            rows = [{"id": chunk_key(c), "content": c.get("content", ""), "metadata": dict(c.get("metadata", {}))}
+                    for c in chunks]
+            with open(self.chunks_path, "a") as f:
+                for row in rows:
+                    f.write(json.dumps(row) + "\n")
+            self._chunks.extend(rows)
+            if len(self._deleted) < start + len(rows):
+                grown = np.zeros(max(2 * len(self._deleted), start + len(rows)), dtype=bool)
+                grown[:start] = self._deleted[:start]
+                self._deleted = grown
+            for offset, row in enumerate(rows):
+                self._meta_index.add(start + offset, row["metadata"])
+                self._keys[row["id"]] = start + offset
+
+            if self._centroids is not None:
+                assign = np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+                for offset, list_id in enumerate(assign):
+                    self._lists[list_id].append(start + offset)
+                with open(self.assign_path, "ab") as f:
+                    f.write(assign.tobytes())
+
+            self.count = start + len(chunks)
+            self.meta["count"] = self.count
+            self._write_meta()
+
+            if self._needs_training():
+                self.train()
+
+    def remove(self, keys: Iterable[str]) -> int:
+        """
+        Tombstone the rows of the given chunk keys; returns how many were removed.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            rows = [self._keys.pop(key) for key in set(keys) if key in self._keys]
+            if not rows:
+                return 0
+            self._deleted[rows] = True
+            self._lists = [[row for row in members if not self._deleted[row]] for members in self._lists]
+            flags = self._deleted[:self.count]
+            tmp_path = f"{self.deleted_path}.tmp"
+            flags.astype(np.uint8).tofile(tmp_path)
+            os.replace(tmp_path, self.deleted_path)
+            self.meta["deleted"] = int(flags.sum())
+            self._write_meta()
+            logger.info(f"[LocalIndex] Removed {len(rows)} rows ({self.meta['deleted']} tombstoned)")
+            return len(rows)
+
+    def needs_compaction(self) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return bool(self.count) and self.meta.get("deleted", 0) / self.count >= COMPACT_RATIO
+
+    def compact(self) -> None:
+        """
+        Rewrite the live rows into a sibling directory and swap it in. Stored
+        vectors are copied over, so nothing is re-embedded. Hold build_lock().
+        """
+        with self._lock:
+            self._ensure_loaded()
+            live = np.flatnonzero(~self._deleted[:self.count])
+            if not len(live):
+                self.reset()
+                return
+            tmp_dir, old_dir = f"{self.index_dir}.compact", f"{self.index_dir}.old"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            # Rewritten in the configured dtype, so compaction also applies a local_index_dtype change
+            fresh = LocalVectorIndex(tmp_dir, nprobe=self.nprobe, dtype=self.configured_dtype, coarse_dims=self.coarse_dims)
+            for i in range(0, len(live), 8192):
+                rows = live[i:i + 8192]
+                chunks = [{**self._chunks[row], "id": _row_key(self._chunks[row])} for row in rows]
+                fresh.add(chunks, self._decoded(rows), engine=self.meta.get("engine", ""), model=self.meta.get("model", ""))
+
+            self._loaded = False
+            self._clear()
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.rename(self.index_dir, old_dir)
+            os.rename(tmp_dir, self.index_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+            logger.info(f"[LocalIndex] Compacted {self.index_dir} to {len(live)} rows")
+
+    def reset(self) -> None:
+        """
+        Drop every vector and remove the index files. The next insert creates the
+        index in the configured dtype, not the one the old files used.
+        """
+        with self._lock:
+            for path in (self.vectors_path, self.scales_path, self.assign_path, self.chunks_path, self.meta_path,
+                         self.centroids_path, self.deleted_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._loaded = True
+            self._version = get_corpus_version()
+            self._clear()
+            logger.info(f"[LocalIndex] Reset {self.index_dir}")
+
+    def train(self, nlist: Optional[int] = None) -> None:
+        """
+        (Re)cluster all vectors and rebuild the inverted lists.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if self.count < 2:
+                return
+            nlist = nlist or max(1, int(np.sqrt(self.count)))
+            rows = np.arange(self.count)
+            if self.count > KMEANS_SAMPLE:
+                rows = np.sort(np.random.default_rng(0).choice(self.count, KMEANS_SAMPLE, replace=False))
+            sample = self._decoded(rows)
+
+            self._centroids = kmeans(sample, min(nlist, len(sample)))
+            assign = np.concatenate([
+                np.argmax(self._decoded(np.arange(i, min(i + 8192, self.count))) @ self._centroids.T, axis=1)
+                for i in range(0, self.count, 8192)
+            ]).astype(np.int32)
+            self._lists = [[] for _ in range(len(self._centroids))]
+            for row, list_id in enumerate(assign):
+                if not self._deleted[row]:
+                    self._lists[list_id].append(row)
+
+            np.save(self.centroids_path, self._centroids)
+            assign.tofile(self.assign_path)
+            self.meta["nlist"] = len(self._centroids)
+            self._write_meta()
+            logger.info(f"[LocalIndex] Trained IVF with {len(self._centroids)} lists over {self.count} vectors")
+
+    def build_from_chunk_store(self, embed_fn: Callable[[List[str]], np.ndarray], path: str = CHUNK_DB_PATH,
+                               engine: str = "", model: str = "", batch_size: int = 256) -> int:
+        """
+        Embed and index chunks from the chunk store that are not indexed yet.
+        """
+        chunks = load_chunk_store(path)
+        with self._lock:
+            self._ensure_loaded()
+            pending = [c for c in chunks if chunk_key(c) not in self._keys]
+            for i in range(0, len(pending), batch_size):
+                batch = pending[i:i + batch_size]
+                self.add(batch, embed_fn([c.get("content", "") for c in batch]), engine=engine, model=model)
+        logger.info(f"[LocalIndex] Indexed {len(pending)} new chunks from {path}")
+        return len(pending)
+
+    # === Internals (call with lock held) ===
+    def _needs_training(self) -> bool:
+        if self._centroids is None:
+            return self.count >= MIN_TRAIN_SIZE
+        nlist = len(self._centroids)
+        return self.count > RETRAIN_GROWTH * nlist * nlist
+
+    def _live_rows(self, rows: np.ndarray) -> np.ndarray:
+        return rows[~self._deleted[rows]] if self.meta.get("deleted") else rows
+
+    def _decoded(self, rows: np.ndarray) -> np.ndarray:
+        scales = self._scales[rows] if self._scales is not None else None
+        return quantization.decode(self._vectors[rows], scales)
+
+    def _score(self, candidates: np.ndarray, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        codes = self._vectors[candidates]
+        scales = np.asarray(self._scales[candidates]) if self._scales is not None else None
+        shortlist = COARSE_OVERSAMPLE * top_k
+        if self.coarse_dims and self.coarse_dims < self.meta["dim"] and len(candidates) > shortlist:
+            # Coarse pass on a prefix of the dimensions, full scoring on the shortlist only
+            coarse = quantization.dot_scores(codes, scales, query, dims=self.coarse_dims)
+            keep = np.argpartition(-coarse, shortlist - 1)[:shortlist]
+            candidates, codes = candidates[keep], codes[keep]
+            scales = scales[keep] if scales is not None else None
+        return candidates, quantization.dot_scores(codes, scales, query)
+
+    def _filter_candidates(self, candidates: np.ndarray, metadata_filter: Dict, top_k: int) -> np.ndarray:
+        allowed = self._meta_index.resolve(metadata_filter)
+        if allowed is None:
+            # Filter on a non-indexed field: linear metadata scan
+            allowed = np.asarray([i for i, c in enumerate(self._chunks) if metadata_matches(c["metadata"], metadata_filter)],
+                                 dtype=np.int64)
+        allowed = self._live_rows(allowed)
+        probed = np.intersect1d(candidates, allowed)
+        # Selective filters can empty the probed lists; score every allowed row instead
+        return probed if len(probed) >= top_k else allowed
+
+    def _candidate_rows(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        if self._centroids is None:
+            return np.arange(self.count)
+        nprobe = min(nprobe, len(self._centroids))
+        probes = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        rows = [row for p in probes for row in self._lists[p]]
+        return np.asarray(rows, dtype=np.int64) if rows else np.arange(self.count)
+
+    def _clear(self) -> None:
+        self.dtype = self.configured_dtype
+        self.meta: Dict = {}
+        self.count = 0
+        self.capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._chunks: List[Dict] = []
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._deleted = np.zeros(0, dtype=bool)
+        self._keys: Dict[str, int] = {}  # chunk key -> live row
+        self._meta_index = MetadataIndex()
+
+    def _ensure_loaded(self) -> None:
+        version = get_corpus_version()
+        if self._loaded:
+            if version == self._version:
+                return
+            # Ingestion rewrote the files; the memmap size, lists and chunks are stale
+            logger.info(f"[LocalIndex] Corpus version {self._version} -> {version}, reloading {self.index_dir}")
+            self._clear()
+        self._loaded = True
+        self._version = version
+        if not self.exists():
+            return
+
+        with open(self.meta_path) as f:
+            self.meta = json.load(f)
+        # Indexes written before quantization support have no dtype and are float32
+        self.dtype = self.meta.get("dtype", "float32")
+        with open(self.chunks_path) as f:
+            self._chunks = [json.loads(line) for line in f if line.strip()]
+        self.count = min(self.meta.get("count", 0), len(self._chunks))
+        self._chunks = self._chunks[:self.count]
+        self._deleted = np.zeros(self.count, dtype=bool)
+        if os.path.exists(self.deleted_path):
+            flags = np.fromfile(self.deleted_path, dtype=np.uint8)[:self.count].astype(bool)
+            self._deleted[:len(flags)] = flags
+        for row, chunk in enumerate(self._chunks):
+            self._meta_index.add(row, chunk.get("metadata", {}))
+            if not self._deleted[row]:
+                self._keys[_row_key(chunk)] = row
+        self._open(os.path.getsize(self.vectors_path) // (self._itemsize * self.meta["dim"]))
+
+        if os.path.exists(self.centroids_path):
+            self._centroids = np.load(self.centroids_path)
+            assign = np.fromfile(self.assign_path, dtype=np.int32)[:self.count]
+            self._lists = [[] for _ in range(len(self._centroids))]
+            for row, list_id in enumerate(assign):
+                if not self._deleted[row]:
+                    self._lists[list_id].append(row)
+            # Rows appended after the last assignment write (interrupted insert) go to their nearest list
+            for row in range(len(assign), self.count):
+                self._lists[int(np.argmax(self._centroids @ self._decoded(np.asarray([row]))[0]))].append(row)
+        logger.info(f"[LocalIndex] Loaded {self.count} vectors (nlist={self.meta.get('nlist', 0)}) from {self.index_dir}")
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self.capacity:
+            return
+        capacity = max(1024, self.capacity)
+        while capacity < rows:
+            capacity *= 2
+        self._vectors, self._scales = None, None
+        with open(self.vectors_path, "r+b") as f:
+            f.truncate(capacity * self.meta["dim"] * self._itemsize)
+        if self.dtype == "int8":
+            with open(self.scales_path, "r+b") as f:
+                f.truncate(capacity * 4)
+        self._open(capacity)
+
+    @property
+    def _itemsize(self) -> int:
+        return quantization.storage_dtype(self.dtype).itemsize
+
+    def _open(self, capacity: int) -> None:
+        self.capacity = capacity
+        dtype = quantization.storage_dtype(self.dtype)
+        self._vectors = (
+            np.memmap(self.vectors_path, dtype=dtype, mode="r+", shape=(capacity, self.meta["dim"]))
+            if capacity else None
+        )
+        self._scales = (
+            np.memmap(self.scales_path, dtype=np.float32, mode="r+", shape=(capacity,))
+            if capacity and self.dtype == "int8" else None
+        )
+
+    def _write_meta(self) -> None:
+        with open(self.meta_path, "w") as f:
+            json.dump(self.meta, f)
+
+
+# === Process-wide Instance (loaded lazily on first search) ===
+local_index = LocalVectorIndex(LOCAL_INDEX_DIR)
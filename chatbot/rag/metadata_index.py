@@ -0,0 +1,48 @@
+# chatbot/rag/metadata_index.py — Per-field inverted metadata index for the local backends
+
+from array import array
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+# Fields resolved through the index; filters on other fields fall back to post-filtering
+INDEXED_FIELDS: Tuple[str, ...] = ("source", "author", "title")
+
+
+class MetadataIndex:
+    """
+    Maps field → value → row ids so a metadata filter resolves to a candidate
+    id set before any scoring happens.
+    """
+
+    def __init__(self, fields: Iterable[str] = INDEXED_FIELDS):
+        self.fields = tuple(fields)
+        self._postings: Dict[str, Dict[Any, array]] = {f: {} for f in self.fields}
+
+    def add(self, row: int, metadata: Dict) -> None:
+        for field in self.fields:
+            value = metadata.get(field)
+            if value is not None:
+                self._postings[field].setdefault(str(value), array("q")).append(row)
+
+    def can_resolve(self, metadata_filter: Optional[Dict]) -> bool:
+        return bool(metadata_filter) and all(k in self._postings for k in metadata_filter)
+
+    def resolve(self, metadata_filter: Dict) -> Optional[np.ndarray]:
+        """
+        Sorted row ids matching every clause (list values match any member),
+        or None when a filtered field is not indexed.
+        """
+        if not self.can_resolve(metadata_filter):
+            return None
+
+        result: Optional[np.ndarray] = None
+        for field, expected in metadata_filter.items():
+            values = expected if isinstance(expected, (list, tuple, set)) else [expected]
+            rows = [np.frombuffer(self._postings[field][str(v)], dtype=np.int64)
+                    for v in values if str(v) in self._postings[field]]
+            ids = np.unique(np.concatenate(rows)) if rows else np.zeros(0, dtype=np.int64)
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+            if not len(result):
+                break
+        return result
@@ -0,0 +1,84 @@
+# chatbot/rag/mmr.py — Maximal Marginal Relevance selection under a token budget
+
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from chatbot.utils.embeddings import normalize_rows
+from chatbot.utils.cost_utils import count_tokens
+from chatbot.logger import logger
+
+DEFAULT_MMR_LAMBDA = 0.7  # 1.0 = pure relevance, 0.0 = pure diversity
+
+
+def _take_in_order(chunks: List[Dict], costs: np.ndarray, top_n: int, token_budget: int) -> List[Dict]:
+    selected, used = [], 0
+    for chunk, cost in zip(chunks, costs):
+        if len(selected) == top_n:
+            break
+        if used + cost <= token_budget:
+            selected.append(chunk)
+            used += cost
+    return selected
+
+
+def embed_pool(query: str, chunks: List[Dict], embed_fn: Callable[[List[str]], np.ndarray]) -> Optional[np.ndarray]:
+    """
+    Normalized vectors for [query] + chunks from one embed_fn batch, or None if
+    embedding fails. Row 0 is the query, so rows[1:] @ rows[0] is relevance.
+    """
+    try:
+        return normalize_rows(np.asarray(embed_fn([query] + [c.get("content", "") for c in chunks]), dtype=np.float32))
+    except Exception as e:
+        logger.warning(f"[MMR] Embedding failed for {len(chunks)} chunks: {e}")
+        return None
+
+
+def mmr_select(
+    query: str,
+    chunks: List[Dict],
+    embed_fn: Callable[[List[str]], np.ndarray],
+    top_n: int,
+    token_budget: int,
+    lambda_: float = DEFAULT_MMR_LAMBDA,
+    vectors: Optional[np.ndarray] = None,
+) -> List[Dict]:
+    """
+    Greedily pick up to top_n chunks maximising
+    lambda * sim(query, chunk) - (1 - lambda) * max sim(chunk, already picked),
+    skipping chunks that no longer fit in token_budget.
+
+    Pass vectors (as returned by embed_pool) to reuse an earlier embedding pass;
+    otherwise embed_fn is called once for the batch.
+    Falls back to score order if embedding fails.
+    """
+    if not chunks:
+        return []
+    costs = np.asarray([count_tokens(c.get("content", "")) for c in chunks])
+
+    if vectors is None:
+        vectors = embed_pool(query, chunks, embed_fn)
+    if vectors is None:
+        logger.warning("[MMR] No embeddings, selecting by score")
+        return _take_in_order(chunks, costs, top_n, token_budget)
+
+    relevance = vectors[1:] @ vectors[0]
+    similarity = vectors[1:] @ vectors[1:].T
+    max_redundancy = np.zeros(len(chunks), dtype=np.float32)
+    available = costs <= token_budget
+    selected: List[int] = []
+    remaining = token_budget
+
+    while len(selected) < top_n and available.any():
+        mmr = np.where(available, lambda_ * relevance - (1 - lambda_) * max_redundancy, -np.inf)
+        best = int(np.argmax(mmr))
+
+        selected.append(best)
+        remaining -= int(costs[best])
+        available[best] = False
+        available &= costs <= remaining
+        max_redundancy = np.maximum(max_redundancy, similarity[:, best])
+
+    logger.info(f"[MMR] Selected {len(selected)}/{len(chunks)} chunks "
+                f"({token_budget - remaining}/{token_budget} tokens, lambda={lambda_})")
+    return [chunks[i] for i in selected]
@@ -1,91 +1,254 @@
 # chatbot/rag/rag_router.py
 
-from typing import List, Dict
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, List, Dict, Optional, Tuple
 from chatbot.rag.retrieval_layer import (
     query_bedrock_knowledge_base,
-    query_opensearch,
-    get_ranked_relevant_chunks
+    query_keyword,
+    query_local_index,
+    keyword_backend,
+    rank_by_engine,
+    _embed_batch
 )
-from chatbot.utils.synthesizer import synthesize_chunks
+from chatbot.rag import fusion
+from chatbot.rag.fusion import fuse_results, rerank_ambiguous, calibrate_confidence
+from chatbot.rag import dedup
+from chatbot.rag.dedup import collapse_near_duplicates
+from chatbot.rag.mmr import embed_pool, mmr_select, DEFAULT_MMR_LAMBDA
+from chatbot.rag.retrieval_cache import retrieval_cache, get_corpus_version
+from chatbot.rag.context_packer import pack_context
 from chatbot.agent import call_claude
+from chatbot.utils.config_loader import get_config_value
+from chatbot.utils.context_builder import rag_budget_for_model
+from chatbot.utils.constants import RETRIEVAL_BACKEND, BEDROCK_KB_ID, BEDROCK_MODEL_ID, COST_PER_RETRIEVAL
 from chatbot.logger import logger
 
 # === Configurable Constants ===
 MIN_CONFIDENCE_THRESHOLD = 0.55  # Minimum chunk confidence score
 FALLBACK_TO_CLAUDE = True        # Enable Claude fallback if no strong context
+CACHE_ENABLED = bool(get_config_value("retrieval_cache_enabled", True))
+MMR_POOL_FACTOR = 2              # MMR picks top_k from this many times top_k candidates
+CONTEXT_TOKEN_BUDGET = rag_budget_for_model(BEDROCK_MODEL_ID)
 
+# === Per-backend Retrieval Deadlines (seconds from fan-out start) ===
+BACKEND_DEADLINES = {
+    "bedrock_kb": float(get_config_value("rag_kb_deadline_seconds", 2.5)),
+    "opensearch": float(get_config_value("rag_opensearch_deadline_seconds", 1.5)),
+    "local_index": float(get_config_value("rag_local_deadline_seconds", 0.5)),
+    "bm25": float(get_config_value("rag_bm25_deadline_seconds", 0.5)),
+}
 
-def hybrid_rag_router(query: str, top_k: int = 5) -> List[Dict]:
+# === Dedicated Retrieval Pool ===
+# A leg that misses its deadline keeps running (Future.cancel cannot stop a started
+# thread), so legs run on their own pool instead of the shared Bedrock one, and each
+# backend may hold at most RETRIEVAL_MAX_INFLIGHT threads: a hung backend is skipped
+# as "busy" rather than piling up stragglers.
+RETRIEVAL_MAX_INFLIGHT = int(get_config_value("rag_retrieval_max_inflight", 4))
+retrieval_executor = ThreadPoolExecutor(
+    max_workers=RETRIEVAL_MAX_INFLIGHT * len(BACKEND_DEADLINES), thread_name_prefix="retrieval"
+)
+_inflight = {name: threading.BoundedSemaphore(RETRIEVAL_MAX_INFLIGHT) for name in BACKEND_DEADLINES}
+
+
+def hybrid_rag_router(query: str, top_k: int = 5, metadata_filter: Optional[Dict] = None) -> List[Dict]:
     """
     RAG Router that:
-    - Combines Bedrock KB and OpenSearch
-    - Reranks using multi-vector strategy
+    - Queries Bedrock KB and OpenSearch concurrently, each under its own deadline,
+      with any metadata filter pushed down into every backend
+    - Fuses backend scores and collapses near-duplicate chunks
+    - Embedding-reranks only the ambiguous slice
     - Applies score threshold
-    - Performs chunk synthesis
+    - Picks a diverse, token-budgeted set of chunks with MMR
+    - Performs chunk synthesis, packing each chunk's best sentences under its citation
     - Falls back to Claude if needed
+    Results are cached per corpus version, so repeated questions skip the pipeline.
     """
     logger.info(f"[RAG Router] Hybrid retrieval triggered | Query: {query}")
 
+    # Read once per request (a stat() on the cached config), so dashboard edits apply immediately
+    mmr_lambda = float(get_config_value("rag_mmr_lambda", DEFAULT_MMR_LAMBDA))
+    cache_key = retrieval_cache.make_key(query, metadata_filter, _retrieval_config(top_k, mmr_lambda))
+    corpus_version = get_corpus_version()  # the version this retrieval runs against
+    if CACHE_ENABLED:
+        cached = retrieval_cache.get(cache_key)
+        if cached is not None:
+            logger.info("[RAG Router] Served from retrieval cache")
+            for result in cached:
+                result["metadata"]["cached"] = True
+            return cached
+
+    started = time.perf_counter()
     try:
-        # === Step 1: Retrieve chunks ===
-        kb_chunks = query_bedrock_knowledge_base(query, top_k=top_k)
-        os_chunks = query_opensearch(query, top_k=top_k)
-        combined_chunks = kb_chunks + os_chunks
+        # === Step 1: Retrieve chunks (parallel fan-out) ===
+        combined_chunks, latencies = fan_out_retrieval(query, top_k=top_k, metadata_filter=metadata_filter)
 
         if not combined_chunks:
             logger.warning("[RAG Router] No chunks retrieved")
-            return _fallback_to_claude(query, reason="empty-retrieval")
+            return _fallback_to_claude(query, reason="empty-retrieval", latencies=latencies)
 
         logger.info(f"[RAG Router] Retrieved {len(combined_chunks)} chunks total")
 
-        # === Step 2: Rerank ===
-        reranked = get_ranked_relevant_chunks(query, combined_chunks, top_k=top_k)
+        # === Step 2: Fuse native scores, collapse near-duplicates, rerank only near the cut-off ===
+        by_backend: Dict[str, List[Dict]] = {}
+        for chunk in combined_chunks:
+            by_backend.setdefault(chunk.get("source", "unknown"), []).append(chunk)
+        fused = collapse_near_duplicates(fuse_results(by_backend))
+        reranked = rerank_ambiguous(query, fused, top_k * MMR_POOL_FACTOR, rank_by_engine)
         if not reranked:
             logger.warning("[RAG Router] Reranking returned empty result")
             return _fallback_to_claude(query, reason="empty-rerank")
 
-        # === Step 3: Score Filtering ===
-        filtered = [c for c in reranked if c.get("score", 0.0) >= MIN_CONFIDENCE_THRESHOLD]
+        # === Step 3: Score Filtering (on calibrated confidence, not the max-normalized fused score) ===
+        # One embedding pass serves both keyword-hit calibration and MMR
+        vectors = embed_pool(query, reranked, _embed_batch)
+        calibrate_confidence(reranked, vectors[1:] @ vectors[0] if vectors is not None else None)
+        kept = [i for i, c in enumerate(reranked) if c["confidence"] >= MIN_CONFIDENCE_THRESHOLD]
+        filtered = [reranked[i] for i in kept]
         if not filtered:
             logger.warning("[RAG Router] All chunks below threshold — fallback")
             return _fallback_to_claude(query, reason="score-below-threshold")
 
         logger.info(f"[RAG Router] {len(filtered)} chunks passed score ≥ {MIN_CONFIDENCE_THRESHOLD}")
 
-        # === Step 4: Build Chunk Graph (dedup sources) ===
-        graph_nodes = []
-        seen_sources = set()
-        for chunk in filtered:
-            src = chunk["metadata"].get("source", "unknown")
-            if src not in seen_sources:
-                graph_nodes.append(chunk)
-                seen_sources.add(src)
+        # === Step 4: Diverse Selection (MMR under the RAG token budget) ===
+        graph_nodes = mmr_select(
+            query,
+            filtered,
+            _embed_batch,
+            top_n=top_k,
+            token_budget=CONTEXT_TOKEN_BUDGET,
+            lambda_=mmr_lambda,
+            vectors=vectors[[0] + [i + 1 for i in kept]] if vectors is not None else None,
+        )
 
         if not graph_nodes:
-            logger.warning("[RAG Router] No distinct sources available")
-            return _fallback_to_claude(query, reason="graph-empty")
+            logger.warning("[RAG Router] No chunks fit the context budget")
+            return _fallback_to_claude(query, reason="selection-empty")
 
-        # === Step 5: Chunk Synthesis ===
-        synthesized_context = synthesize_chunks(graph_nodes)
+        # === Step 5: Chunk Synthesis (packed per chunk, so every sentence keeps its own citation) ===
+        synthesized_context = pack_context(query, graph_nodes, token_budget=CONTEXT_TOKEN_BUDGET)
         logger.info(f"[RAG Router] Synthesized {len(graph_nodes)} chunks into fused context")
 
-        return [{
+        result = [{
             "content": synthesized_context,
             "metadata": {
                 "source": "+".join([c["metadata"].get("source", "unknown") for c in graph_nodes]),
                 "synthesized": True,
-                "score": min(c.get("score", 1.0) for c in graph_nodes),
-                "chunks_used": len(graph_nodes)
+                "score": min(c.get("confidence", 1.0) for c in graph_nodes),
+                "chunks_used": len(graph_nodes),
+                "retrieval_latency_ms": latencies
             }
         }]
 
+        # Results from a degraded fan-out (timeouts/errors) are not worth pinning
+        if CACHE_ENABLED and all(isinstance(v, float) for v in latencies.values()):
+            retrieval_cache.put(
+                cache_key,
+                result,
+                cost_ms=(time.perf_counter() - started) * 1000,
+                cost_usd=COST_PER_RETRIEVAL * len(latencies),
+                version=corpus_version,
+            )
+        return result
+
     except Exception as e:
         logger.exception(f"[RAG Router] Unhandled exception: {e}")
         return _fallback_to_claude(query, reason="exception")
 
 
+# === Retrieval Config Fingerprint (part of the cache key) ===
+def _retrieval_config(top_k: int, mmr_lambda: float) -> Dict[str, object]:
+    return {
+        "top_k": top_k,
+        "backend": RETRIEVAL_BACKEND,
+        "keyword": keyword_backend,
+        "kb_id": BEDROCK_KB_ID,
+        "fusion": fusion.FUSION_METHOD,
+        "weights": fusion.FUSION_WEIGHTS,
+        "margin": fusion.RERANK_MARGIN,
+        "dedup": dedup.DEDUP_THRESHOLD,
+        "mmr_lambda": mmr_lambda,
+        "context_budget": CONTEXT_TOKEN_BUDGET,
+        "threshold": MIN_CONFIDENCE_THRESHOLD,
+    }
+
+
+# === Parallel Fan-out with Per-backend Deadlines ===
+def _timed(fn: Callable, *args, **kwargs) -> Tuple[List[Dict], float]:
+    start = time.perf_counter()
+    result = list(fn(*args, **kwargs))
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _run_leg(name: str, fn: Callable, *args, **kwargs) -> Tuple[List[Dict], float]:
+    try:
+        return _timed(fn, *args, **kwargs)
+    finally:
+        _inflight[name].release()
+
+
+def fan_out_retrieval(query: str, top_k: int = 5, metadata_filter: Optional[Dict] = None) -> Tuple[List[Dict], Dict[str, object]]:
+    """
+    Runs every retrieval backend concurrently on the dedicated retrieval pool.
+
+    Backends that miss their deadline are dropped (latency recorded as "timeout")
+    so one slow backend cannot hold up the request; backends still busy with
+    earlier stragglers are skipped ("busy"). Returns the combined chunks and
+    per-backend latency in milliseconds.
+    """
+    backends = {
+        "bedrock_kb": query_bedrock_knowledge_base,
+        keyword_backend: query_keyword,
+    }
+    if RETRIEVAL_BACKEND == "local":
+        # In-process leg keeps RAG answering when the managed services are degraded
+        backends["local_index"] = query_local_index
+    chunks: Dict[str, List[Dict]] = {}
+    latencies: Dict[str, object] = {}
+
+    start = time.monotonic()
+    futures = {}
+    for name, fn in backends.items():
+        if not _inflight[name].acquire(blocking=False):
+            latencies[name] = "busy"
+            logger.warning(f"[RAG Router] {name} still has {RETRIEVAL_MAX_INFLIGHT} calls in flight, skipped")
+            continue
+        futures[retrieval_executor.submit(_run_leg, name, fn, query, top_k, metadata_filter=metadata_filter)] = name
+    deadlines = {name: start + BACKEND_DEADLINES.get(name, 2.0) for name in backends}
+    pending = set(futures)
+
+    while pending:
+        now = time.monotonic()
+        for future in [f for f in pending if deadlines[futures[f]] <= now and not f.done()]:
+            name = futures[future]
+            if future.cancel():
+                _inflight[name].release()  # never started, so _run_leg will not release it
+            pending.discard(future)
+            latencies[name] = "timeout"
+            logger.warning(f"[RAG Router] {name} missed its {BACKEND_DEADLINES.get(name, 2.0)}s deadline, dropped")
+        if not pending:
+            break
+
+        timeout = max(0.0, min(deadlines[futures[f]] for f in pending) - time.monotonic())
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future]
+            try:
+                chunks[name], elapsed = future.result()
+                latencies[name] = round(elapsed, 1)
+            except Exception as e:
+                logger.exception(f"[RAG Router] {name} retrieval failed: {e}")
+                latencies[name] = "error"
+
+    logger.info(f"[RAG Router] Backend latency (ms): {latencies}")
+    # Keep a stable backend order regardless of completion order
+    return [c for name in backends for c in chunks.get(name, [])], latencies
+
+
 # === Helper for Graceful Claude Fallback ===
-def _fallback_to_claude(query: str, reason: str = "unknown") -> List[Dict]:
+def _fallback_to_claude(query: str, reason: str = "unknown", latencies: Dict[str, object] = None) -> List[Dict]:
     if not FALLBACK_TO_CLAUDE:
         return []
 
@@ -97,6 +260,7 @@ def _fallback_to_claude(query: str, reason: str = "unknown") -> List[Dict]:
             "source": f"claude-fallback:{reason}",
             "synthesized": False,
             "score": 0.0,
-            "chunks_used": 0
+            "chunks_used": 0,
+            "retrieval_latency_ms": latencies or {}
         }
     }]
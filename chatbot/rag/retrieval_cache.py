@@ -0,0 +1,176 @@
+# chatbot/rag/retrieval_cache.py — Versioned cache of hybrid retrieval results
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from chatbot.utils.constants import CORPUS_VERSION_PATH
+from chatbot.utils.config_loader import get_config_value
+from chatbot.utils.response_cache import normalize_prompt, content_hash
+from chatbot.logger import logger
+
+
+# === Corpus Version Stamp (bumped by ingestion) ===
+_version_lock = threading.Lock()
+_version_cache = {"mtime": None, "version": 0}
+
+
+def get_corpus_version(path: str = CORPUS_VERSION_PATH) -> int:
+    """
+    Current corpus version; re-read only when the stamp file changes.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return 0
+    with _version_lock:
+        if mtime != _version_cache["mtime"]:
+            try:
+                with open(path) as f:
+                    _version_cache["version"] = int(json.load(f).get("version", 0))
+                _version_cache["mtime"] = mtime
+            except (OSError, ValueError) as e:
+                logger.warning(f"[RetrievalCache] Unreadable corpus version stamp: {e}")
+        return _version_cache["version"]
+
+
+def bump_corpus_version(path: str = CORPUS_VERSION_PATH) -> int:
+    """
+    Invalidate every cached retrieval result; call after the corpus changes.
+    """
+    version = get_corpus_version(path) + 1
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": version, "updated_at": time.time()}, f)
+    os.replace(tmp_path, path)
+    logger.info(f"[RetrievalCache] Corpus version bumped to {version}")
+    return version
+
+
+# === Cache ===
+class RetrievalCache:
+    """
+    Caches hybrid_rag_router results keyed by normalized query, metadata filter
+    and retrieval config.
+
+    Entries are valid only for the corpus version they were built from and
+    expire after a TTL. Each entry records what it cost to build, and eviction
+    under the entry/byte bounds is cost-aware (GreedyDual-Size-Frequency): cheap,
+    large, rarely hit entries go first.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 50_000_000, ttl_seconds: float = 1800):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._bytes = 0
+        self._inflation = 0.0  # GDSF clock
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0, "misses": 0, "stale": 0, "expired": 0, "evictions": 0,
+            "saved_ms": 0.0, "saved_usd": 0.0,
+        }
+
+    @staticmethod
+    def make_key(query: str, metadata_filter: Optional[dict], config: Dict[str, Any]) -> str:
+        raw = json.dumps([normalize_prompt(query), metadata_filter or {}, config], sort_keys=True, default=str)
+        return content_hash(raw)
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        version = get_corpus_version()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry["version"] != version or entry["expires_at"] <= now:
+                self._stats["stale" if entry["version"] != version else "expired"] += 1
+                self._stats["misses"] += 1
+                self._remove(key)
+                return None
+
+            entry["hits"] += 1
+            entry["priority"] = self._priority(entry)
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            self._stats["saved_ms"] += entry["cost_ms"]
+            self._stats["saved_usd"] += entry["cost_usd"]
+            return json.loads(entry["value"])
+
+    def put(self, key: str, value: List[Dict], cost_ms: float, cost_usd: float = 0.0,
+            version: Optional[int] = None) -> None:
+        """
+        Pass `version` as read before the retrieval ran: a result computed across
+        an ingestion bump is then stamped with the old version and never served.
+        """
+        # Stored serialized: callers get independent copies and size accounting is exact
+        serialized = json.dumps(value, default=str)
+        entry = {
+            "value": serialized,
+            "size": len(serialized),
+            "version": get_corpus_version() if version is None else version,
+            "expires_at": time.time() + self.ttl_seconds,
+            "cost_ms": float(cost_ms),
+            "cost_usd": float(cost_usd),
+            "hits": 0,
+        }
+        if entry["size"] > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            entry["priority"] = self._priority(entry)
+            self._entries[key] = entry
+            self._bytes += entry["size"]
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._evict_one()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **{k: round(v, 4) if isinstance(v, float) else v for k, v in self._stats.items()},
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # === Internals (call with lock held) ===
+    def _priority(self, entry: dict) -> float:
+        return self._inflation + (1 + entry["hits"]) * max(entry["cost_ms"], 1.0) / max(entry["size"], 1)
+
+    def _evict_one(self) -> None:
+        now = time.time()
+        expired = next((k for k, v in self._entries.items() if v["expires_at"] <= now), None)
+        if expired is not None:
+            self._stats["expired"] += 1
+            self._remove(expired)
+            return
+        victim = min(self._entries, key=lambda k: self._entries[k]["priority"])
+        self._inflation = self._entries[victim]["priority"]
+        self._stats["evictions"] += 1
+        self._remove(victim)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+
+
+# === Process-wide Instance ===
+retrieval_cache = RetrievalCache(
+    max_entries=int(get_config_value("retrieval_cache_max_entries", 1000)),
+    max_bytes=int(get_config_value("retrieval_cache_max_bytes", 50_000_000)),
+    ttl_seconds=float(get_config_value("retrieval_cache_ttl_seconds", 1800)),
+)
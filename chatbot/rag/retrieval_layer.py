@@ -1,19 +1,30 @@
 # chatbot/rag/retrieval_layer.py
 
 import os
-import boto3
-from typing import List, Dict, Optional
+import inspect
+import threading
+from typing import Iterable, Iterator, List, Dict, Optional
+
+import numpy as np
+
 from chatbot.utils.constants import (
     RETRIEVAL_BACKEND,
     BEDROCK_KB_ID,
-    BEDROCK_REGION,
+    BEDROCK_EMBEDDING_MODEL_ID,
+    HF_EMBEDDING_MODEL,
+    CHUNK_DB_PATH,
     MAX_CHUNKS
 )
 from chatbot.logger import logger
-from chatbot.ranking import rank_chunks_by_similarity, rank_with_bedrock
+from chatbot.utils.bedrock_client import get_client
+from chatbot.utils.singleflight import singleflight, make_key
+from chatbot.ranking import rank_chunks_by_similarity, rank_with_bedrock, score_matrix
 from chatbot.utils.text_utils import clean_text
-from chatbot.utils.filters import filter_chunks_by_metadata
+from chatbot.utils.filters import filter_chunks_by_metadata, to_bedrock_kb_filter, to_opensearch_filter
 from chatbot.utils.config_loader import get_config_value
+from chatbot.utils.embeddings import embed_texts_bedrock, embed_texts_huggingface
+from chatbot.rag.local_index import local_index
+from chatbot.rag.bm25_index import bm25_index
 
 # === Configurable Thresholds and Engine Selection ===
 def _env_float(key: str, fallback: float) -> float:
@@ -25,36 +36,161 @@ def _env_float(key: str, fallback: float) -> float:
 score_threshold: float = _env_float("CHUNK_SCORE_THRESHOLD", get_config_value("chunk_score_threshold", 0.5))
 embedding_engine: str = os.getenv("EMBEDDING_ENGINE", get_config_value("embedding_engine", "bedrock"))
 
+# === Streaming Pipeline Knobs ===
+KB_PAGE_SIZE = int(get_config_value("rag_kb_page_size", 10))
+STREAM_SCORE_BATCH = int(get_config_value("rag_stream_score_batch", 8))
+STREAM_OVERFETCH = int(get_config_value("rag_stream_overfetch", 3))  # candidates fetched per wanted chunk, at most
+
 # === Bedrock Knowledge Base Client ===
-bedrock_agent = boto3.client("bedrock-agent-runtime", region_name=BEDROCK_REGION)
+bedrock_agent = get_client("bedrock-agent-runtime")
 
 # === Optional OpenSearch Client ===
 try:
     from chatbot.rag.opensearch_client import search_opensearch
 except ImportError:
     search_opensearch = None
+    logger.warning("[OpenSearch] Client unavailable; keyword retrieval uses the local BM25 index")
+
+
+def _accepts_filters(fn) -> bool:
+    try:
+        return "filters" in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+# Filters are pushed down only to a client that declares a `filters` parameter;
+# otherwise hits are over-fetched and filtered here rather than silently dropped
+OPENSEARCH_FILTER_PUSHDOWN = bool(search_opensearch) and _accepts_filters(search_opensearch)
+
+# === Keyword Leg Selection (opensearch | bm25 | auto) ===
+keyword_backend: str = get_config_value("rag_keyword_backend", "auto")
+if keyword_backend == "auto":
+    keyword_backend = "opensearch" if search_opensearch else "bm25"
 
 
 # === Unified Chunk Retrieval Flow ===
 def get_relevant_chunks(query: str, top_k: int = MAX_CHUNKS, metadata_filter: Optional[dict] = None) -> List[Dict]:
-    logger.info(f"[Retrieval] Backend={RETRIEVAL_BACKEND} | Query={query}")
+    chunks = list(stream_relevant_chunks(query, top_k=top_k, metadata_filter=metadata_filter))
+    return sorted(chunks, key=lambda c: c.get("score", 0.0), reverse=True)
 
-    chunks: List[Dict] = []
 
-    if RETRIEVAL_BACKEND == "bedrock":
-        chunks = list(query_bedrock_knowledge_base(query, top_k))
+def stream_relevant_chunks(
+    query: str,
+    top_k: int = MAX_CHUNKS,
+    metadata_filter: Optional[dict] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Iterator[Dict]:
+    """
+    Streaming retrieval: fetch → clean → filter → score → yield, one stage per generator.
 
-    elif RETRIEVAL_BACKEND == "opensearch" and search_opensearch:
-        chunks = query_opensearch(query, top_k)
+    Yields chunks scoring ≥ score_threshold as soon as their scoring batch is done,
+    and stops once top_k have been yielded or STREAM_OVERFETCH * top_k candidates
+    were seen. Bedrock KB results are fetched page by page, so early termination
+    also skips the remaining Retrieve calls.
+
+    Cancellation: set `cancel` or call .close() on the generator. Either one stops
+    every stage at its next step and releases the backend page iterator.
+    """
+    logger.info(f"[Retrieval] Backend={RETRIEVAL_BACKEND} | Query={query} | streaming top_k={top_k}")
+    cancel = cancel or threading.Event()
+
+    source = _fetch_stage(query, top_k * STREAM_OVERFETCH, metadata_filter, cancel)
+    stages = _score_stage(query, _filter_stage(source, metadata_filter), cancel)
+    produced = 0
+    try:
+        for chunk in stages:
+            yield chunk
+            produced += 1
+            if produced >= top_k:
+                logger.info(f"[Retrieval] Early stop after {produced} chunks above {score_threshold}")
+                break
+    finally:
+        # Runs on exhaustion, early stop, cancel or consumer .close(): unwind every stage
+        cancel.set()
+        stages.close()
+        source.close()
 
+
+# === Streaming Stages ===
+def _fetch_stage(query: str, max_candidates: int, metadata_filter: Optional[dict],
+                 cancel: threading.Event) -> Iterator[Dict]:
+    # Filters are pushed into each backend so candidates are already mostly matching
+    if RETRIEVAL_BACKEND == "bedrock":
+        source: Iterable[Dict] = iter_bedrock_knowledge_base(query, max_candidates, metadata_filter, cancel)
+    elif RETRIEVAL_BACKEND == "opensearch" and search_opensearch:
+        source = query_opensearch(query, max_candidates, metadata_filter=metadata_filter)
+    elif RETRIEVAL_BACKEND in ("opensearch", "bm25"):
+        source = query_bm25(query, max_candidates, metadata_filter=metadata_filter)
+    elif RETRIEVAL_BACKEND == "local":
+        source = query_local_index(query, max_candidates, metadata_filter=metadata_filter)
     else:
         logger.warning("[Retrieval] Invalid backend or OpenSearch not configured.")
-        return []
+        return
 
-    if metadata_filter:
-        chunks = filter_chunks_by_metadata(chunks, metadata_filter)
+    for chunk in source:
+        if cancel.is_set():
+            return
+        yield chunk
 
-    return rerank_chunks(query, chunks, top_k=top_k)
+
+def _filter_stage(chunks: Iterable[Dict], metadata_filter: Optional[dict]) -> Iterator[Dict]:
+    for chunk in chunks:
+        if not chunk.get("content"):
+            continue
+        # Safety net for backends whose filter semantics are looser than ours
+        if metadata_filter and not filter_chunks_by_metadata([chunk], metadata_filter):
+            continue
+        yield chunk
+
+
+def _score_stage(query: str, chunks: Iterable[Dict], cancel: threading.Event) -> Iterator[Dict]:
+    if embedding_engine not in ("huggingface", "bedrock"):
+        logger.warning("[Reranking] Unknown embedding engine. Using raw order.")
+        yield from chunks
+        return
+
+    query_vec = None
+    batch: List[Dict] = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) < STREAM_SCORE_BATCH:
+            continue
+        if cancel.is_set():
+            return
+        query_vec = query_vec if query_vec is not None else _query_vector(query)
+        yield from _score_batch(query_vec, batch)
+        batch = []
+
+    if batch and not cancel.is_set():
+        query_vec = query_vec if query_vec is not None else _query_vector(query)
+        yield from _score_batch(query_vec, batch)
+
+
+def _query_vector(query: str) -> Optional[np.ndarray]:
+    try:
+        return _embed_batch([query])[0]
+    except Exception as e:
+        logger.exception(f"[Reranking] Query embedding failed: {e}")
+        return None
+
+
+def _score_batch(query_vec: Optional[np.ndarray], batch: List[Dict]) -> Iterator[Dict]:
+    if query_vec is None:
+        # Embedding unavailable: pass candidates through on their native scores
+        yield from batch
+        return
+    try:
+        scores = score_matrix(query_vec, _embed_batch([c["content"] for c in batch]))
+    except Exception as e:
+        logger.exception(f"[Reranking] Failed during reranking: {e}")
+        yield from batch
+        return
+
+    for chunk, score in sorted(zip(batch, scores), key=lambda pair: -pair[1]):
+        if score >= score_threshold:
+            chunk["score"] = float(score)
+            yield chunk
 
 
 # === Reranking ===
@@ -63,14 +199,11 @@ def rerank_chunks(query: str, chunks: List[Dict], top_k: int) -> List[Dict]:
         return []
 
     try:
-        if embedding_engine == "huggingface":
-            reranked = rank_chunks_by_similarity(query, chunks)
-        elif embedding_engine == "bedrock":
-            reranked = rank_with_bedrock(query, chunks)
-        else:
+        if embedding_engine not in ("huggingface", "bedrock"):
             logger.warning("[Reranking] Unknown embedding engine. Using raw order.")
             return chunks[:top_k]
 
+        reranked = rank_by_engine(query, chunks)
         filtered = [c for c in reranked if c.get("score", 1.0) >= score_threshold]
         return filtered[:top_k]
 
@@ -79,19 +212,49 @@ def rerank_chunks(query: str, chunks: List[Dict], top_k: int) -> List[Dict]:
         return chunks[:top_k]
 
 
+def rank_by_engine(query: str, chunks: List[Dict]) -> List[Dict]:
+    """
+    Embedding rerank with the configured engine; no threshold or cut-off.
+    """
+    if embedding_engine == "huggingface":
+        return rank_chunks_by_similarity(query, chunks)
+    if embedding_engine == "bedrock":
+        return rank_with_bedrock(query, chunks)
+    return chunks
+
+
+def get_ranked_relevant_chunks(query: str, chunks: List[Dict], top_k: int = MAX_CHUNKS) -> List[Dict]:
+    """
+    Rerank already-retrieved chunks (used by the hybrid router after fan-out).
+    """
+    return rerank_chunks(query, chunks, top_k=top_k)
+
+
 # === Bedrock KB Retrieval ===
-def query_bedrock_knowledge_base(query: str, top_k: int):
+def _retrieve_kb(query: str, top_k: int, kb_filter: Optional[Dict] = None) -> List[Dict]:
+    vector_config = {"numberOfResults": top_k}
+    if kb_filter:
+        vector_config["filter"] = kb_filter
+
+    response = bedrock_agent.retrieve(
+        knowledgeBaseId=BEDROCK_KB_ID,
+        retrievalQuery={"text": query},
+        retrievalConfiguration={"vectorSearchConfiguration": vector_config},
+    )
+    return response.get("retrievalResults", [])
+
+
+def query_bedrock_knowledge_base(query: str, top_k: int, metadata_filter: Optional[Dict] = None):
     try:
-        response = bedrock_agent.retrieve(
-            knowledgeBaseId=BEDROCK_KB_ID,
-            retrievalQuery={"text": query},
-            retrievalConfiguration={"vectorSearchConfiguration": {"numberOfResults": top_k}},
-        )
-        results = response.get("retrievalResults", [])
+        kb_filter = to_bedrock_kb_filter(metadata_filter)
+        # Concurrent identical queries share one Retrieve call
+        key = make_key("bedrock_kb", BEDROCK_KB_ID, query, top_k, kb_filter)
+        results = singleflight.do(key, _retrieve_kb, query, top_k, kb_filter)
         for result in results:
             yield {
                 "content": clean_text(result.get("content", "")),
-                "metadata": result.get("metadata", {}),
+                "metadata": dict(result.get("metadata", {})),
+                "score": result.get("score", 0.0),
                 "source": "bedrock_kb"
             }
 
@@ -100,20 +263,134 @@ def query_bedrock_knowledge_base(query: str, top_k: int):
         return []
 
 
+def _retrieve_kb_page(query: str, page_size: int, kb_filter: Optional[Dict], next_token: Optional[str]) -> Dict:
+    vector_config = {"numberOfResults": page_size}
+    if kb_filter:
+        vector_config["filter"] = kb_filter
+    kwargs = {"nextToken": next_token} if next_token else {}
+
+    return bedrock_agent.retrieve(
+        knowledgeBaseId=BEDROCK_KB_ID,
+        retrievalQuery={"text": query},
+        retrievalConfiguration={"vectorSearchConfiguration": vector_config},
+        **kwargs,
+    )
+
+
+def iter_bedrock_knowledge_base(query: str, max_results: int, metadata_filter: Optional[Dict] = None,
+                                cancel: Optional[threading.Event] = None) -> Iterator[Dict]:
+    """
+    Page through Retrieve results with nextToken; the next page is requested only
+    when the consumer asks for more and `cancel` is not set.
+    """
+    kb_filter = to_bedrock_kb_filter(metadata_filter)
+    page_size = min(KB_PAGE_SIZE, max_results)
+    next_token, fetched = None, 0
+    try:
+        while fetched < max_results and not (cancel and cancel.is_set()):
+            key = make_key("bedrock_kb_page", BEDROCK_KB_ID, query, page_size, kb_filter, next_token)
+            response = singleflight.do(key, _retrieve_kb_page, query, page_size, kb_filter, next_token)
+            for result in response.get("retrievalResults", [])[:max_results - fetched]:
+                fetched += 1
+                yield {
+                    "content": clean_text(result.get("content", "")),
+                    "metadata": dict(result.get("metadata", {})),
+                    "score": result.get("score", 0.0),
+                    "source": "bedrock_kb"
+                }
+            next_token = response.get("nextToken")
+            if not next_token:
+                break
+    except Exception as e:
+        logger.exception(f"[Bedrock KB] Paged retrieval failed: {e}")
+
+
 # === OpenSearch Retrieval ===
-def query_opensearch(query: str, top_k: int) -> List[Dict]:
+def query_opensearch(query: str, top_k: int, metadata_filter: Optional[Dict] = None) -> List[Dict]:
     try:
-        raw_hits = search_opensearch(query, k=top_k)
-        return [
+        filters = to_opensearch_filter(metadata_filter)
+        post_filter = bool(filters) and not OPENSEARCH_FILTER_PUSHDOWN
+        if post_filter:
+            kwargs = {"k": top_k * STREAM_OVERFETCH}
+        else:
+            # search_opensearch applies `filters` as bool.filter clauses alongside the scoring query
+            kwargs = {"k": top_k, "filters": filters} if filters else {"k": top_k}
+        raw_hits = singleflight.do(make_key("opensearch", query, kwargs), search_opensearch, query, **kwargs)
+        chunks = [
             {
                 "content": clean_text(hit["_source"].get("content", "")),
-                "metadata": hit["_source"].get("metadata", {}),
+                "metadata": dict(hit["_source"].get("metadata", {})),
                 "score": hit["_score"],
                 "source": "opensearch"
             }
             for hit in raw_hits
         ]
+        return filter_chunks_by_metadata(chunks, metadata_filter)[:top_k] if post_filter else chunks
 
     except Exception as e:
         logger.exception(f"[OpenSearch] Retrieval failed: {e}")
         return []
+
+
+# === Local ANN Retrieval (in-process, no network hop) ===
+def _embed_batch(texts: List[str]):
+    if embedding_engine == "huggingface":
+        return embed_texts_huggingface(texts)
+    return embed_texts_bedrock(texts)
+
+
+def query_local_index(query: str, top_k: int, metadata_filter: Optional[Dict] = None) -> List[Dict]:
+    try:
+        if not local_index.exists() and os.path.exists(CHUNK_DB_PATH):
+            # Ingestion (or another worker) may be writing it; wait, then re-check
+            with local_index.build_lock():
+                if not local_index.exists():
+                    model = HF_EMBEDDING_MODEL if embedding_engine == "huggingface" else BEDROCK_EMBEDDING_MODEL_ID
+                    logger.info(f"[LocalIndex] No index yet, building from {CHUNK_DB_PATH}")
+                    local_index.build_from_chunk_store(_embed_batch, engine=embedding_engine, model=model)
+
+        query_vec = _embed_batch([query])[0]
+        return [
+            {
+                "content": chunk["content"],
+                "metadata": dict(chunk.get("metadata", {})),
+                "score": score,
+                "source": "local_index"
+            }
+            for chunk, score in local_index.search(query_vec, top_k, metadata_filter=metadata_filter)
+        ]
+
+    except Exception as e:
+        logger.exception(f"[LocalIndex] Retrieval failed: {e}")
+        return []
+
+
+# === Local BM25 Retrieval (drop-in keyword leg) ===
+def query_bm25(query: str, top_k: int, metadata_filter: Optional[Dict] = None) -> List[Dict]:
+    try:
+        if not bm25_index.exists() and os.path.exists(CHUNK_DB_PATH):
+            logger.info(f"[BM25] No index yet, building from {CHUNK_DB_PATH}")
+            bm25_index.build_from_chunk_store()
+
+        return [
+            {
+                "content": doc["content"],
+                "metadata": dict(doc.get("metadata", {})),
+                "score": score,
+                "source": "bm25"
+            }
+            for doc, score in bm25_index.search(query, top_k, metadata_filter=metadata_filter)
+        ]
+
+    except Exception as e:
+        logger.exception(f"[BM25] Retrieval failed: {e}")
+        return []
+
+
+def query_keyword(query: str, top_k: int, metadata_filter: Optional[Dict] = None) -> List[Dict]:
+    """
+    Keyword leg for the hybrid router: OpenSearch or the in-process BM25 index.
+    """
+    if keyword_backend == "opensearch" and search_opensearch:
+        return query_opensearch(query, top_k, metadata_filter=metadata_filter)
+    return query_bm25(query, top_k, metadata_filter=metadata_filter)
@@ -0,0 +1,53 @@
+# chatbot/ranking.py
+
+from typing import Callable, List, Dict
+
+import numpy as np
+
+from chatbot.utils.embeddings import embed_texts_huggingface, embed_texts_bedrock, normalize_rows
+from chatbot.utils.constants import EMBEDDING_ENGINE
+from chatbot.logger import logger
+
+
+def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def score_matrix(query_vec: np.ndarray, chunk_matrix: np.ndarray) -> np.ndarray:
+    """
+    Cosine scores of one query against a stacked (n, dim) chunk matrix.
+    Rows are normalized once, so scoring is a single matrix-vector product.
+    """
+    return normalize_rows(chunk_matrix) @ normalize_rows(query_vec)
+
+
+def _rank(query: str, chunks: List[Dict], embed_batch: Callable[[List[str]], np.ndarray]) -> List[Dict]:
+    if not chunks:
+        return []
+
+    # Query and all chunks go out in a single batch: one round trip per rerank
+    vectors = embed_batch([query] + [chunk["content"] for chunk in chunks])
+    scores = score_matrix(vectors[0], vectors[1:])
+
+    for chunk, score in zip(chunks, scores):
+        chunk["score"] = float(score)
+    return [chunks[i] for i in np.argsort(-scores, kind="stable")]
+
+
+def rank_chunks_by_similarity(query: str, chunks: List[Dict]) -> List[Dict]:
+    logger.info(f"[Ranking] Using engine: {EMBEDDING_ENGINE}")
+    if EMBEDDING_ENGINE == "bedrock":
+        return rank_with_bedrock(query, chunks)
+    return rank_with_huggingface(query, chunks)
+
+
+def rank_with_huggingface(query: str, chunks: List[Dict]) -> List[Dict]:
+    return _rank(query, chunks, embed_texts_huggingface)
+
+
+def rank_with_bedrock(query: str, chunks: List[Dict]) -> List[Dict]:
+    try:
+        return _rank(query, chunks, embed_texts_bedrock)
+    except Exception as e:
+        logger.warning(f"[Ranking] Bedrock rerank failed: {e}. Falling back to HuggingFace.")
+        return rank_with_huggingface(query, chunks)
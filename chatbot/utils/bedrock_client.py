@@ -0,0 +1,72 @@
+# chatbot/utils/bedrock_client.py — Shared Bedrock clients and invocation pool
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+import boto3
+from botocore.config import Config
+
+from chatbot.utils.constants import (
+    BEDROCK_REGION,
+    BEDROCK_MAX_POOL_CONNECTIONS,
+    BEDROCK_MAX_WORKERS,
+    BEDROCK_CONNECT_TIMEOUT,
+    BEDROCK_READ_TIMEOUT,
+)
+from chatbot.logger import logger
+
+# === Tuned Connection Settings (shared by every client) ===
+CLIENT_CONFIG = Config(
+    region_name=BEDROCK_REGION,
+    max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+    tcp_keepalive=True,
+    connect_timeout=BEDROCK_CONNECT_TIMEOUT,
+    read_timeout=BEDROCK_READ_TIMEOUT,
+    # Throttling is retried by chatbot.utils.rate_limiter; keep botocore to a single
+    # retry for transient connection errors so the two policies don't multiply.
+    retries={"total_max_attempts": 2, "mode": "standard"},
+)
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+# === Shared Invocation Pool ===
+executor = ThreadPoolExecutor(max_workers=BEDROCK_MAX_WORKERS, thread_name_prefix="bedrock")
+
+
+def get_client(service_name: str):
+    """
+    Return the process-wide boto3 client for a service.
+    Clients are created once and reused by every Streamlit session so that
+    HTTPS connections stay warm in the shared pool.
+    """
+    client = _clients.get(service_name)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(service_name)
+        if client is None:
+            # boto3 sessions are not thread-safe; build each client from its own session
+            client = boto3.session.Session().client(service_name, config=CLIENT_CONFIG)
+            _clients[service_name] = client
+            logger.info(f"[Bedrock] Client ready: {service_name} (pool={BEDROCK_MAX_POOL_CONNECTIONS})")
+    return client
+
+
+def submit(fn: Callable, *args, **kwargs) -> Future:
+    """
+    Schedule a blocking Bedrock call on the shared pool and return its Future.
+    """
+    return executor.submit(fn, *args, **kwargs)
+
+
+async def run_async(fn: Callable, *args, **kwargs) -> Any:
+    """
+    Await a blocking Bedrock call from asyncio code without tying up the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
@@ -17,26 +17,93 @@ DEFAULT_CONFIG = {
     "chunk_score_threshold": 0.5,
     "rerank_top_k": 5,
     "embedding_engine": "bedrock",
-    "summarization_tokens": 500
+    "summarization_tokens": 500,
+    "response_cache_enabled": True,
+    "response_cache_semantic": True,
+    "response_cache_ttl_seconds": 3600,
+    "response_cache_max_entries": 512,
+    "response_cache_similarity": 0.95,
+    "bedrock_rate_limit_rps": 5.0,
+    "bedrock_rate_limit_max_rps": 50.0,
+    "bedrock_rate_limit_burst": 5,
+    "bedrock_embedding_rate_limit_rps": 50.0,
+    "bedrock_embedding_rate_limit_max_rps": 200.0,
+    "bedrock_embedding_rate_limit_burst": 32,
+    "bedrock_call_deadline_seconds": 30.0,
+    "rag_kb_deadline_seconds": 2.5,
+    "rag_opensearch_deadline_seconds": 1.5,
+    "embedding_cache_enabled": True,
+    "embedding_cache_persist": True,
+    "embedding_cache_memory_entries": 4096,
+    "embedding_cache_memory_dtype": "float32",
+    "hf_embedding_server": "process",
+    "hf_server_max_batch": 64,
+    "hf_server_max_wait_ms": 5,
+    "hf_server_max_start_failures": 3,
+    "hf_server_start_cooldown_seconds": 60,
+    "hf_inference_precision": "fp32",
+    "hf_inference_backend": "torch",
+    "memory_queue_max_pending": 100,
+    "memory_queue_overflow_policy": "drop_oldest",
+    "memory_job_max_attempts": 3,
+    "memory_summary_max_tokens": 300,
+    "memory_fold_max_tokens": 1500,
+    "rag_fusion_method": "weighted",
+    "rag_fusion_weights": {"bedrock_kb": 1.0, "opensearch": 1.0},
+    "rag_rrf_k": 60,
+    "rag_rerank_margin": 0.1,
+    "rag_dedup_threshold": 0.8,
+    "rag_mmr_lambda": 0.7,
+    "rag_context_token_budget": 0,
+    "rag_kb_page_size": 10,
+    "rag_stream_score_batch": 8,
+    "rag_stream_overfetch": 3,
+    "ingest_workers": 0,
+    "local_index_nprobe": 8,
+    "local_index_dtype": "float32",
+    "local_index_coarse_dims": 0,
+    "rag_local_deadline_seconds": 0.5,
+    "rag_keyword_backend": "auto",
+    "rag_bm25_deadline_seconds": 0.5,
+    "rag_retrieval_max_inflight": 4,
+    "retrieval_cache_enabled": True,
+    "retrieval_cache_ttl_seconds": 1800,
+    "retrieval_cache_max_entries": 1000,
+    "retrieval_cache_max_bytes": 50000000
 }
 
 
 # === JSON Config ===
+# Parsed config keyed by the file's mtime and size, so per-request reads cost one stat()
+_config_cache: dict = {"stamp": None, "config": DEFAULT_CONFIG}
+
+
 def load_config() -> dict:
     """
-    Load user config from file, fallback to defaults.
+    Load user config from file, fallback to defaults. The file is only re-read
+    (and a missing file only logged) when its modification time changes.
     """
-    if not os.path.exists(CONFIG_FILE_PATH):
-        logger.warning("[Config] Config file not found. Using defaults.")
-        return DEFAULT_CONFIG
-
     try:
-        with open(CONFIG_FILE_PATH, "r") as f:
-            data = json.load(f)
-        return {**DEFAULT_CONFIG, **data}
-    except Exception as e:
-        logger.warning(f"[Config] Failed to load config from file: {e}")
-        return DEFAULT_CONFIG
+        st = os.stat(CONFIG_FILE_PATH)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = "missing"
+    if stamp == _config_cache["stamp"]:
+        return dict(_config_cache["config"])
+
+    if stamp == "missing":
+        logger.warning("[Config] Config file not found. Using defaults.")
+        config = DEFAULT_CONFIG
+    else:
+        try:
+            with open(CONFIG_FILE_PATH, "r") as f:
+                data = json.load(f)
+            config = {**DEFAULT_CONFIG, **data}
+        except Exception as e:
+            logger.warning(f"[Config] Failed to load config from file: {e}")
+            config = DEFAULT_CONFIG
+    _config_cache.update(stamp=stamp, config=config)
+    return dict(config)
 
 
 def save_config(config: dict) -> bool:
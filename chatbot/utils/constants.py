@@ -28,17 +28,44 @@ SUPPORT_EMAIL = "support@truist.com"
 # === Claude & Bedrock ===
 BEDROCK_MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "anthropic.claude-3-sonnet-20240229-v1:0")
 BEDROCK_REGION = os.getenv("AWS_REGION", "us-west-2")
+BEDROCK_AGENT_ID = os.getenv("BEDROCK_AGENT_ID", "your-bedrock-agent-id")  # Replace in prod
+BEDROCK_AGENT_ALIAS_ID = os.getenv("BEDROCK_AGENT_ALIAS_ID", "your-bedrock-agent-alias-id")  # Replace in prod
+
+# === Bedrock Connection Pool & Invocation Workers ===
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+BEDROCK_MAX_WORKERS = int(os.getenv("BEDROCK_MAX_WORKERS", "16"))
+BEDROCK_EMBED_MAX_WORKERS = int(os.getenv("BEDROCK_EMBED_MAX_WORKERS", "16"))
+BEDROCK_CONNECT_TIMEOUT = float(os.getenv("BEDROCK_CONNECT_TIMEOUT", "5"))
+BEDROCK_READ_TIMEOUT = float(os.getenv("BEDROCK_READ_TIMEOUT", "120"))
+
+# === Embeddings (reranking, semantic cache) ===
+EMBEDDING_ENGINE = os.getenv("EMBEDDING_ENGINE", "bedrock")  # bedrock | huggingface
+BEDROCK_EMBEDDING_MODEL_ID = os.getenv("BEDROCK_EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0")
+HF_EMBEDDING_MODEL = os.getenv("HF_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
 
 # === Bedrock Knowledge Base (optional) ===
 BEDROCK_KB_ID = os.getenv("BEDROCK_KB_ID", "your-bedrock-kb-id")  # Replace in prod
 BEDROCK_KB_INDEX = "default-index"
 
+# === Retrieval Backend (bedrock | opensearch | bm25 | local) ===
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "bedrock")
+
 # === Limits & RAG ===
 MAX_CHUNKS = 10
 MAX_HISTORY = 20
 CHUNK_OVERLAP = 40
 CHUNK_SIZE = 300  # tokens
 
+# === Conversation Context Budgets (input tokens per Claude call) ===
+# Matched on the longest model-ID prefix; keeps long chats from growing cost without bound
+CONTEXT_TOKEN_BUDGETS = {
+    "anthropic.claude-3-sonnet": int(os.getenv("CONTEXT_BUDGET_SONNET", "8000")),
+    "anthropic.claude-3-haiku": int(os.getenv("CONTEXT_BUDGET_HAIKU", "12000")),
+    "anthropic.claude-3-opus": int(os.getenv("CONTEXT_BUDGET_OPUS", "6000")),
+}
+DEFAULT_CONTEXT_TOKEN_BUDGET = int(os.getenv("DEFAULT_CONTEXT_TOKEN_BUDGET", "6000"))
+
 # === Cost Constants (USD per 1K tokens or per call) ===
 COST_PER_1K_CLAUDE_INPUT = 0.008
 COST_PER_1K_CLAUDE_OUTPUT = 0.024
@@ -50,6 +77,13 @@ LOGS_DIR = os.getenv("LOGS_DIR", "logs")
 INTERACTIONS_LOG_PATH = os.getenv("INTERACTIONS_LOG_PATH", f"{LOGS_DIR}/interactions.jsonl")
 CHUNK_DB_PATH = os.getenv("CHUNK_DB_PATH", "storage/chunk_index.json")
 KNOWLEDGE_JSON_PATH = os.getenv("KNOWLEDGE_JSON_PATH", "storage/kb_metadata.json")
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "storage/embedding_cache")
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "storage/local_index")
+BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", "storage/bm25_index")
+CORPUS_VERSION_PATH = os.getenv("CORPUS_VERSION_PATH", "storage/corpus_version.json")
+INGEST_SOURCE_DIR = os.getenv("INGEST_SOURCE_DIR", "storage/documents")  # local stand-in for the S3 bucket
+INGEST_MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH", "storage/ingest_manifest.json")
+MEMORY_QUEUE_PATH = os.getenv("MEMORY_QUEUE_PATH", "storage/memory_queue.json")
 
 # === System Message for Claude ===
 SYSTEM_MESSAGE = """
@@ -0,0 +1,196 @@
+# chatbot/utils/context_builder.py — Token-budgeted conversation context for Claude
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from chatbot.utils.constants import (
+    BEDROCK_MODEL_ID,
+    SYSTEM_MESSAGE,
+    MAX_HISTORY,
+    CONTEXT_TOKEN_BUDGETS,
+    DEFAULT_CONTEXT_TOKEN_BUDGET,
+)
+from chatbot.utils.cost_utils import count_tokens
+from chatbot.utils.config_loader import get_config_value
+
+# === Budget Split (fractions of the per-model input budget) ===
+RAG_SHARE = 0.45
+SUMMARY_SHARE = 0.15
+FRAMING_TOKENS = 32  # section headers added around summary and RAG context
+MAX_TRACKED_CONVERSATIONS = 1000
+
+
+def budget_for_model(model_id: str) -> int:
+    """
+    Input-token budget for a model, matched on the longest configured ID prefix.
+    """
+    matches = [prefix for prefix in CONTEXT_TOKEN_BUDGETS if model_id.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_TOKEN_BUDGET
+    return CONTEXT_TOKEN_BUDGETS[max(matches, key=len)]
+
+
+def rag_budget_for_model(model_id: str) -> int:
+    """
+    The one RAG context budget: MMR selects and the packer packs into it, and
+    build() caps retrieved context at it. rag_context_token_budget overrides
+    the RAG_SHARE of the model budget.
+    """
+    return int(get_config_value("rag_context_token_budget", 0)) or int(budget_for_model(model_id) * RAG_SHARE)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    return text[: max_tokens * 4].rsplit(" ", 1)[0] + " …"
+
+
+def extractive_summary(summary: str, turns: List[dict], max_tokens: int) -> str:
+    """
+    Cheap default summarizer: keep the first sentence of each folded turn and
+    drop the oldest lines once the summary exceeds its budget.
+    """
+    lines = [line for line in summary.splitlines() if line]
+    for turn in turns:
+        first_sentence = turn["content"].strip().split(". ")[0][:200]
+        lines.append(f"{turn['role'].capitalize()}: {first_sentence}")
+
+    while lines and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def _fingerprint(message: dict) -> str:
+    return hashlib.sha1(f"{message.get('role')}|{message.get('content')}".encode("utf-8")).hexdigest()
+
+
+class _ConversationState:
+    def __init__(self):
+        self.fingerprints: List[str] = []
+        self.token_counts: List[int] = []
+        self.summary: str = ""
+        self.summarized_upto: int = 0
+
+
+class ContextBuilder:
+    """
+    Packs system message, a rolling summary of older turns, the most recent turns
+    and RAG context into a hard per-model token budget.
+
+    Per-message token counts and the rolling summary are cached per conversation,
+    so each new turn only counts the new messages and folds only the turns that
+    just fell out of the recent window into the summary.
+    """
+
+    def __init__(self, summarize_fn: Optional[Callable[[str, List[dict], int], str]] = None):
+        self.summarize_fn = summarize_fn or extractive_summary
+        self._states: "OrderedDict[str, _ConversationState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def build(
+        self,
+        conversation_id: str,
+        messages: List[dict],
+        rag_context: str = "",
+        model_id: str = BEDROCK_MODEL_ID,
+    ) -> Dict:
+        """
+        Returns {"history", "context", "input_tokens"} where history is the list of
+        prior turns to send verbatim and context is the summary + RAG preamble for
+        the final user message.
+        """
+        budget = budget_for_model(model_id)
+        user_input = messages[-1]["content"] if messages else ""
+        prior = messages[:-1]
+
+        with self._lock:
+            state = self._state_for(conversation_id)
+            self._count_delta(state, prior)
+
+            # Fixed costs: system prompt, the current question and section framing
+            used = count_tokens(SYSTEM_MESSAGE) + count_tokens(user_input) + FRAMING_TOKENS
+
+            rag_context = truncate_to_tokens(rag_context, min(rag_budget_for_model(model_id), budget - used))
+            used += count_tokens(rag_context) if rag_context else 0
+
+            # Reserve room for the summary unless every unsummarized turn fits verbatim
+            summary_budget = int(budget * SUMMARY_SHARE)
+            pending = state.token_counts[state.summarized_upto:]
+            fits = not state.summary and len(pending) <= MAX_HISTORY and sum(pending) <= budget - used
+            history_budget = budget - used - (0 if fits else summary_budget)
+
+            # Newest-first until the history budget or MAX_HISTORY is reached
+            start = len(prior)
+            history_tokens = 0
+            while start > state.summarized_upto and len(prior) - start < MAX_HISTORY:
+                cost = state.token_counts[start - 1]
+                if history_tokens + cost > history_budget:
+                    break
+                history_tokens += cost
+                start -= 1
+
+            # The Messages API requires history to open with a user turn
+            while start < len(prior) and prior[start]["role"] != "user":
+                history_tokens -= state.token_counts[start]
+                start += 1
+
+            if start > state.summarized_upto:
+                state.summary = self.summarize_fn(state.summary, prior[state.summarized_upto:start], summary_budget)
+                state.summarized_upto = start
+
+            summary = truncate_to_tokens(state.summary, summary_budget)
+            used += history_tokens + (count_tokens(summary) if summary else 0)
+
+        return {
+            "history": [{"role": m["role"], "content": m["content"]} for m in prior[start:]],
+            "context": self._compose_context(summary, rag_context),
+            "input_tokens": used,
+        }
+
+    def reset(self, conversation_id: str) -> None:
+        with self._lock:
+            self._states.pop(conversation_id, None)
+
+    # === Internals (call with lock held) ===
+    def _state_for(self, conversation_id: str) -> _ConversationState:
+        state = self._states.get(conversation_id)
+        if state is None:
+            state = self._states[conversation_id] = _ConversationState()
+            while len(self._states) > MAX_TRACKED_CONVERSATIONS:
+                self._states.popitem(last=False)
+        self._states.move_to_end(conversation_id)
+        return state
+
+    @staticmethod
+    def _count_delta(state: _ConversationState, prior: List[dict]) -> None:
+        # Keep cached counts up to the first message whose fingerprint changed (edits, resets);
+        # hashing every turn is cheap next to re-counting tokens
+        fingerprints = [_fingerprint(message) for message in prior]
+        keep = 0
+        while keep < min(len(state.fingerprints), len(prior)) and state.fingerprints[keep] == fingerprints[keep]:
+            keep += 1
+        if keep < state.summarized_upto:
+            # An already-summarized turn changed; the summary no longer describes the history
+            state.summary, state.summarized_upto = "", 0
+
+        state.fingerprints = fingerprints
+        del state.token_counts[keep:]
+        for message in prior[keep:]:
+            state.token_counts.append(count_tokens(message["content"]))
+
+    @staticmethod
+    def _compose_context(summary: str, rag_context: str) -> str:
+        parts = []
+        if summary:
+            parts.append(f"Summary of the earlier conversation:\n{summary}")
+        if rag_context:
+            parts.append(f"Here is helpful context:\n\n{rag_context}\n\nNow answer this:")
+        return "\n\n".join(parts)
+
+
+# === Process-wide Instance ===
+context_builder = ContextBuilder()
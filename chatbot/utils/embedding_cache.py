@@ -0,0 +1,279 @@
+# chatbot/utils/embedding_cache.py — Content-addressed embedding cache (memory LRU + memory-mapped disk tier)
+
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from chatbot.utils.constants import EMBEDDING_CACHE_DIR
+from chatbot.utils import quantization
+from chatbot.utils.config_loader import get_config_value
+from chatbot.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: single-process use only
+    fcntl = None
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class _DiskStore:
+    """
+    Append-only vector store for one (engine, model) pair.
+
+    Vectors live in a float32 file opened with np.memmap; index.jsonl maps each
+    text hash to its row. A vector is flushed before its index line is written,
+    so the index never points at a row that was not persisted.
+
+    Several processes (app workers, the ingestion CLI) may share a store: appends
+    hold an exclusive flock on .lock and first catch up on index lines written
+    by others, so rows are allocated past everything already on disk.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.lock_path = os.path.join(directory, ".lock")
+        self.index: Dict[str, int] = {}
+        self.dim: Optional[int] = None
+        self.capacity = 0
+        self.next_row = 0
+        self._index_offset = 0
+        self._matrix: Optional[np.memmap] = None
+        self._load()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        row = self.index.get(key)
+        if row is None:
+            # Another process may have stored it since we last looked
+            self._refresh()
+            row = self.index.get(key)
+            if row is None:
+                return None
+        return np.array(self._matrix[row])
+
+    def put_many(self, items: List[Tuple[str, np.ndarray]]) -> None:
+        if not items:
+            return
+        with self._exclusive():
+            self._refresh()
+            items = [(k, v) for k, v in items if k not in self.index]
+            if not items:
+                return
+            if self.dim is None:
+                self._init_dim(len(items[0][1]))
+
+            start = self.next_row
+            self._ensure_capacity(start + len(items))
+            for offset, (_, vector) in enumerate(items):
+                self._matrix[start + offset] = vector
+            self._matrix.flush()
+
+            with open(self.index_path, "a") as f:
+                f.write("".join(json.dumps({"k": key, "r": start + offset}) + "\n"
+                                for offset, (key, _) in enumerate(items)))
+                self._index_offset = f.tell()
+            for offset, (key, _) in enumerate(items):
+                self.index[key] = start + offset
+            self.next_row = start + len(items)
+
+    @contextmanager
+    def _exclusive(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load(self) -> None:
+        if os.path.exists(self.meta_path):
+            self._refresh()
+
+    def _refresh(self) -> None:
+        """
+        Read index lines appended since the last call (by any process) and widen
+        the memmap if another process grew the vectors file.
+        """
+        if self.dim is None:
+            if not os.path.exists(self.meta_path):
+                return
+            with open(self.meta_path) as f:
+                self.dim = json.load(f)["dim"]
+        try:
+            if os.path.getsize(self.index_path) > self._index_offset:
+                with open(self.index_path) as f:
+                    f.seek(self._index_offset)
+                    for line in f:
+                        if not line.endswith("\n"):
+                            break  # torn final line from an interrupted or in-progress write
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            break
+                        self.index[entry["k"]] = entry["r"]
+                        self.next_row = max(self.next_row, entry["r"] + 1)
+                        self._index_offset += len(line.encode("utf-8"))
+        except FileNotFoundError:
+            return
+        rows_on_disk = os.path.getsize(self.vectors_path) // (4 * self.dim)
+        if rows_on_disk > self.capacity:
+            self._open(rows_on_disk)
+
+    def _init_dim(self, dim: int) -> None:
+        self.dim = dim
+        with open(self.meta_path, "w") as f:
+            json.dump({"dim": dim}, f)
+        open(self.vectors_path, "wb").close()
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self.capacity:
+            return
+        capacity = max(1024, self.capacity)
+        while capacity < rows:
+            capacity *= 2
+        self._matrix = None
+        with open(self.vectors_path, "r+b") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._open(capacity)
+
+    def _open(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)) if capacity else None
+
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed by (engine, model, sha256 of text).
+
+    Lookups go memory LRU → memory-mapped disk tier → embed_fn. All misses in a
+    batch are embedded with a single embed_fn call. The disk tier survives
+    restarts and is shared by every Streamlit session in the process.
+
+    memory_dtype (float32 | float16 | int8) sets how vectors are held in the
+    memory tier; they are dequantized to float32 on the way out.
+    """
+
+    def __init__(self, root_dir: str, max_memory_entries: int = 4096, persist: bool = True,
+                 memory_dtype: str = "float32"):
+        quantization.storage_dtype(memory_dtype)
+        self.root_dir = root_dir
+        self.max_memory_entries = max_memory_entries
+        self.persist = persist
+        self.memory_dtype = memory_dtype
+        self._memory: "OrderedDict[Tuple[str, str, str], Tuple[np.ndarray, Optional[np.ndarray]]]" = OrderedDict()
+        self._stores: Dict[Tuple[str, str], _DiskStore] = {}
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def embed(self, engine: str, model: str, texts: List[str], embed_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        if not texts:
+            return embed_fn(texts)
+
+        keys = [text_key(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                if key not in found:
+                    vector = self._lookup(engine, model, key)
+                    if vector is not None:
+                        found[key] = vector
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = np.asarray(embed_fn(list(missing.values())), dtype=np.float32)
+            fresh = list(zip(missing.keys(), vectors))
+            found.update(fresh)
+            with self._lock:
+                self._stats["misses"] += len(fresh)
+                self._store(engine, model, fresh)
+
+        return np.stack([found[key] for key in keys])
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = sum(self._stats.values())
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            return {
+                **self._stats,
+                "memory_entries": len(self._memory),
+                "disk_entries": sum(len(s.index) for s in self._stores.values()),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    # === Internals (call with lock held) ===
+    def _lookup(self, engine: str, model: str, key: str) -> Optional[np.ndarray]:
+        mem_key = (engine, model, key)
+        encoded = self._memory.get(mem_key)
+        if encoded is not None:
+            self._memory.move_to_end(mem_key)
+            self._stats["memory_hits"] += 1
+            return quantization.decode(*encoded)
+
+        store = self._store_for(engine, model)
+        vector = store.get(key) if store is not None else None
+        if vector is not None:
+            self._remember(mem_key, vector)
+            self._stats["disk_hits"] += 1
+        return vector
+
+    def _store(self, engine: str, model: str, items: List[Tuple[str, np.ndarray]]) -> None:
+        for key, vector in items:
+            self._remember((engine, model, key), vector)
+
+        store = self._store_for(engine, model)
+        if store is None:
+            return
+        try:
+            store.put_many(items)
+        except OSError as e:
+            logger.warning(f"[EmbeddingCache] Disk tier disabled after write failure: {e}")
+            self.persist = False
+
+    def _remember(self, mem_key: Tuple[str, str, str], vector: np.ndarray) -> None:
+        self._memory[mem_key] = quantization.encode(vector, self.memory_dtype)
+        self._memory.move_to_end(mem_key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _store_for(self, engine: str, model: str) -> Optional[_DiskStore]:
+        if not self.persist:
+            return None
+        store = self._stores.get((engine, model))
+        if store is None:
+            safe_model = re.sub(r"[^\w.-]", "_", model)
+            try:
+                store = _DiskStore(os.path.join(self.root_dir, f"{engine}__{safe_model}"))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"[EmbeddingCache] Disk tier unavailable, memory only: {e}")
+                self.persist = False
+                return None
+            self._stores[(engine, model)] = store
+        return store
+
+
+# === Process-wide Instance ===
+embedding_cache = EmbeddingCache(
+    root_dir=EMBEDDING_CACHE_DIR,
+    max_memory_entries=int(get_config_value("embedding_cache_memory_entries", 4096)),
+    persist=bool(get_config_value("embedding_cache_persist", True)),
+    memory_dtype=get_config_value("embedding_cache_memory_dtype", "float32"),
+)
@@ -0,0 +1,321 @@
+# chatbot/utils/embedding_server.py — Shared micro-batching worker for HuggingFace embeddings
+
+import time
+import queue
+import atexit
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from chatbot.utils.constants import HF_EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE
+from chatbot.utils.config_loader import get_config_value
+from chatbot.logger import logger
+
+# === Configurable Batching ===
+SERVER_MODE = get_config_value("hf_embedding_server", "process")  # process | thread | off
+MAX_BATCH = int(get_config_value("hf_server_max_batch", 64))        # texts per forward pass
+MAX_WAIT_MS = float(get_config_value("hf_server_max_wait_ms", 5))   # how long the first request waits for company
+REQUEST_TIMEOUT = 60.0
+MAX_START_FAILURES = int(get_config_value("hf_server_max_start_failures", 3))           # consecutive, before backing off
+START_COOLDOWN_SECONDS = float(get_config_value("hf_server_start_cooldown_seconds", 60))  # fail fast for this long
+
+# === CPU Inference Options ===
+INFERENCE_PRECISION = get_config_value("hf_inference_precision", "fp32")  # fp32 | int8 (dynamic quantization)
+INFERENCE_BACKEND = get_config_value("hf_inference_backend", "torch")     # torch | onnx
+WARMUP_TEXTS = ["warm-up", "Warm-up sentence long enough to exercise the attention kernels " * 4]
+LATENCY_WINDOW = 256  # batches kept for latency percentiles
+
+
+def load_sentence_transformer(
+    model_name: str = HF_EMBEDDING_MODEL,
+    precision: str = INFERENCE_PRECISION,
+    backend: str = INFERENCE_BACKEND,
+) -> Callable[[List[str]], np.ndarray]:
+    """
+    Default encoder factory; runs inside whichever process then owns the model.
+
+    backend="onnx" uses sentence-transformers' ONNX Runtime backend when optimum
+    is installed. On torch, precision="int8" applies dynamic int8 quantization to
+    every Linear layer. The encoder is warmed up before it is returned, so the
+    first real request does not pay for lazy initialization.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    model = None
+    if backend == "onnx":
+        try:
+            model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+        except (ImportError, TypeError, ValueError) as e:
+            logger.warning(f"[EmbeddingServer] ONNX backend unavailable, using torch: {e}")
+            backend = "torch"
+    if model is None:
+        model = SentenceTransformer(model_name, device="cpu")
+        if precision == "int8":
+            import torch
+
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def encode(texts: List[str]) -> np.ndarray:
+        return np.asarray(model.encode(texts, batch_size=EMBEDDING_BATCH_SIZE, convert_to_numpy=True), dtype=np.float32)
+
+    encode(WARMUP_TEXTS)
+    logger.info(f"[EmbeddingServer] Loaded and warmed {model_name} (backend={backend}, precision={precision})")
+    return encode
+
+
+class EmbeddingServerUnavailable(RuntimeError):
+    """Raised when the model could not be loaded, so no worker holds a copy of it."""
+
+
+def _timed_load(factory: Callable, factory_args: tuple) -> Tuple[Callable[[List[str]], np.ndarray], float]:
+    started = time.perf_counter()
+    encode = factory(*factory_args)
+    return encode, time.perf_counter() - started
+
+
+def _worker_main(conn, factory: Callable, factory_args: tuple) -> None:
+    encode, load_seconds = _timed_load(factory, factory_args)
+    conn.send(("ready", load_seconds))
+    while True:
+        texts = conn.recv()
+        if texts is None:
+            return
+        try:
+            conn.send(("ok", encode(texts)))
+        except Exception as e:
+            conn.send(("error", repr(e)))
+
+
+class EmbeddingServer:
+    """
+    Collects embedding requests from every session thread into micro-batches.
+
+    A request waits at most max_wait_ms for others to join its batch; a batch
+    closes early once it holds max_batch texts. In "process" mode the model lives
+    in a dedicated worker process, so forward passes neither hold this process's
+    GIL nor run once per session; "thread" mode runs the model on the dispatcher
+    thread instead. Callers get a Future per request.
+
+    After max_start_failures consecutive failed model loads the server backs off
+    for start_cooldown seconds, failing requests fast with EmbeddingServerUnavailable
+    instead of paying for another spawn and load on every batch.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[..., Callable[[List[str]], np.ndarray]] = load_sentence_transformer,
+        factory_args: tuple = (),
+        mode: str = "process",
+        max_batch: int = MAX_BATCH,
+        max_wait_ms: float = MAX_WAIT_MS,
+        max_start_failures: int = MAX_START_FAILURES,
+        start_cooldown: float = START_COOLDOWN_SECONDS,
+    ):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unknown embedding server mode '{mode}'")
+        self.factory = factory
+        self.factory_args = factory_args
+        self.mode = mode
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_start_failures = max_start_failures
+        self.start_cooldown = start_cooldown
+        self._start_failures = 0
+        self._retry_at = 0.0
+        self._queue: "queue.Queue[Optional[Tuple[List[str], Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._process = None
+        self._conn = None
+        self._encode: Optional[Callable[[List[str]], np.ndarray]] = None
+        self._warm_up: Optional[Future] = None
+        self._stats = {"requests": 0, "texts": 0, "batches": 0, "load_seconds": None, "start_failures": 0}
+        self._batch_ms: deque = deque(maxlen=LATENCY_WINDOW)
+
+    # === Public API ===
+    def submit(self, texts: List[str]) -> "Future[np.ndarray]":
+        future: Future = Future()
+        if not texts:
+            future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return future
+        self._ensure_started()
+        self._queue.put((list(texts), future))
+        return future
+
+    def embed(self, texts: List[str], timeout: float = REQUEST_TIMEOUT) -> np.ndarray:
+        return self.submit(texts).result(timeout=timeout)
+
+    def warm_up(self) -> Future:
+        """
+        Load the model now instead of on the first user request. Idempotent and
+        non-blocking: returns the Future of the single warm-up request.
+        """
+        if self._warm_up is None:
+            # A racing second warm-up is harmless: it is one tiny extra request
+            self._warm_up = self.submit(WARMUP_TEXTS[:1])
+        return self._warm_up
+
+    def stats(self) -> dict:
+        with self._lock:
+            batches = self._stats["batches"]
+            latencies = np.asarray(self._batch_ms) if self._batch_ms else None
+            return {
+                **self._stats,
+                "avg_batch_texts": round(self._stats["texts"] / batches, 2) if batches else 0.0,
+                "batch_ms_p50": round(float(np.percentile(latencies, 50)), 2) if latencies is not None else None,
+                "batch_ms_p95": round(float(np.percentile(latencies, 95)), 2) if latencies is not None else None,
+            }
+
+    def stop(self) -> None:
+        with self._lock:
+            dispatcher, self._dispatcher = self._dispatcher, None
+        if dispatcher is not None:
+            self._queue.put(None)
+            dispatcher.join(timeout=5)
+        self._stop_worker()
+
+    # === Dispatcher ===
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._run, name="embedding-server", daemon=True)
+                self._dispatcher.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stopping = self._collect(first)
+            self._process_batch(batch)
+            if stopping:
+                return
+
+    def _collect(self, first: Tuple[List[str], Future]) -> Tuple[List[Tuple[List[str], Future]], bool]:
+        batch, size = [first], len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+            size += len(item[0])
+        return batch, False
+
+    def _process_batch(self, batch: List[Tuple[List[str], Future]]) -> None:
+        live = [(texts, f) for texts, f in batch if f.set_running_or_notify_cancel()]
+        if not live:
+            return
+        flat = [t for texts, _ in live for t in texts]
+        started = time.perf_counter()
+        try:
+            vectors = self._run_encode(flat)
+        except Exception as e:
+            logger.exception(f"[EmbeddingServer] Batch of {len(flat)} texts failed: {e}")
+            for _, future in live:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self._batch_ms.append((time.perf_counter() - started) * 1000)
+            self._stats["requests"] += len(live)
+            self._stats["texts"] += len(flat)
+            self._stats["batches"] += 1
+        offset = 0
+        for texts, future in live:
+            future.set_result(vectors[offset:offset + len(texts)])
+            offset += len(texts)
+
+    # === Model Execution (dispatcher thread only) ===
+    def _run_encode(self, texts: List[str]) -> np.ndarray:
+        if self.mode == "thread":
+            if self._encode is None:
+                self._start(self._load_in_thread)
+            return self._encode(texts)
+
+        if self._process is None or not self._process.is_alive():
+            self._start(self._start_worker)
+        try:
+            self._conn.send(texts)
+            status, payload = self._conn.recv()
+        except (EOFError, OSError) as e:
+            # Worker died mid-batch; the next batch starts a fresh one
+            self._stop_worker()
+            raise RuntimeError(f"embedding worker exited: {e}") from e
+        if status != "ok":
+            raise RuntimeError(f"embedding worker error: {payload}")
+        return payload
+
+    def _start(self, start_fn: Callable[[], None]) -> None:
+        remaining = self._retry_at - time.monotonic()
+        if remaining > 0:
+            raise EmbeddingServerUnavailable(f"model load disabled for {remaining:.0f}s after repeated failures")
+        try:
+            start_fn()
+        except Exception as e:
+            self._start_failures += 1
+            with self._lock:
+                self._stats["start_failures"] += 1
+            if self._start_failures >= self.max_start_failures:
+                # After the cooldown a single attempt is allowed; another failure re-opens it
+                self._retry_at = time.monotonic() + self.start_cooldown
+                logger.error(f"[EmbeddingServer] {self._start_failures} failed model loads, "
+                             f"backing off for {self.start_cooldown:.0f}s")
+            raise EmbeddingServerUnavailable(f"embedding model failed to load: {e}") from e
+        self._start_failures = 0
+
+    def _load_in_thread(self) -> None:
+        self._encode, load_seconds = _timed_load(self.factory, self.factory_args)
+        self._record_load(load_seconds)
+
+    def _start_worker(self) -> None:
+        # spawn, not fork: the parent holds threads and possibly torch state
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child = ctx.Pipe()
+        self._process = ctx.Process(target=_worker_main, args=(child, self.factory, self.factory_args),
+                                    name="embedding-worker", daemon=True)
+        self._process.start()
+        child.close()
+        try:
+            _, load_seconds = self._conn.recv()
+        except (EOFError, OSError) as e:
+            self._stop_worker()
+            raise RuntimeError(f"worker exited before the model was ready: {e}") from e
+        logger.info(f"[EmbeddingServer] Worker process {self._process.pid} ready")
+        self._record_load(load_seconds)
+
+    def _record_load(self, load_seconds: float) -> None:
+        logger.info(f"[EmbeddingServer] Model load + warm-up took {load_seconds:.2f}s")
+        with self._lock:
+            self._stats["load_seconds"] = round(load_seconds, 3)
+
+    def _stop_worker(self) -> None:
+        if self._process is None:
+            return
+        try:
+            self._conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._conn.close()
+        self._process, self._conn = None, None
+
+
+# === Process-wide Instance (worker starts on first request) ===
+embedding_server: Optional[EmbeddingServer] = (
+    EmbeddingServer(factory_args=(HF_EMBEDDING_MODEL,), mode=SERVER_MODE) if SERVER_MODE != "off" else None
+)
+if embedding_server is not None:
+    atexit.register(embedding_server.stop)
@@ -0,0 +1,149 @@
+# chatbot/utils/embeddings.py — Batched text embeddings (Bedrock or HuggingFace)
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+
+from chatbot.utils.constants import (
+    BEDROCK_EMBEDDING_MODEL_ID,
+    BEDROCK_EMBED_MAX_WORKERS,
+    HF_EMBEDDING_MODEL,
+)
+from chatbot.utils.bedrock_client import get_client
+from chatbot.utils.rate_limiter import call_with_retry, configure_limiter
+from chatbot.utils.embedding_cache import embedding_cache
+from chatbot.utils.embedding_server import embedding_server, load_sentence_transformer, EmbeddingServerUnavailable
+from chatbot.utils.config_loader import get_config_value
+from chatbot.logger import logger
+
+# Cohere embed models accept up to 96 texts per InvokeModel request
+COHERE_MAX_BATCH = 96
+
+# Chunk and query vectors are content-addressed, so repeats skip the model entirely
+CACHE_ENABLED = bool(get_config_value("embedding_cache_enabled", True))
+
+bedrock = get_client("bedrock-runtime")
+
+# Titan takes one text per request, so embedding a rerank/MMR pool is 20+ calls;
+# give the embedding model its own bucket rather than Claude's 5 rps default
+configure_limiter(
+    BEDROCK_EMBEDDING_MODEL_ID,
+    rate=float(get_config_value("bedrock_embedding_rate_limit_rps", 50.0)),
+    max_rate=float(get_config_value("bedrock_embedding_rate_limit_max_rps", 200.0)),
+    burst=int(get_config_value("bedrock_embedding_rate_limit_burst", 32)),
+)
+
+# Titan fan-out gets its own pool: callers often already run on the shared Bedrock
+# pool (retrieval legs, reranking, cached Claude calls), and blocking one of its
+# workers on tasks queued behind it deadlocks once every worker does the same.
+# Tasks here are leaf calls that never submit work, so this pool cannot starve itself.
+titan_executor = ThreadPoolExecutor(max_workers=BEDROCK_EMBED_MAX_WORKERS, thread_name_prefix="titan-embed")
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize each row so cosine similarity becomes a plain dot product.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# === Bedrock ===
+def _invoke_embedding(body: dict) -> dict:
+    response = call_with_retry(
+        BEDROCK_EMBEDDING_MODEL_ID,
+        bedrock.invoke_model,
+        modelId=BEDROCK_EMBEDDING_MODEL_ID,
+        contentType="application/json",
+        accept="application/json",
+        body=json.dumps(body),
+    )
+    return json.loads(response["body"].read())
+
+
+def _embed_titan(text: str) -> List[float]:
+    return _invoke_embedding({"inputText": text})["embedding"]
+
+
+def embed_texts_bedrock(texts: List[str]) -> np.ndarray:
+    """
+    Embed a batch of texts on Bedrock and return an (n, dim) float32 matrix.
+    Only texts missing from the embedding cache are sent to Bedrock.
+    """
+    if CACHE_ENABLED:
+        return embedding_cache.embed("bedrock", BEDROCK_EMBEDDING_MODEL_ID, texts, _embed_texts_bedrock)
+    return _embed_texts_bedrock(texts)
+
+
+def _embed_texts_bedrock(texts: List[str]) -> np.ndarray:
+    """
+    Cohere models take the whole batch in one request; Titan only accepts a
+    single input, so its requests are issued concurrently on a dedicated pool
+    and the batch completes in one round trip of wall-clock time.
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    if BEDROCK_EMBEDDING_MODEL_ID.startswith("cohere."):
+        vectors = []
+        for i in range(0, len(texts), COHERE_MAX_BATCH):
+            batch = texts[i:i + COHERE_MAX_BATCH]
+            vectors.extend(_invoke_embedding({"texts": batch, "input_type": "search_document"})["embeddings"])
+    else:
+        futures = [titan_executor.submit(_embed_titan, text) for text in texts]
+        vectors = [f.result() for f in futures]
+
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def embed_text_bedrock(text: str) -> np.ndarray:
+    return embed_texts_bedrock([text])[0]
+
+
+# === HuggingFace (sentence-transformers, loaded once per process) ===
+_hf_encoder = None
+_hf_lock = threading.Lock()
+
+
+def _get_hf_encoder():
+    # In-process fallback; same optimized, warmed-up loader the embedding server uses
+    global _hf_encoder
+    if _hf_encoder is None:
+        with _hf_lock:
+            if _hf_encoder is None:
+                _hf_encoder = load_sentence_transformer(HF_EMBEDDING_MODEL)
+    return _hf_encoder
+
+
+def embed_texts_huggingface(texts: List[str]) -> np.ndarray:
+    """
+    Embed a batch of texts with one batched forward pass per EMBEDDING_BATCH_SIZE.
+    Only texts missing from the embedding cache reach the model.
+    """
+    if CACHE_ENABLED:
+        return embedding_cache.embed("huggingface", HF_EMBEDDING_MODEL, texts, _embed_texts_huggingface)
+    return _embed_texts_huggingface(texts)
+
+
+def _embed_texts_huggingface(texts: List[str]) -> np.ndarray:
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    # Shared worker: requests from all sessions are micro-batched into one forward pass.
+    # Only a worker that never loaded the model hands off to the in-process encoder;
+    # timeouts and encode errors are raised, since the worker still holds its copy.
+    # Once the in-process model exists it stays the only copy.
+    if embedding_server is not None and _hf_encoder is None:
+        try:
+            return embedding_server.embed(texts)
+        except EmbeddingServerUnavailable as e:
+            logger.warning(f"[Embeddings] Embedding server unavailable, encoding in-process: {e}")
+    return _get_hf_encoder()(list(texts))
+
+
+def embed_text_huggingface(text: str) -> np.ndarray:
+    return embed_texts_huggingface([text])[0]
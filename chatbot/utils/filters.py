@@ -0,0 +1,53 @@
+# === chatbot/utils/filters.py ===
+from typing import Any, List, Dict, Optional
+
+
+def _matches_value(actual: Any, expected: Any) -> bool:
+    if isinstance(expected, (list, tuple, set)):
+        return actual in expected
+    return actual == expected
+
+
+def metadata_matches(metadata: Dict, metadata_filter: Optional[Dict[str, Any]]) -> bool:
+    return all(_matches_value(metadata.get(k), v) for k, v in (metadata_filter or {}).items())
+
+
+def filter_chunks_by_metadata(chunks: List[Dict], metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict]:
+    """
+    Filters chunks by specified metadata. Example filter:
+    metadata_filter = {"source": "SharePoint", "author": ["Alice", "Bob"]}
+    A list value matches any of its members.
+    """
+    if not metadata_filter:
+        return chunks
+
+    return [chunk for chunk in chunks if metadata_matches(chunk.get("metadata", {}), metadata_filter)]
+
+
+# === Filter Pushdown Translators ===
+def to_bedrock_kb_filter(metadata_filter: Optional[Dict[str, Any]]) -> Optional[Dict]:
+    """
+    Translate a metadata filter into a Bedrock KB retrievalConfiguration filter.
+    """
+    if not metadata_filter:
+        return None
+
+    clauses = [
+        {"in": {"key": k, "value": list(v)}} if isinstance(v, (list, tuple, set)) else {"equals": {"key": k, "value": v}}
+        for k, v in metadata_filter.items()
+    ]
+    # andAll requires at least two members
+    return clauses[0] if len(clauses) == 1 else {"andAll": clauses}
+
+
+def to_opensearch_filter(metadata_filter: Optional[Dict[str, Any]]) -> List[Dict]:
+    """
+    Translate a metadata filter into OpenSearch bool.filter clauses (non-scoring, cached by the cluster).
+    """
+    if not metadata_filter:
+        return []
+
+    return [
+        {"terms": {f"metadata.{k}": list(v)}} if isinstance(v, (list, tuple, set)) else {"term": {f"metadata.{k}": v}}
+        for k, v in metadata_filter.items()
+    ]
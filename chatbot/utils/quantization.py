@@ -0,0 +1,69 @@
+# chatbot/utils/quantization.py — Compact vector storage (float16 / int8) and dequantized scoring
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Storage dtype → numpy dtype and on-disk file suffix
+STORAGE_DTYPES = {
+    "float32": (np.float32, "f32"),
+    "float16": (np.float16, "f16"),
+    "int8": (np.int8, "i8"),
+}
+SCORE_BLOCK = 16384  # rows dequantized at a time; bounds the float32 temporary
+
+
+def storage_dtype(name: str) -> np.dtype:
+    if name not in STORAGE_DTYPES:
+        raise ValueError(f"Unknown vector storage dtype '{name}' (expected one of {sorted(STORAGE_DTYPES)})")
+    return np.dtype(STORAGE_DTYPES[name][0])
+
+
+def encode(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Encode float32 rows for storage. int8 is symmetric scalar quantization with
+    one float32 scale per row (x ≈ code * scale); other dtypes have no scales.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype != "int8":
+        return vectors.astype(storage_dtype(dtype)), None
+    scales = np.abs(vectors).max(axis=-1) / 127.0
+    scales = np.where(scales == 0, 1.0, scales).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[..., None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def decode(codes: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    decoded = np.asarray(codes, dtype=np.float32)
+    return decoded * scales[..., None] if scales is not None else decoded
+
+
+def dot_scores(codes: np.ndarray, scales: Optional[np.ndarray], query: np.ndarray, dims: Optional[int] = None) -> np.ndarray:
+    """
+    Dot products of stored rows with a float32 query, without materializing the
+    dequantized matrix: rows are widened block by block and the int8 scale is
+    applied to the (n,) result instead of the (n, dim) codes.
+
+    `dims` scores only the first dims components (prefix truncation for a coarse pass).
+    """
+    query = np.asarray(query, dtype=np.float32)
+    if dims:
+        codes, query = codes[:, :dims], query[:dims]
+    out = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), SCORE_BLOCK):
+        out[start:start + SCORE_BLOCK] = np.asarray(codes[start:start + SCORE_BLOCK], dtype=np.float32) @ query
+    return out * scales if scales is not None else out
+
+
+def truncate(vectors: np.ndarray, dims: int) -> np.ndarray:
+    """
+    Keep the first dims components and re-normalize. Only meaningful for models
+    trained to front-load information (e.g. Titan v2's 256/512 output sizes).
+    """
+    prefix = np.asarray(vectors, dtype=np.float32)[..., :dims]
+    norms = np.linalg.norm(prefix, axis=-1, keepdims=True)
+    return prefix / np.where(norms == 0, 1.0, norms)
+
+
+def bytes_per_vector(dim: int, dtype: str) -> int:
+    return dim * storage_dtype(dtype).itemsize + (4 if dtype == "int8" else 0)
@@ -0,0 +1,198 @@
+# chatbot/utils/rate_limiter.py — Adaptive per-model rate limiting and throttling-aware retry
+
+import time
+import random
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from chatbot.utils.config_loader import get_config_value
+from chatbot.logger import logger
+
+# === Throttling Signals ===
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+}
+
+# === Defaults (overridable via dashboard config) ===
+DEFAULT_RATE = float(get_config_value("bedrock_rate_limit_rps", 5.0))
+MAX_RATE = float(get_config_value("bedrock_rate_limit_max_rps", 50.0))
+MIN_RATE = 0.2
+BURST = int(get_config_value("bedrock_rate_limit_burst", 5))
+CALL_DEADLINE_SECONDS = float(get_config_value("bedrock_call_deadline_seconds", 30.0))
+BACKOFF_BASE_SECONDS = 0.25
+BACKOFF_MAX_SECONDS = 8.0
+
+
+class BedrockThrottledError(Exception):
+    """Raised when a Bedrock call is still throttled (or queued) when its deadline runs out."""
+
+
+def is_throttling_error(error: Exception) -> bool:
+    response = getattr(error, "response", None)
+    if not isinstance(response, dict):
+        return False
+    return response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate follows AIMD: it grows additively after each
+    successful call and is cut multiplicatively whenever Bedrock throttles us.
+    Tracks queue depth and wait time so saturation is visible on the monitor.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = DEFAULT_RATE,
+        min_rate: float = MIN_RATE,
+        max_rate: float = MAX_RATE,
+        burst: int = BURST,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+    ):
+        self.name = name
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._cond = threading.Condition()
+        self._queue_depth = 0
+        self._stats = {
+            "acquired": 0,
+            "throttled": 0,
+            "deadline_exceeded": 0,
+            "total_wait_s": 0.0,
+            "max_wait_s": 0.0,
+            "max_queue_depth": 0,
+        }
+
+    def acquire(self, deadline: float) -> bool:
+        """
+        Block until a token is available or the monotonic deadline passes.
+        """
+        start = time.monotonic()
+        with self._cond:
+            self._queue_depth += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._queue_depth)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        waited = now - start
+                        self._stats["acquired"] += 1
+                        self._stats["total_wait_s"] += waited
+                        self._stats["max_wait_s"] = max(self._stats["max_wait_s"], waited)
+                        return True
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._stats["deadline_exceeded"] += 1
+                        return False
+                    self._cond.wait(min((1 - self._tokens) / self.rate, remaining))
+            finally:
+                self._queue_depth -= 1
+
+    def on_success(self) -> None:
+        with self._cond:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self) -> None:
+        with self._cond:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+            self._stats["throttled"] += 1
+        logger.warning(f"[RateLimiter] {self.name} throttled, rate lowered to {self.rate:.2f} req/s")
+
+    def metrics(self) -> dict:
+        with self._cond:
+            acquired = self._stats["acquired"]
+            return {
+                "model": self.name,
+                "rate_rps": round(self.rate, 2),
+                "queue_depth": self._queue_depth,
+                "avg_wait_ms": round(1000 * self._stats["total_wait_s"] / acquired, 1) if acquired else 0.0,
+                "max_wait_ms": round(1000 * self._stats["max_wait_s"], 1),
+                **{k: v for k, v in self._stats.items() if k not in ("total_wait_s", "max_wait_s")},
+            }
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+
+# === Per-model Registry ===
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def get_limiter(model_id: str) -> AdaptiveRateLimiter:
+    with _registry_lock:
+        limiter = _limiters.get(model_id)
+        if limiter is None:
+            limiter = _limiters[model_id] = AdaptiveRateLimiter(model_id)
+        return limiter
+
+
+def configure_limiter(model_id: str, **settings) -> AdaptiveRateLimiter:
+    """
+    Give a model its own rate/burst instead of the Claude-sized defaults
+    (e.g. embedding models, whose quotas are far higher).
+    """
+    with _registry_lock:
+        limiter = _limiters.get(model_id)
+        if limiter is None:
+            limiter = _limiters[model_id] = AdaptiveRateLimiter(model_id, **settings)
+            return limiter
+    with limiter._cond:
+        for name, value in settings.items():
+            setattr(limiter, name, value)
+        limiter._tokens = min(limiter._tokens, float(limiter.burst))
+    return limiter
+
+
+def limiter_metrics() -> list[dict]:
+    with _registry_lock:
+        limiters = list(_limiters.values())
+    return [limiter.metrics() for limiter in limiters]
+
+
+def call_with_retry(model_id: str, fn: Callable, *args, deadline_s: Optional[float] = None, **kwargs) -> Any:
+    """
+    Run a Bedrock call through the model's rate limiter.
+
+    ThrottlingException lowers the model's rate and is retried with full-jitter
+    exponential backoff until the overall deadline; any other error is raised
+    immediately. Raises BedrockThrottledError once the deadline is exhausted.
+    """
+    limiter = get_limiter(model_id)
+    deadline = time.monotonic() + (deadline_s if deadline_s is not None else CALL_DEADLINE_SECONDS)
+    attempt = 0
+
+    while True:
+        if not limiter.acquire(deadline):
+            raise BedrockThrottledError(f"Timed out waiting for rate limiter on {model_id}")
+
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if not is_throttling_error(e):
+                raise
+            limiter.on_throttle()
+            attempt += 1
+            delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+            if time.monotonic() + delay >= deadline:
+                raise BedrockThrottledError(f"{model_id} still throttled after {attempt} attempts") from e
+            time.sleep(delay)
+            continue
+
+        limiter.on_success()
+        return result
@@ -0,0 +1,190 @@
+# chatbot/utils/response_cache.py — Exact + semantic response cache in front of call_claude
+
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+from chatbot.utils.config_loader import get_config_value, load_config
+from chatbot.logger import logger
+
+
+# === Key Helpers ===
+TRAILING_PUNCTUATION = re.compile(r"[\s.,;:!?]+$")
+
+
+def normalize_prompt(text: str) -> str:
+    """
+    Casefold, collapse whitespace and drop trailing sentence punctuation so
+    trivially different phrasings share a cache key. Symbols inside the prompt
+    are kept: "2+2" and "2-2", or "C++" and "C#", are different questions.
+    """
+    text = re.sub(r"\s+", " ", (text or "").casefold()).strip()
+    return TRAILING_PUNCTUATION.sub("", text)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _default_embed(text: str) -> np.ndarray:
+    from chatbot.utils.embeddings import embed_text_bedrock, embed_text_huggingface
+
+    if get_config_value("embedding_engine", "bedrock") == "huggingface":
+        return np.asarray(embed_text_huggingface(text), dtype=np.float32)
+    return np.asarray(embed_text_bedrock(text), dtype=np.float32)
+
+
+# === Cache ===
+class ResponseCache:
+    """
+    Size-bounded LRU cache of LLM responses with a TTL.
+
+    Tier 1 is an exact match on (normalized prompt, context hash, model ID).
+    Tier 2 compares the prompt embedding against cached prompts that share the
+    same context hash and model, and returns a hit above the similarity threshold.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600,
+        similarity_threshold: float = 0.95,
+        embed_fn: Optional[Callable[[str], np.ndarray]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+        self.semantic = True
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._pending_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    @staticmethod
+    def make_key(prompt: str, context: str, model_id: str) -> str:
+        return content_hash(f"{model_id}|{content_hash(context)}|{normalize_prompt(prompt)}")
+
+    def get(self, prompt: str, context: str, model_id: str) -> Optional[str]:
+        key = self.make_key(prompt, context, model_id)
+        now = time.time()
+
+        with self._lock:
+            self._purge_expired(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return entry["response"]
+
+        vector = self._embed(prompt)
+        if vector is not None:
+            ctx_hash = content_hash(context)
+            with self._lock:
+                match = self._best_semantic_match(vector, ctx_hash, model_id)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self._stats["semantic_hits"] += 1
+                    return self._entries[match]["response"]
+                # Reuse this embedding when the fresh response is stored
+                self._pending_vectors[key] = vector
+                while len(self._pending_vectors) > self.max_entries:
+                    self._pending_vectors.popitem(last=False)
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, prompt: str, context: str, model_id: str, response: str) -> None:
+        key = self.make_key(prompt, context, model_id)
+        with self._lock:
+            vector = self._pending_vectors.pop(key, None)
+        if vector is None:
+            vector = self._embed(prompt)
+
+        with self._lock:
+            self._entries[key] = {
+                "response": response,
+                "model_id": model_id,
+                "context_hash": content_hash(context),
+                "vector": vector,
+                "expires_at": time.time() + self.ttl_seconds,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["exact_hits"] + self._stats["semantic_hits"] + self._stats["misses"]
+            hits = self._stats["exact_hits"] + self._stats["semantic_hits"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pending_vectors.clear()
+
+    # === Internals (call with lock held) ===
+    def _purge_expired(self, now: float) -> None:
+        expired = [k for k, v in self._entries.items() if v["expires_at"] <= now]
+        for k in expired:
+            del self._entries[k]
+        self._stats["expired"] += len(expired)
+
+    def _best_semantic_match(self, vector: np.ndarray, ctx_hash: str, model_id: str) -> Optional[str]:
+        keys, vectors = [], []
+        for k, v in self._entries.items():
+            if v["vector"] is not None and v["model_id"] == model_id and v["context_hash"] == ctx_hash:
+                keys.append(k)
+                vectors.append(v["vector"])
+        if not keys:
+            return None
+
+        scores = np.stack(vectors) @ vector
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= self.similarity_threshold else None
+
+    def _embed(self, prompt: str) -> Optional[np.ndarray]:
+        if self.embed_fn is None or not self.semantic:
+            return None
+        try:
+            vector = np.asarray(self.embed_fn(normalize_prompt(prompt)), dtype=np.float32)
+        except ImportError as e:
+            logger.warning(f"[ResponseCache] Semantic tier disabled, embeddings unavailable: {e}")
+            self.embed_fn = None
+            return None
+        except Exception as e:
+            logger.warning(f"[ResponseCache] Embedding failed, exact-match only for this lookup: {e}")
+            return None
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+
+# === Process-wide Instance ===
+response_cache = ResponseCache(embed_fn=_default_embed)
+
+
+def cache_enabled() -> bool:
+    """
+    Apply the dashboard's cache settings to the process-wide cache and report
+    whether caching is on. Called per request, so edits apply without a restart;
+    TTL changes affect entries stored from then on.
+    """
+    config = load_config()
+    response_cache.max_entries = int(config.get("response_cache_max_entries", 512))
+    response_cache.ttl_seconds = float(config.get("response_cache_ttl_seconds", 3600))
+    response_cache.similarity_threshold = float(config.get("response_cache_similarity", 0.95))
+    response_cache.semantic = bool(config.get("response_cache_semantic", True))
+    return bool(config.get("response_cache_enabled", True))
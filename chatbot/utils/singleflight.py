@@ -0,0 +1,67 @@
+# chatbot/utils/singleflight.py — Process-wide coalescing of identical in-flight calls
+
+import json
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+from chatbot.logger import logger
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Build a stable key from call parameters (model, payload, query, top_k, ...).
+    """
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Ensures that concurrent calls with the same key share one execution.
+
+    The first caller (the leader) runs the function; callers that arrive while it
+    is still in flight block on the leader's Future and receive the same result
+    or exception. Once the call finishes the key is released, so later calls run
+    fresh (caching is a separate concern).
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"executed": 0, "coalesced": 0}
+
+    def do(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self._stats["executed"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            logger.debug(f"[SingleFlight] Joined in-flight call {key[:12]}")
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._inflight)}
+
+
+# === Process-wide Instance ===
+singleflight = SingleFlight()
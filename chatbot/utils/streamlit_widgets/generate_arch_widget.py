@@ -11,6 +11,7 @@ from chatbot.utils import (
     convert_xml_to_html,
     invoke_bedrock_model_streaming,
 )
+from chatbot.utils.rate_limiter import call_with_retry
 from chatbot.logger import logger
 from chatbot.utils.prompt_templates import ARCHITECTURE_PROMPT
 
@@ -46,7 +47,9 @@ def generate_arch(arch_messages):
         full_response_array = []
         for _ in range(4):
             try:
-                arch_gen_response, stop_reason = invoke_bedrock_model_streaming(arch_messages, enable_reasoning=True)
+                arch_gen_response, stop_reason = call_with_retry(
+                    BEDROCK_MODEL_ID, invoke_bedrock_model_streaming, arch_messages, enable_reasoning=True
+                )
                 full_response_array.append(arch_gen_response)
                 if stop_reason != "max_tokens":
                     break
@@ -8,6 +8,7 @@ from chatbot.utils import (
     collect_feedback,
     invoke_bedrock_model_streaming,
 )
+from chatbot.utils.rate_limiter import call_with_retry
 from chatbot.utils.prompt_templates import CLOUDFORMATION_PROMPT
 
 
@@ -34,7 +35,7 @@ def generate_cfn(cfn_messages):
         cfn_messages.append({"role": "user", "content": CLOUDFORMATION_PROMPT})
 
         try:
-            response, stop_reason = invoke_bedrock_model_streaming(cfn_messages)
+            response, stop_reason = call_with_retry(BEDROCK_MODEL_ID, invoke_bedrock_model_streaming, cfn_messages)
             st.session_state.cfn_messages.append({"role": "assistant", "content": response})
             st.markdown(response)
             st.session_state.interaction.append({"type": "CloudFormation", "details": response})
@@ -8,6 +8,7 @@ from chatbot.utils import (
     collect_feedback,
     invoke_bedrock_model_streaming,
 )
+from chatbot.utils.rate_limiter import call_with_retry
 from chatbot.utils.prompt_templates import COST_ESTIMATE_PROMPT
 
 
@@ -34,7 +35,7 @@ def generate_cost(cost_messages):
         cost_messages.append({"role": "user", "content": COST_ESTIMATE_PROMPT})
 
         try:
-            response, stop_reason = invoke_bedrock_model_streaming(cost_messages)
+            response, stop_reason = call_with_retry(BEDROCK_MODEL_ID, invoke_bedrock_model_streaming, cost_messages)
             st.session_state.cost_messages.append({"role": "assistant", "content": response})
             st.markdown(response)
 
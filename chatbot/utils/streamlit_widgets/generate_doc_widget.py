@@ -8,6 +8,7 @@ from chatbot.utils import (
     collect_feedback,
     invoke_bedrock_model_streaming,
 )
+from chatbot.utils.rate_limiter import call_with_retry
 from chatbot.utils.prompt_templates import DOCUMENTATION_PROMPT
 
 
@@ -34,7 +35,7 @@ def generate_doc(doc_messages):
         doc_messages.append({"role": "user", "content": DOCUMENTATION_PROMPT})
 
         try:
-            response, stop_reason = invoke_bedrock_model_streaming(doc_messages)
+            response, stop_reason = call_with_retry(BEDROCK_MODEL_ID, invoke_bedrock_model_streaming, doc_messages)
             st.session_state.doc_messages.append({"role": "assistant", "content": response})
             st.markdown(response)
 
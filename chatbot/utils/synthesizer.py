@@ -0,0 +1,23 @@
+# chatbot/utils/synthesizer.py — Merge selected RAG chunks into one cited context block
+
+from typing import Dict, List
+
+
+def format_citation(chunk: Dict) -> str:
+    meta = chunk.get("metadata", {})
+    return f"[{meta.get('title', 'Doc')}] (Page {meta.get('page', '?')}) from {meta.get('source', 'Unknown')}:"
+
+
+def synthesize_chunks(chunks: List[Dict]) -> str:
+    """
+    Join the selected chunks into a single context string, each under its
+    citation, in selection order. Exact repeats of a chunk's text are dropped.
+    """
+    seen, parts = set(), []
+    for chunk in chunks:
+        content = (chunk.get("content") or "").strip()
+        if not content or content in seen:
+            continue
+        seen.add(content)
+        parts.append(f"{format_citation(chunk)}\n{content}")
+    return "\n\n".join(parts)
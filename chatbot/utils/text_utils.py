@@ -0,0 +1,24 @@
+# chatbot/utils/text_utils.py — Normalize document and retrieval text before it reaches prompts
+
+import re
+import unicodedata
+from typing import Any
+
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f\u200b-\u200d\ufeff]")
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES = re.compile(r"\n\s*\n\s*(\n\s*)+")
+
+
+def clean_text(text: Any) -> str:
+    """
+    NFKC-normalize, drop control and zero-width characters, collapse runs of
+    spaces and keep at most one blank line between paragraphs.
+
+    Accepts Bedrock KB content objects ({"text": ...}) as well as plain strings.
+    """
+    if isinstance(text, dict):
+        text = text.get("text", "")
+    text = unicodedata.normalize("NFKC", str(text or "")).replace("\r\n", "\n").replace("\r", "\n")
+    text = _CONTROL.sub("", text)
+    lines = [_SPACES.sub(" ", line).strip() for line in text.split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
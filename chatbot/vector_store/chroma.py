@@ -3,25 +3,27 @@
 from chromadb import PersistentClient
 from chromadb.config import Settings
 from uuid import uuid4
-from typing import Dict
+from typing import Dict, Optional
 
 # Configure ChromaDB location (mounted volume or embedded)
 chroma_client = PersistentClient(path="chroma_data", settings=Settings(anonymized_telemetry=False))
 memory_collection = chroma_client.get_or_create_collection("devgenius_memory")
 
 
-def store_summary_if_relevant(summary: str, metadata: Dict) -> None:
+def store_summary_if_relevant(summary: str, metadata: Dict, doc_id: Optional[str] = None) -> None:
     """
     Stores a summary into ChromaDB with associated metadata.
     Args:
         summary: The distilled memory to store.
         metadata: Dict including timestamp, user, tags, etc.
+        doc_id: Stable id to upsert under (e.g. one rolling summary per
+            conversation); a fresh id is generated when omitted.
     """
     if not summary or len(summary.split()) < 10:
         return  # Too short to store
 
-    memory_collection.add(
+    memory_collection.upsert(
         documents=[summary],
-        ids=[str(uuid4())],
+        ids=[doc_id or str(uuid4())],
         metadatas=[metadata]
     )
@@ -14,6 +14,7 @@ from chatbot.utils import (
     store_in_s3, save_conversation, collect_feedback, convert_xml_to_html,
     continuation_prompt, invoke_bedrock_model_streaming, BEDROCK_MODEL_ID
 )
+from chatbot.utils.rate_limiter import call_with_retry
 from chatbot.utils.prompt_templates import ARCHITECTURE_PROMPT
 
 @st.fragment
@@ -35,7 +36,7 @@ def generate_arch(arch_messages):
         try:
             full_response_array = []
             for attempt in range(3):
-                response, stop_reason = invoke_bedrock_model_streaming(arch_messages, enable_reasoning=True)
+                response, stop_reason = call_with_retry(BEDROCK_MODEL_ID, invoke_bedrock_model_streaming, arch_messages, enable_reasoning=True)
                 full_response_array.append(response)
                 if stop_reason != "max_tokens":
                     break
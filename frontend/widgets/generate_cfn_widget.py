@@ -4,6 +4,7 @@ import uuid
 from chatbot.utils import (
     BEDROCK_MODEL_ID, store_in_s3, save_conversation, collect_feedback, invoke_bedrock_model_streaming
 )
+from chatbot.utils.rate_limiter import call_with_retry
 from chatbot.utils.prompt_templates import CLOUDFORMATION_PROMPT
 
 @st.fragment
@@ -24,7 +25,7 @@ def generate_cfn(cfn_messages):
 
         with st.spinner("Creating CloudFormation template..."):
             try:
-                response, _ = invoke_bedrock_model_streaming(cfn_messages)
+                response, _ = call_with_retry(BEDROCK_MODEL_ID, invoke_bedrock_model_streaming, cfn_messages)
                 st.markdown(response)
                 store_in_s3(response, "cloudformation")
                 save_conversation(st.session_state["conversation_id"], CLOUDFORMATION_PROMPT, response)
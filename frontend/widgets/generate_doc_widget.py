@@ -4,6 +4,7 @@ import uuid
 from chatbot.utils import (
     BEDROCK_MODEL_ID, store_in_s3, save_conversation, collect_feedback, invoke_bedrock_model_streaming
 )
+from chatbot.utils.rate_limiter import call_with_retry
 from chatbot.utils.prompt_templates import DOCUMENTATION_PROMPT
 
 @st.fragment
@@ -24,7 +25,7 @@ def generate_doc(doc_messages):
 
         with st.spinner("Generating docs via Claude 3 Sonnet..."):
             try:
-                response, _ = invoke_bedrock_model_streaming(doc_messages)
+                response, _ = call_with_retry(BEDROCK_MODEL_ID, invoke_bedrock_model_streaming, doc_messages)
                 st.markdown(response)
                 store_in_s3(response, "documentation")
                 save_conversation(st.session_state["conversation_id"], DOCUMENTATION_PROMPT, response)
@@ -1,6 +1,17 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from chatbot.agent import call_claude, call_bedrock_agent, get_ranked_chunks
+from chatbot.agent import call_claude, call_bedrock_agent, stream_claude, stream_bedrock_agent, get_ranked_chunks
+from chatbot.utils.response_cache import response_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_response_cache(monkeypatch):
+    # Exact-match tier only: semantic lookups would also hit the mocked Bedrock client
+    monkeypatch.setattr(response_cache, "embed_fn", None)
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
 
 # === Test Claude ===
 @patch("chatbot.agent.bedrock.invoke_model")
@@ -14,12 +25,42 @@ def test_call_claude_success(mock_invoke):
     assert "Hello from Claude" in output
 
 
+@patch("chatbot.agent.bedrock.invoke_model")
+def test_call_claude_served_from_cache(mock_invoke):
+    mock_response = MagicMock()
+    mock_response["body"].read.return_value = b'{"content": "Cached answer"}'
+    mock_invoke.return_value = mock_response
+
+    first = call_claude("Build a serverless pipeline with S3 and Lambda")
+    second = call_claude("build a serverless pipeline with S3 and Lambda!")
+    assert first == second == "Cached answer"
+    mock_invoke.assert_called_once()
+
+
 @patch("chatbot.agent.bedrock.invoke_model", side_effect=Exception("Mock Claude error"))
 def test_call_claude_failure(mock_invoke):
     output = call_claude("Trigger failure")
     assert output.startswith("⚠️ Claude error:")
 
 
+# === Test Claude Streaming ===
+@patch("chatbot.agent.bedrock.invoke_model_with_response_stream")
+def test_stream_claude_yields_deltas(mock_stream):
+    mock_stream.return_value = {"body": [
+        {"chunk": {"bytes": b'{"type": "message_start"}'}},
+        {"chunk": {"bytes": b'{"type": "content_block_delta", "delta": {"text": "Hello "}}'}},
+        {"chunk": {"bytes": b'{"type": "content_block_delta", "delta": {"text": "VPC"}}'}},
+        {"chunk": {"bytes": b'{"type": "message_stop"}'}},
+    ]}
+    assert list(stream_claude("What is a VPC?")) == ["Hello ", "VPC"]
+
+
+@patch("chatbot.agent.bedrock.invoke_model_with_response_stream", side_effect=Exception("Stream down"))
+def test_stream_claude_failure(mock_stream):
+    output = list(stream_claude("Trigger failure"))
+    assert output[0].startswith("⚠️ Claude error:")
+
+
 # === Test Bedrock Agent ===
 @patch("chatbot.agent.agent_runtime.invoke_agent")
 def test_call_bedrock_agent_success(mock_invoke):
@@ -50,6 +91,22 @@ def test_call_bedrock_agent_empty(mock_invoke):
     assert response == "[Agent returned no message]"
 
 
+@patch("chatbot.agent.agent_runtime.invoke_agent")
+def test_call_bedrock_agent_event_stream(mock_invoke):
+    mock_invoke.return_value = {"completion": iter([
+        {"chunk": {"bytes": "Use ".encode("utf-8")}},
+        {"trace": {}},
+        {"chunk": {"bytes": "AWS Config.".encode("utf-8")}},
+    ])}
+    assert call_bedrock_agent("Summarize compliance") == "Use AWS Config."
+
+
+@patch("chatbot.agent.stream_claude", return_value=iter(["Claude fallback"]))
+@patch("chatbot.agent.agent_runtime.invoke_agent", side_effect=Exception("Agent down"))
+def test_stream_bedrock_agent_falls_back_to_claude(mock_invoke, mock_stream):
+    assert list(stream_bedrock_agent("Trigger failure")) == ["Claude fallback"]
+
+
 # === Chunk Ranking ===
 def test_get_ranked_chunks_valid():
     chunks = [
@@ -0,0 +1,27 @@
+# tests/test_bedrock_client.py
+
+import asyncio
+from unittest.mock import patch, MagicMock
+from chatbot.utils import bedrock_client
+
+
+@patch("chatbot.utils.bedrock_client.boto3.session.Session")
+def test_get_client_is_shared(mock_session):
+    mock_session.return_value.client.return_value = MagicMock()
+    bedrock_client._clients.pop("test-service", None)
+
+    first = bedrock_client.get_client("test-service")
+    second = bedrock_client.get_client("test-service")
+
+    assert first is second
+    mock_session.return_value.client.assert_called_once_with("test-service", config=bedrock_client.CLIENT_CONFIG)
+
+
+def test_submit_returns_future():
+    future = bedrock_client.submit(lambda a, b: a + b, 2, 3)
+    assert future.result(timeout=5) == 5
+
+
+def test_run_async_awaits_result():
+    result = asyncio.run(bedrock_client.run_async(lambda text: text.upper(), "vpc"))
+    assert result == "VPC"
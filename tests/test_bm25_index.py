@@ -0,0 +1,81 @@
+# tests/test_bm25_index.py
+
+import json
+
+from chatbot.rag.bm25_index import BM25Index
+
+DOCS = {
+    "vpc": "VPC peering connects two virtual private clouds",
+    "iam": "IAM roles grant temporary credentials to services",
+    "s3": "S3 buckets store objects; bucket policies control access",
+    "lambda": "Lambda functions run code without servers, triggered by S3 events",
+}
+
+
+def _index(path=None):
+    index = BM25Index(path)
+    for key, text in DOCS.items():
+        index.add(key, text, {"source": key})
+    return index
+
+
+def test_search_ranks_by_bm25():
+    results = _index().search("S3 bucket policies", top_k=3)
+
+    assert [doc["key"] for doc, _ in results] == ["s3", "lambda"]
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_delete_and_replace_are_incremental():
+    index = _index()
+    assert index.delete("s3")
+    assert [doc["key"] for doc, _ in index.search("S3", top_k=5)] == ["lambda"]
+
+    index.add("lambda", "Lambda functions scale automatically")
+    assert index.search("S3", top_k=5) == []
+    assert len(index) == 3
+
+
+def test_persistence_round_trip_with_compaction(tmp_path):
+    index = _index(str(tmp_path))
+    index.delete("iam")
+    index.delete("vpc")
+    index.save()
+
+    reloaded = BM25Index(str(tmp_path))
+    assert len(reloaded) == 2
+    assert reloaded.search("IAM credentials", top_k=3) == []
+    assert reloaded.search("servers", top_k=1)[0][0]["metadata"] == {"source": "lambda"}
+
+    reloaded.add("iam", DOCS["iam"])
+    assert reloaded.search("IAM credentials", top_k=1)[0][0]["key"] == "iam"
+
+
+def test_build_from_chunk_store_is_idempotent(tmp_path):
+    store = tmp_path / "chunk_index.json"
+    store.write_text(json.dumps([{"content": text, "metadata": {"k": k}} for k, text in DOCS.items()]))
+
+    index = BM25Index(str(tmp_path / "bm25"))
+    assert index.build_from_chunk_store(str(store)) == 4
+    assert BM25Index(str(tmp_path / "bm25")).build_from_chunk_store(str(store)) == 0
+
+
+def test_reloads_when_corpus_version_changes(tmp_path):
+    from unittest.mock import patch
+    from chatbot.rag import bm25_index as bm
+
+    with patch.object(bm, "get_corpus_version", lambda: 1):
+        serving = _index(str(tmp_path))
+        serving.save()
+        assert serving.search("IAM credentials", top_k=1)[0][0]["key"] == "iam"
+
+        writer = BM25Index(str(tmp_path))
+        writer.delete("iam")
+        writer.add("ec2", "EC2 instances are virtual servers")
+        writer.save()
+        assert serving.search("EC2", top_k=1) == []
+
+    with patch.object(bm, "get_corpus_version", lambda: 2):
+        assert serving.search("IAM credentials", top_k=1) == []
+        assert serving.search("EC2", top_k=1)[0][0]["key"] == "ec2"
+        assert len(serving) == 4
@@ -0,0 +1,111 @@
+# tests/test_context_builder.py
+
+from unittest.mock import patch
+
+from chatbot.utils import context_builder as cb
+from chatbot.utils.context_builder import ContextBuilder, budget_for_model
+
+
+def _conversation(turns: int, words: int = 50) -> list[dict]:
+    messages = []
+    for i in range(turns):
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append({"role": role, "content": f"Turn {i}. " + "word " * words})
+    messages.append({"role": "user", "content": "What should we do next?"})
+    return messages
+
+
+def test_budget_matches_longest_prefix():
+    with patch.dict(cb.CONTEXT_TOKEN_BUDGETS, {"anthropic.claude-3": 100, "anthropic.claude-3-haiku": 200}, clear=True):
+        assert budget_for_model("anthropic.claude-3-haiku-20240307-v1:0") == 200
+        assert budget_for_model("anthropic.claude-3-sonnet-20240229-v1:0") == 100
+        assert budget_for_model("amazon.titan") == cb.DEFAULT_CONTEXT_TOKEN_BUDGET
+
+
+def test_short_conversation_is_sent_verbatim():
+    builder = ContextBuilder()
+    messages = _conversation(4, words=5)
+
+    built = builder.build("c1", messages)
+
+    assert built["history"] == messages[:-1]
+    assert built["context"] == ""
+
+
+def test_history_respects_token_budget_and_max_history():
+    builder = ContextBuilder()
+    messages = _conversation(60, words=100)
+
+    with patch.object(cb, "budget_for_model", return_value=2000):
+        built = builder.build("c1", messages)
+
+    assert built["input_tokens"] <= 2000
+    assert len(built["history"]) <= cb.MAX_HISTORY
+    assert built["history"][0]["role"] == "user"
+    assert "Summary of the earlier conversation" in built["context"]
+
+
+def test_summary_only_folds_new_turns():
+    calls = []
+
+    def summarize(summary, turns, max_tokens):
+        calls.append(len(turns))
+        return summary + "".join(t["content"][:6] for t in turns)
+
+    builder = ContextBuilder(summarize_fn=summarize)
+    messages = _conversation(40, words=20)
+    builder.build("c1", messages)
+
+    messages = messages + [{"role": "assistant", "content": "ok"}, {"role": "user", "content": "more"}]
+    builder.build("c1", messages)
+
+    assert sum(calls) <= len(messages)
+    assert calls[-1] <= 2
+
+
+def test_rag_context_is_truncated_to_its_share():
+    builder = ContextBuilder()
+    with patch.object(cb, "budget_for_model", return_value=1000):
+        built = builder.build("c1", _conversation(0), rag_context="chunk " * 5000)
+
+    assert built["input_tokens"] <= 1000
+    assert "Here is helpful context" in built["context"]
+
+
+def test_configured_rag_budget_caps_rag_context():
+    builder = ContextBuilder()
+    with patch.object(cb, "budget_for_model", return_value=1000), \
+         patch.object(cb, "get_config_value", lambda key, default=None: 100 if key == "rag_context_token_budget" else default):
+        built = builder.build("c1", _conversation(0), rag_context="chunk " * 5000)
+
+    assert built["context"].count("chunk") <= 100
+
+
+def test_edited_history_resets_cached_state():
+    builder = ContextBuilder()
+    messages = _conversation(30, words=100)
+    with patch.object(cb, "budget_for_model", return_value=1500):
+        builder.build("c1", messages)
+        built = builder.build("c1", _conversation(2, words=5))
+
+    assert built["context"] == ""
+    assert len(built["history"]) == 2
+
+
+def test_edit_to_an_early_summarized_turn_is_detected():
+    calls = []
+
+    def summarize(summary, turns, max_tokens):
+        calls.append([t["content"][:8] for t in turns])
+        return summary + "".join(t["content"][:8] for t in turns)
+
+    builder = ContextBuilder(summarize_fn=summarize)
+    messages = _conversation(40, words=20)
+    with patch.object(cb, "budget_for_model", return_value=1500):
+        builder.build("c1", messages)
+        edited = [dict(m) for m in messages]
+        edited[2]["content"] = "Edited. " + "word " * 20
+        built = builder.build("c1", edited)
+
+    assert "Edited. " in calls[-1]
+    assert "Edited. " in built["context"]
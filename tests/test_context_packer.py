@@ -0,0 +1,48 @@
+# tests/test_context_packer.py
+
+import numpy as np
+
+from chatbot.rag.context_packer import pack_context, split_sentences
+
+
+def _embed(texts):
+    # 1-d "embedding": relevant sentences mention "lambda"
+    return np.asarray([[1.0, 0.1] if "lambda" in t.lower() else [0.1, 1.0] for t in texts], dtype=np.float32)
+
+
+def _chunk(content, source):
+    return {"content": content, "metadata": {"title": source.upper(), "page": 1, "source": source}}
+
+
+FILLER = " ".join(f"Filler sentence number {i} about unrelated topics." for i in range(20))
+
+
+def test_small_context_is_returned_verbatim():
+    packed = pack_context("lambda", [_chunk("Short text.", "a")], token_budget=500, embed_fn=_embed)
+    assert packed == "[A] (Page 1) from a:\nShort text."
+
+
+def test_packs_relevant_sentences_and_keeps_every_source():
+    chunks = [
+        _chunk(f"{FILLER} Lambda timeouts are configured per function. {FILLER}", "a"),
+        _chunk(f"{FILLER} Use provisioned concurrency for Lambda cold starts.", "b"),
+    ]
+    packed = pack_context("lambda timeout", chunks, token_budget=120, embed_fn=_embed)
+
+    assert "[A] (Page 1) from a:" in packed and "[B] (Page 1) from b:" in packed
+    assert "Lambda timeouts are configured per function." in packed
+    assert "Use provisioned concurrency for Lambda cold starts." in packed
+    assert len(packed) // 4 <= 120
+
+
+def test_embedding_failure_uses_term_overlap():
+    def _boom(texts):
+        raise RuntimeError("down")
+
+    chunks = [_chunk(f"{FILLER} Lambda timeouts are configured per function.", "a")]
+    packed = pack_context("lambda timeouts", chunks, token_budget=40, embed_fn=_boom)
+    assert "Lambda timeouts are configured per function." in packed
+
+
+def test_split_sentences():
+    assert split_sentences("One. Two!\n\nThree?") == ["One.", "Two!", "Three?"]
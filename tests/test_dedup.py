@@ -0,0 +1,43 @@
+# tests/test_dedup.py
+
+from chatbot.rag.dedup import collapse_near_duplicates
+
+BASE = " ".join(f"word{i}" for i in range(120))
+
+
+def _chunk(content, score, source, backend):
+    return {"content": content, "score": score, "metadata": {"source": source}, "backends": [backend]}
+
+
+def test_near_duplicates_collapse_to_best_scored():
+    near = BASE.replace("word60", "changed")
+    chunks = [
+        _chunk(near, 0.4, "doc-b", "opensearch"),
+        _chunk(BASE, 0.9, "doc-a", "bedrock_kb"),
+        _chunk("completely unrelated text about billing and invoices " * 5, 0.7, "doc-c", "opensearch"),
+    ]
+
+    result = collapse_near_duplicates(chunks)
+
+    assert [c["metadata"]["source"] for c in result] == ["doc-a", "doc-c"]
+    best = result[0]
+    assert best["score"] == 0.9
+    assert best["duplicates_collapsed"] == 1
+    assert best["metadata"]["duplicate_sources"] == ["doc-b"]
+    assert best["backends"] == ["bedrock_kb", "opensearch"]
+
+
+def test_contained_window_is_collapsed():
+    window = " ".join(f"word{i}" for i in range(20, 100))
+    result = collapse_near_duplicates([_chunk(BASE, 0.5, "doc-a", "kb"), _chunk(window, 0.8, "doc-a", "kb")])
+
+    assert len(result) == 1
+    assert result[0]["content"] == window
+
+
+def test_distinct_chunks_are_kept_and_inputs_untouched():
+    chunks = [_chunk(BASE, 0.9, "a", "kb"), _chunk(" ".join(f"term{i}" for i in range(120)), 0.8, "b", "kb")]
+    result = collapse_near_duplicates(chunks)
+
+    assert len(result) == 2
+    assert "duplicate_sources" not in chunks[0]["metadata"]
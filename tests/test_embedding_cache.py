@@ -0,0 +1,78 @@
+# tests/test_embedding_cache.py
+
+import numpy as np
+from unittest.mock import MagicMock
+
+from chatbot.utils.embedding_cache import EmbeddingCache
+
+
+def _embed_fn(dim: int = 4):
+    return MagicMock(side_effect=lambda texts: np.asarray([[len(t)] * dim for t in texts], dtype=np.float32))
+
+
+def test_misses_are_embedded_in_one_batch_and_deduplicated(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    embed = _embed_fn()
+
+    matrix = cache.embed("bedrock", "titan", ["a", "bb", "a"], embed)
+
+    embed.assert_called_once_with(["a", "bb"])
+    assert matrix.shape == (3, 4)
+    assert np.array_equal(matrix[0], matrix[2])
+
+
+def test_memory_hit_skips_embedding(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    embed = _embed_fn()
+    cache.embed("bedrock", "titan", ["a"], embed)
+    cache.embed("bedrock", "titan", ["a"], embed)
+
+    assert embed.call_count == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    first = EmbeddingCache(str(tmp_path))
+    first.embed("bedrock", "titan", [f"text {i}" for i in range(1500)], _embed_fn())
+
+    second = EmbeddingCache(str(tmp_path))
+    embed = _embed_fn()
+    matrix = second.embed("bedrock", "titan", ["text 7", "text 1499"], embed)
+
+    embed.assert_not_called()
+    assert matrix[1][0] == len("text 1499")
+    assert second.stats()["disk_hits"] == 2
+
+
+def test_models_are_isolated(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.embed("bedrock", "titan", ["a"], _embed_fn(4))
+    embed = _embed_fn(8)
+    matrix = cache.embed("huggingface", "minilm", ["a"], embed)
+
+    embed.assert_called_once()
+    assert matrix.shape == (1, 8)
+
+
+def test_memory_tier_is_bounded(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_memory_entries=2, persist=False)
+    cache.embed("bedrock", "titan", ["a", "b", "c"], _embed_fn())
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_stores_shared_by_two_processes_do_not_overwrite_rows(tmp_path):
+    # Two caches on one directory stand in for the app and the ingestion CLI
+    def embed(texts):
+        return np.asarray([[float(t.split()[1])] * 4 for t in texts], dtype=np.float32)
+
+    app, ingest = EmbeddingCache(str(tmp_path)), EmbeddingCache(str(tmp_path))
+    app.embed("bedrock", "titan", ["text 1", "text 2"], embed)
+    ingest.embed("bedrock", "titan", ["text 3", "text 4"], embed)
+    app.embed("bedrock", "titan", ["text 5"], embed)
+    for cache in (app, ingest):
+        cache.clear_memory()
+
+    never = MagicMock(side_effect=AssertionError("should be a disk hit"))
+    for cache in (app, ingest, EmbeddingCache(str(tmp_path))):
+        matrix = cache.embed("bedrock", "titan", [f"text {i}" for i in range(1, 6)], never)
+        assert matrix[:, 0].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
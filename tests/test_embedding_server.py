@@ -0,0 +1,134 @@
+# tests/test_embedding_server.py
+
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from chatbot.utils import embeddings
+from chatbot.utils.embedding_server import EmbeddingServer, EmbeddingServerUnavailable
+
+
+def fake_encoder_factory(dim=4):
+    """Picklable factory: also used by the worker process."""
+    return lambda texts: np.asarray([[len(t)] * dim for t in texts], dtype=np.float32)
+
+
+def _concurrent_requests(server, n=24):
+    results = [None] * n
+    barrier = threading.Barrier(n)
+
+    def _worker(i):
+        barrier.wait()
+        results[i] = server.embed(["x" * (i + 1)], timeout=30)
+
+    threads = [threading.Thread(target=_worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+@pytest.mark.parametrize("mode", ["thread", "process"])
+def test_concurrent_requests_are_micro_batched(mode):
+    server = EmbeddingServer(factory=fake_encoder_factory, mode=mode, max_batch=64, max_wait_ms=50)
+    try:
+        results = _concurrent_requests(server)
+    finally:
+        server.stop()
+
+    assert all(r.shape == (1, 4) and r[0, 0] == i + 1 for i, r in enumerate(results))
+    stats = server.stats()
+    assert stats["requests"] == 24
+    assert stats["batches"] < 24
+
+
+def test_max_batch_bounds_batch_size():
+    calls = []
+
+    def factory():
+        def encode(texts):
+            calls.append(len(texts))
+            return np.zeros((len(texts), 2), dtype=np.float32)
+        return encode
+
+    server = EmbeddingServer(factory=factory, mode="thread", max_batch=4, max_wait_ms=50)
+    try:
+        _concurrent_requests(server, n=12)
+    finally:
+        server.stop()
+    assert max(calls) <= 4 and sum(calls) == 12
+
+
+def test_encoder_failure_is_raised_to_every_caller():
+    def factory():
+        def encode(texts):
+            raise RuntimeError("model down")
+        return encode
+
+    server = EmbeddingServer(factory=factory, mode="thread", max_wait_ms=1)
+    try:
+        with pytest.raises(RuntimeError, match="model down"):
+            server.embed(["a"], timeout=5)
+    finally:
+        server.stop()
+
+
+def test_warm_up_loads_once_and_reports_timings():
+    loads = []
+
+    def factory():
+        loads.append(1)
+        return lambda texts: np.zeros((len(texts), 2), dtype=np.float32)
+
+    server = EmbeddingServer(factory=factory, mode="thread", max_wait_ms=1)
+    try:
+        assert server.warm_up() is server.warm_up()
+        server.warm_up().result(timeout=5)
+        server.embed(["a", "b"], timeout=5)
+    finally:
+        server.stop()
+
+    stats = server.stats()
+    assert loads == [1]
+    assert stats["load_seconds"] is not None
+    assert stats["batch_ms_p50"] is not None and stats["batch_ms_p95"] >= stats["batch_ms_p50"]
+
+
+def test_repeated_load_failures_back_off_instead_of_retrying_every_batch():
+    loads = []
+
+    def factory():
+        loads.append(1)
+        raise OSError("no model files")
+
+    server = EmbeddingServer(factory=factory, mode="thread", max_wait_ms=1, max_start_failures=2, start_cooldown=60)
+    try:
+        for _ in range(4):
+            with pytest.raises(EmbeddingServerUnavailable):
+                server.embed(["a"], timeout=5)
+    finally:
+        server.stop()
+
+    assert len(loads) == 2
+    assert server.stats()["start_failures"] == 2
+
+
+def test_in_process_fallback_only_when_the_server_never_loaded_the_model():
+    server = MagicMock()
+    encoder = MagicMock(return_value=np.zeros((1, 2), dtype=np.float32))
+
+    with patch.object(embeddings, "embedding_server", server), \
+         patch.object(embeddings, "_hf_encoder", None), \
+         patch.object(embeddings, "_get_hf_encoder", return_value=encoder) as load:
+        server.embed.side_effect = FutureTimeout()
+        with pytest.raises(FutureTimeout):
+            embeddings._embed_texts_huggingface(["a"])
+        load.assert_not_called()  # the worker still holds the model; no second copy
+
+        server.embed.side_effect = EmbeddingServerUnavailable("down")
+        assert embeddings._embed_texts_huggingface(["a"]).shape == (1, 2)
+        load.assert_called_once()
@@ -0,0 +1,113 @@
+# tests/test_filters.py
+
+import numpy as np
+from unittest.mock import patch
+
+from chatbot.utils.filters import filter_chunks_by_metadata, to_bedrock_kb_filter, to_opensearch_filter
+from chatbot.rag.metadata_index import MetadataIndex
+from chatbot.rag.bm25_index import BM25Index
+from chatbot.rag.local_index import LocalVectorIndex
+from chatbot.rag import retrieval_layer
+
+
+def test_post_filter_supports_any_of_lists():
+    chunks = [{"metadata": {"source": s}} for s in ("wiki", "jira", "sharepoint")]
+    assert len(filter_chunks_by_metadata(chunks, {"source": ["wiki", "jira"]})) == 2
+    assert filter_chunks_by_metadata(chunks, None) == chunks
+
+
+def test_bedrock_kb_filter_translation():
+    assert to_bedrock_kb_filter({"source": "wiki"}) == {"equals": {"key": "source", "value": "wiki"}}
+    assert to_bedrock_kb_filter({"source": "wiki", "author": ["a", "b"]}) == {"andAll": [
+        {"equals": {"key": "source", "value": "wiki"}},
+        {"in": {"key": "author", "value": ["a", "b"]}},
+    ]}
+    assert to_bedrock_kb_filter({}) is None
+
+
+def test_opensearch_filter_translation():
+    assert to_opensearch_filter({"source": "wiki", "author": ["a"]}) == [
+        {"term": {"metadata.source": "wiki"}},
+        {"terms": {"metadata.author": ["a"]}},
+    ]
+
+
+def test_metadata_index_resolves_intersections():
+    index = MetadataIndex()
+    index.add(0, {"source": "wiki", "author": "a"})
+    index.add(1, {"source": "wiki", "author": "b"})
+    index.add(2, {"source": "jira", "author": "a"})
+
+    assert index.resolve({"source": "wiki", "author": "a"}).tolist() == [0]
+    assert index.resolve({"author": ["a", "b"]}).tolist() == [0, 1, 2]
+    assert index.resolve({"source": "none"}).tolist() == []
+    assert index.resolve({"team": "x"}) is None
+
+
+def test_bm25_filter_is_applied_before_top_k():
+    index = BM25Index()
+    for i in range(20):
+        index.add(f"d{i}", "network network network" if i < 19 else "network", {"source": "wiki" if i == 19 else "jira"})
+
+    results = index.search("network", top_k=1, metadata_filter={"source": "wiki"})
+    assert [doc["key"] for doc, _ in results] == ["d19"]
+
+
+def test_local_index_filter_returns_matches_outside_probed_lists(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((40, 8)).astype(np.float32)
+    chunks = [{"content": str(i), "metadata": {"source": "wiki" if i % 10 == 0 else "jira", "team": i % 2}} for i in range(40)]
+    index = LocalVectorIndex(str(tmp_path))
+    index.add(chunks, vectors)
+
+    results = index.search(vectors[1], top_k=3, metadata_filter={"source": "wiki"})
+    assert len(results) == 3
+    assert all(c["metadata"]["source"] == "wiki" for c, _ in results)
+
+    unindexed = index.search(vectors[1], top_k=2, metadata_filter={"team": 1})
+    assert unindexed[0][0]["content"] == "1"
+
+
+def test_bedrock_kb_retrieve_receives_pushed_down_filter():
+    with patch.object(retrieval_layer.bedrock_agent, "retrieve", return_value={"retrievalResults": []}) as retrieve:
+        list(retrieval_layer.query_bedrock_knowledge_base("q", 5, metadata_filter={"source": "wiki"}))
+
+    config = retrieve.call_args.kwargs["retrievalConfiguration"]["vectorSearchConfiguration"]
+    assert config["filter"] == {"equals": {"key": "source", "value": "wiki"}}
+    assert config["numberOfResults"] == 5
+
+
+def _hits():
+    return [
+        {"_source": {"content": f"doc {i}", "metadata": {"team": "a" if i % 3 == 0 else "b"}}, "_score": 10.0 - i}
+        for i in range(12)
+    ]
+
+
+def test_opensearch_filter_falls_back_to_post_filter_when_client_lacks_filters():
+    calls = []
+
+    def search(query, k):  # client without a `filters` parameter
+        calls.append(k)
+        return _hits()[:k]
+
+    with patch.object(retrieval_layer, "search_opensearch", search), \
+         patch.object(retrieval_layer, "OPENSEARCH_FILTER_PUSHDOWN", retrieval_layer._accepts_filters(search)):
+        chunks = retrieval_layer.query_opensearch("q", 2, metadata_filter={"team": "a"})
+
+    assert calls == [2 * retrieval_layer.STREAM_OVERFETCH]
+    assert [c["content"] for c in chunks] == ["doc 0", "doc 3"]
+
+
+def test_opensearch_filter_is_pushed_down_when_client_accepts_it():
+    seen = {}
+
+    def search(query, k, filters=None):
+        seen.update(k=k, filters=filters)
+        return _hits()[:1]
+
+    with patch.object(retrieval_layer, "search_opensearch", search), \
+         patch.object(retrieval_layer, "OPENSEARCH_FILTER_PUSHDOWN", retrieval_layer._accepts_filters(search)):
+        retrieval_layer.query_opensearch("q", 2, metadata_filter={"team": "a"})
+
+    assert seen == {"k": 2, "filters": [{"term": {"metadata.team": "a"}}]}
@@ -0,0 +1,83 @@
+# tests/test_fusion.py
+
+from unittest.mock import MagicMock
+
+from chatbot.rag.fusion import fuse_results, rerank_ambiguous, calibrate_confidence
+
+
+def _chunk(content, score, source):
+    return {"content": content, "metadata": {"source": source}, "score": score, "source": source}
+
+
+def test_weighted_fusion_uses_native_scores_and_merges_duplicates():
+    fused = fuse_results({
+        "bedrock_kb": [_chunk("alpha", 0.9, "kb"), _chunk("shared", 0.5, "kb")],
+        "opensearch": [_chunk("shared", 12.0, "os"), _chunk("beta", 6.0, "os")],
+    }, method="weighted")
+
+    by_content = {c["content"]: c for c in fused}
+    assert len(fused) == 3
+    assert by_content["shared"]["backends"] == ["bedrock_kb", "opensearch"]
+    assert by_content["shared"]["score"] == 0.75
+    assert by_content["beta"]["score"] == 0.5
+    assert by_content["alpha"]["native_score"] == 0.9
+    assert fused[0]["content"] == "alpha"
+
+
+def test_rrf_scores_top_rank_as_one():
+    fused = fuse_results({
+        "bedrock_kb": [_chunk("a", 0.2, "kb"), _chunk("b", 0.1, "kb")],
+        "opensearch": [_chunk("a", 3.0, "os")],
+    }, method="rrf")
+
+    assert fused[0]["content"] == "a"
+    assert fused[0]["score"] == 1.0
+    assert fused[1]["score"] < 1.0
+
+
+def test_rerank_skipped_when_cutoff_is_clear():
+    fused = [{"content": str(i), "score": s} for i, s in enumerate([0.95, 0.9, 0.3, 0.1])]
+    rerank = MagicMock()
+
+    result = rerank_ambiguous("q", fused, top_k=2, rerank_fn=rerank, margin=0.1)
+
+    rerank.assert_not_called()
+    assert [c["content"] for c in result] == ["0", "1"]
+
+
+def test_rerank_only_touches_ambiguous_slice():
+    fused = [{"content": str(i), "score": s} for i, s in enumerate([0.99, 0.62, 0.6, 0.58, 0.1])]
+
+    def rerank(query, chunks):
+        assert [c["content"] for c in chunks] == ["1", "2", "3"]
+        ordered = list(reversed(chunks))
+        for rank, c in enumerate(ordered):
+            c["score"] = 1.0 - rank * 0.1
+        return ordered
+
+    result = rerank_ambiguous("q", fused, top_k=2, rerank_fn=rerank, margin=0.05)
+
+    assert [c["content"] for c in result] == ["0", "3"]
+    assert result[1]["rerank_score"] == 1.0
+    assert result[1]["score"] == 0.58
+
+
+def test_keyword_only_hits_get_confidence_from_the_reranker_not_normalization():
+    fused = fuse_results({
+        "bedrock_kb": [_chunk("kb hit", 0.8, "kb")],
+        "bm25": [_chunk("weak keyword hit", 2.3, "bm25")],
+    })
+    weak = next(c for c in fused if c["content"] == "weak keyword hit")
+    assert weak["score"] == 1.0          # max-normalized: always 1.0 for the top keyword hit
+    assert weak["confidence"] is None    # ...so it is not a confidence signal
+
+    relevance = [0.12 if c["content"] == "weak keyword hit" else 0.99 for c in fused]
+    calibrate_confidence(fused, relevance)
+    by_content = {c["content"]: c["confidence"] for c in fused}
+    assert by_content == {"kb hit": 0.8, "weak keyword hit": 0.12}
+
+
+def test_failed_confidence_scoring_fails_closed():
+    chunks = [{"content": "x", "score": 1.0, "confidence": None}]
+    calibrate_confidence(chunks, None)
+    assert chunks[0]["confidence"] == 0.0
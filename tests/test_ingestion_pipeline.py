@@ -0,0 +1,65 @@
+# tests/test_ingestion_pipeline.py
+
+import json
+from unittest.mock import patch
+
+from chatbot.ingestion.chunker import chunk_text
+from chatbot.ingestion import pipeline
+
+
+def test_chunk_text_windows_overlap():
+    words = [f"w{i:03d}" for i in range(400)]
+    chunks = chunk_text(" ".join(words), chunk_size=100, overlap=20)
+
+    assert len(chunks) > 1
+    assert all(len(c) <= 100 * 4 for c in chunks)
+    first, second = chunks[0].split(), chunks[1].split()
+    assert second[0] in first and second[0] != first[0]
+    assert chunks[-1].split()[-1] == words[-1]
+
+
+def test_chunk_text_keeps_paragraph_breaks():
+    chunks = chunk_text("First paragraph here.\n\nSecond  paragraph\nwraps.", chunk_size=100, overlap=10)
+
+    assert chunks == ["First paragraph here.\n\nSecond paragraph wraps."]
+
+
+def _ingest(tmp_path, workers=1):
+    with patch.object(pipeline, "bump_corpus_version") as bump:
+        stats = pipeline.ingest_directory(
+            str(tmp_path / "docs"),
+            chunk_store_path=str(tmp_path / "chunks.json"),
+            manifest_path=str(tmp_path / "manifest.json"),
+            workers=workers,
+            update_indexes=False,
+        )
+    return stats, bump.call_count
+
+
+def _store(tmp_path):
+    return json.loads((tmp_path / "chunks.json").read_text())
+
+
+def test_incremental_ingestion_skips_unchanged_documents(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("Alpha   document\n\ntext. " * 50)
+    (docs / "b.md").write_text("Beta document text. " * 50)
+    (docs / "ignored.bin").write_text("binary")
+
+    stats, bumps = _ingest(tmp_path, workers=2)
+    assert stats["ingested"] == 2 and bumps == 1
+    sources = {c["metadata"]["source"] for c in _store(tmp_path)}
+    assert sources == {"a.txt", "b.md"}
+    assert all("  " not in c["content"] for c in _store(tmp_path))  # cleaned at ingest
+
+    stats, bumps = _ingest(tmp_path)
+    assert stats["skipped"] == 2 and stats["ingested"] == 0 and bumps == 0
+
+    (docs / "b.md").write_text("Beta rewritten. " * 10)
+    (docs / "a.txt").unlink()
+    stats, bumps = _ingest(tmp_path)
+    assert stats["ingested"] == 1 and stats["deleted"] == 1 and bumps == 1
+    store = _store(tmp_path)
+    assert {c["metadata"]["source"] for c in store} == {"b.md"}
+    assert store[0]["content"].startswith("Beta rewritten.")
@@ -0,0 +1,146 @@
+# tests/test_local_index.py
+
+import json
+
+import numpy as np
+from unittest.mock import patch
+
+from chatbot.rag import local_index as li
+from chatbot.rag.local_index import LocalVectorIndex
+
+
+def _data(n, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    chunks = [{"content": f"chunk {i}", "metadata": {"i": i}} for i in range(n)]
+    return chunks, vectors
+
+
+def test_exact_search_before_training(tmp_path):
+    index = LocalVectorIndex(str(tmp_path))
+    chunks, vectors = _data(50)
+    index.add(chunks, vectors)
+
+    results = index.search(vectors[7], top_k=3)
+
+    assert results[0][0]["content"] == "chunk 7"
+    assert abs(results[0][1] - 1.0) < 1e-5
+    assert len(results) == 3
+
+
+def test_ivf_recall_improves_with_nprobe(tmp_path):
+    index = LocalVectorIndex(str(tmp_path))
+    chunks, vectors = _data(3000, dim=32)
+    with patch.object(li, "MIN_TRAIN_SIZE", 1000):
+        index.add(chunks, vectors)
+    assert index.meta["nlist"] > 1
+
+    queries = vectors[:50] + 0.05 * np.random.default_rng(1).standard_normal((50, 32)).astype(np.float32)
+    def recall(nprobe):
+        return np.mean([index.search(q, 1, nprobe=nprobe)[0][0]["metadata"]["i"] == i for i, q in enumerate(queries)])
+
+    assert recall(index.meta["nlist"]) == 1.0
+    assert recall(1) <= recall(8)
+
+
+def test_reload_is_lazy_and_keeps_incremental_inserts(tmp_path):
+    with patch.object(li, "MIN_TRAIN_SIZE", 100):
+        first = LocalVectorIndex(str(tmp_path))
+        chunks, vectors = _data(300)
+        first.add(chunks[:200], vectors[:200])
+        first.add(chunks[200:], vectors[200:])
+
+    second = LocalVectorIndex(str(tmp_path))
+    assert second._loaded is False
+    assert len(second) == 300
+    assert second.search(vectors[250], top_k=1, nprobe=second.meta["nlist"])[0][0]["content"] == "chunk 250"
+
+
+def test_ivf_retrains_as_the_index_grows(tmp_path):
+    index = LocalVectorIndex(str(tmp_path))
+    chunks, vectors = _data(2000)
+    with patch.object(li, "MIN_TRAIN_SIZE", 100):
+        index.add(chunks[:100], vectors[:100])
+        assert index.meta["nlist"] == 10
+        for i in range(100, 2000, 100):
+            index.add(chunks[i:i + 100], vectors[i:i + 100])
+
+    # Trained at 100 → 10 lists, retrained past 4·10² and 4·20² rows
+    assert index.meta["nlist"] >= int(np.sqrt(2000)) // 2
+    assert len(index.search(vectors[1234], top_k=1, nprobe=index.meta["nlist"])) == 1
+
+
+def test_build_from_chunk_store_only_embeds_new_chunks(tmp_path):
+    chunks, vectors = _data(20)
+    store = tmp_path / "chunk_index.json"
+    store.write_text(json.dumps(chunks))
+    lookup = {c["content"]: v for c, v in zip(chunks, vectors)}
+    embed = lambda texts: np.stack([lookup[t] for t in texts])
+
+    index = LocalVectorIndex(str(tmp_path / "index"))
+    assert index.build_from_chunk_store(embed, path=str(store)) == 20
+    assert index.build_from_chunk_store(embed, path=str(store)) == 0
+
+
+def test_reloads_when_corpus_version_changes(tmp_path):
+    chunks, vectors = _data(60)
+    with patch.object(li, "get_corpus_version", lambda: 1):
+        serving = LocalVectorIndex(str(tmp_path))
+        serving.add(chunks[:20], vectors[:20])
+        assert len(serving) == 20
+
+        # The ingestion CLI rebuilds the index in its own process
+        writer = LocalVectorIndex(str(tmp_path))
+        writer.reset()
+        writer.add(chunks[20:], vectors[20:])
+        assert len(serving) == 20
+
+    with patch.object(li, "get_corpus_version", lambda: 2):
+        assert len(serving) == 40
+        assert serving.search(vectors[50], top_k=1)[0][0]["content"] == "chunk 50"
+
+
+def test_removed_chunks_are_tombstoned_and_only_new_chunks_embedded(tmp_path):
+    chunks, vectors = _data(40)
+    for c in chunks:
+        c["id"] = f"doc{c['metadata']['i'] // 10}#{c['metadata']['i'] % 10}"
+    lookup = {c["content"]: v for c, v in zip(chunks, vectors)}
+    embedded = []
+    def embed(texts):
+        embedded.extend(texts)
+        return np.stack([lookup[t] for t in texts])
+
+    store = tmp_path / "chunk_index.json"
+    store.write_text(json.dumps(chunks[:30]))
+    index = LocalVectorIndex(str(tmp_path / "index"))
+    index.build_from_chunk_store(embed, path=str(store))
+
+    # doc1 is edited: its old chunks leave the store and new ones are appended
+    assert index.remove(c["id"] for c in chunks[10:20]) == 10
+    store.write_text(json.dumps(chunks[:10] + chunks[20:40]))
+    embedded.clear()
+    assert index.build_from_chunk_store(embed, path=str(store)) == 10
+    assert embedded == [c["content"] for c in chunks[30:]]
+
+    assert len(index) == 30
+    assert index.search(vectors[15], top_k=40)[0][0]["content"] != "chunk 15"
+    assert all(chunk["metadata"]["i"] not in range(10, 20) for chunk, _ in index.search(vectors[15], top_k=40))
+
+    reloaded = LocalVectorIndex(str(tmp_path / "index"))
+    assert len(reloaded) == 30
+    assert reloaded.build_from_chunk_store(embed, path=str(store)) == 0
+
+
+def test_compaction_drops_tombstones_without_re_embedding(tmp_path):
+    chunks, vectors = _data(40)
+    index = LocalVectorIndex(str(tmp_path / "index"))
+    index.add(chunks, vectors)
+    index.remove(li.chunk_key(c) for c in chunks[:20])
+    assert index.needs_compaction()
+
+    index.compact()
+
+    assert not index.needs_compaction()
+    assert index.count == 20 and len(index) == 20
+    assert index.search(vectors[25], top_k=1)[0][0]["content"] == "chunk 25"
+    assert not (tmp_path / "index.compact").exists() and not (tmp_path / "index.old").exists()
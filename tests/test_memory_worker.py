@@ -0,0 +1,110 @@
+# tests/test_memory_worker.py
+
+import json
+import threading
+
+from chatbot.memory.worker import MemoryWorker
+
+
+def _messages(n):
+    return [{"role": "user", "content": f"turn {i}"} for i in range(n)]
+
+
+def test_enqueue_does_not_wait_for_processing(tmp_path):
+    release, processed = threading.Event(), []
+
+    def slow_store(conversation_id, messages):
+        release.wait(5)
+        processed.append(len(messages))
+
+    worker = MemoryWorker(slow_store, persist_path=str(tmp_path / "queue.json"))
+    assert worker.enqueue("a", _messages(4))  # returns while slow_store is blocked
+    release.set()
+
+    assert worker.drain(5)
+    assert processed == [4]
+    worker.stop()
+
+
+def test_newer_snapshot_merges_into_pending_job_and_full_queue_drops_oldest(tmp_path):
+    gate, seen = threading.Event(), []
+
+    def store(conversation_id, messages):
+        gate.wait(5)
+        seen.append(messages[-1]["content"])
+
+    worker = MemoryWorker(store, persist_path=None, max_pending=2)
+    worker.enqueue("busy", _messages(1))  # occupies the worker thread
+    while not worker.stats()["in_flight"]:
+        pass
+    worker.enqueue("a", _messages(4))
+    worker.enqueue("a", _messages(6))     # merged
+    worker.enqueue("b", _messages(5))
+    worker.enqueue("c", _messages(7))     # evicts "a"
+    gate.set()
+
+    assert worker.drain(5)
+    stats = worker.stats()
+    assert (stats["merged"], stats["dropped"], stats["processed"]) == (1, 1, 3)
+    assert seen == ["turn 0", "turn 4", "turn 6"]
+    worker.stop()
+
+
+def test_drop_new_policy_refuses_when_full(tmp_path):
+    worker = MemoryWorker(lambda c, m: None, persist_path=None, max_pending=1, overflow_policy="drop_new")
+    worker.stop()  # keep jobs queued
+    worker._jobs["x"] = {"conversation_id": "x", "messages": [], "attempts": 0}
+    assert not worker.enqueue("y", _messages(4))
+    assert worker.stats()["dropped"] == 1
+
+
+def test_failed_jobs_are_retried_up_to_max_attempts(tmp_path):
+    calls = []
+
+    def flaky(conversation_id, messages):
+        calls.append(1)
+        raise RuntimeError("bedrock throttled")
+
+    worker = MemoryWorker(flaky, persist_path=None, max_attempts=3)
+    worker.enqueue("a", _messages(4))
+    assert worker.drain(5)
+    assert len(calls) == 3
+    assert worker.stats()["failed"] == 1
+    worker.stop()
+
+
+def test_pending_jobs_survive_restart(tmp_path):
+    path = tmp_path / "queue.json"
+    block = threading.Event()
+    first = MemoryWorker(lambda c, m: block.wait(5), persist_path=str(path))
+    first.enqueue("a", _messages(4))
+    first.enqueue("b", _messages(5))
+    while not first.stats()["in_flight"]:
+        pass
+    first.stop(timeout=0.1)  # "crash" with one job in flight and one queued
+
+    assert [job["conversation_id"] for job in json.loads(path.read_text())] == ["a", "b"]
+
+    processed = []
+    second = MemoryWorker(lambda c, m: processed.append(len(m)), persist_path=str(path))
+    assert second.drain(5)
+    assert processed == [4, 5]
+    assert json.loads(path.read_text()) == []
+    second.stop()
+    block.set()
+
+
+def test_jobs_are_persisted_while_a_job_is_in_flight(tmp_path):
+    path = tmp_path / "queue.json"
+    block = threading.Event()
+    worker = MemoryWorker(lambda c, m: block.wait(5), persist_path=str(path))
+    worker.enqueue("a", _messages(4))
+    while not worker.stats()["in_flight"]:
+        pass
+
+    worker.enqueue("b", _messages(5))  # worker is still inside process_fn for "a"
+
+    assert [job["conversation_id"] for job in json.loads(path.read_text())] == ["a", "b"]
+    block.set()
+    assert worker.drain(5)
+    worker.stop()
@@ -0,0 +1,53 @@
+# tests/test_mmr.py
+
+import numpy as np
+
+from chatbot.rag.mmr import embed_pool, mmr_select
+
+VECTORS = {
+    "query": [1.0, 0.0, 0.0],
+    "a": [0.95, 0.3, 0.0],
+    "a-copy": [0.94, 0.32, 0.0],
+    "b": [0.8, 0.0, 0.6],
+}
+
+
+def _embed(texts):
+    return np.asarray([VECTORS[t.split()[0]] for t in texts], dtype=np.float32)
+
+
+def _chunks():
+    return [{"content": "a"}, {"content": "a-copy"}, {"content": "b"}]
+
+
+def test_mmr_prefers_diverse_chunk_over_redundant_one():
+    picked = mmr_select("query", _chunks(), _embed, top_n=2, token_budget=100, lambda_=0.5)
+    assert [c["content"] for c in picked] == ["a", "b"]
+
+
+def test_lambda_one_is_pure_relevance():
+    picked = mmr_select("query", _chunks(), _embed, top_n=2, token_budget=100, lambda_=1.0)
+    assert [c["content"] for c in picked] == ["a", "a-copy"]
+
+
+def test_token_budget_limits_selection():
+    chunks = [{"content": "a " + "word " * 50}, {"content": "b"}]
+    picked = mmr_select("query", chunks, _embed, top_n=2, token_budget=10, lambda_=0.5)
+    assert [c["content"] for c in picked] == ["b"]
+
+
+def test_embedding_failure_falls_back_to_score_order():
+    def _boom(texts):
+        raise RuntimeError("down")
+
+    picked = mmr_select("query", _chunks(), _boom, top_n=2, token_budget=100)
+    assert [c["content"] for c in picked] == ["a", "a-copy"]
+
+
+def test_precomputed_vectors_skip_embedding():
+    def _boom(texts):
+        raise AssertionError("should not embed")
+
+    vectors = embed_pool("query", _chunks(), _embed)
+    picked = mmr_select("query", _chunks(), _boom, top_n=2, token_budget=100, lambda_=0.5, vectors=vectors)
+    assert [c["content"] for c in picked] == ["a", "b"]
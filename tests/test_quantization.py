@@ -0,0 +1,64 @@
+# tests/test_quantization.py
+
+import numpy as np
+import pytest
+
+from chatbot.utils import quantization
+from chatbot.rag.local_index import LocalVectorIndex
+
+
+def _vectors(n=200, dim=32, seed=0):
+    v = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("dtype,tolerance", [("float32", 1e-6), ("float16", 2e-3), ("int8", 2e-2)])
+def test_dot_scores_match_float32(dtype, tolerance):
+    vectors = _vectors()
+    codes, scales = quantization.encode(vectors, dtype)
+    scores = quantization.dot_scores(codes, scales, vectors[0])
+
+    assert codes.dtype == quantization.storage_dtype(dtype)
+    assert np.max(np.abs(scores - vectors @ vectors[0])) < tolerance
+
+
+def test_prefix_dot_scores_use_only_leading_dims():
+    vectors = _vectors()
+    codes, scales = quantization.encode(vectors, "int8")
+    coarse = quantization.dot_scores(codes, scales, vectors[0], dims=8)
+    assert np.allclose(coarse, quantization.decode(codes, scales)[:, :8] @ vectors[0][:8], atol=1e-5)
+
+
+def test_unknown_dtype_is_rejected():
+    with pytest.raises(ValueError):
+        quantization.storage_dtype("int4")
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_local_index_quantized_storage_round_trips(tmp_path, dtype):
+    vectors = _vectors(300)
+    chunks = [{"content": f"chunk {i}", "metadata": {}} for i in range(300)]
+    index = LocalVectorIndex(str(tmp_path), dtype=dtype, coarse_dims=8)
+    index.add(chunks, vectors)
+
+    reopened = LocalVectorIndex(str(tmp_path))  # dtype comes from meta.json
+    hits = reopened.search(vectors[42], top_k=3)
+
+    assert reopened.dtype == dtype
+    assert hits[0][0]["content"] == "chunk 42"
+    assert abs(hits[0][1] - 1.0) < 0.02
+    assert (tmp_path / f"vectors.{quantization.STORAGE_DTYPES[dtype][1]}").exists()
+
+
+def test_reset_rebuilds_in_the_configured_dtype(tmp_path):
+    vectors = _vectors(50)
+    chunks = [{"content": f"chunk {i}", "metadata": {}} for i in range(50)]
+    LocalVectorIndex(str(tmp_path), dtype="float32").add(chunks, vectors)
+
+    index = LocalVectorIndex(str(tmp_path), dtype="int8")  # local_index_dtype changed since
+    assert len(index) == 50 and index.dtype == "float32"
+    index.reset()
+    index.add(chunks, vectors)
+
+    assert index.dtype == "int8" and index.meta["dtype"] == "int8"
+    assert (tmp_path / "vectors.i8").exists() and not (tmp_path / "vectors.f32").exists()
@@ -0,0 +1,155 @@
+# tests/test_rag_router.py
+
+import time
+from unittest.mock import patch
+
+import numpy as np
+
+from chatbot.rag import context_packer, rag_router
+
+KEYWORD = rag_router.keyword_backend
+
+
+def _kb(query, top_k, metadata_filter=None):
+    time.sleep(0.2)
+    return [{"content": "kb chunk", "metadata": {"source": "kb"}, "source": "bedrock_kb"}]
+
+
+def _os(query, top_k, metadata_filter=None):
+    time.sleep(0.2)
+    return [{"content": "os chunk", "metadata": {"source": "os"}, "score": 1.0, "source": KEYWORD}]
+
+
+def _slow_os(query, top_k, metadata_filter=None):
+    # One sleep only: the straggler outlives the test and must not call a later test's patched sleep
+    time.sleep(1.0)
+    return [{"content": "os chunk", "metadata": {"source": "os"}, "score": 1.0, "source": KEYWORD}]
+
+
+def test_fan_out_runs_backends_concurrently():
+    with patch.object(rag_router, "query_bedrock_knowledge_base", _kb), \
+         patch.object(rag_router, "query_keyword", _os):
+        start = time.monotonic()
+        chunks, latencies = rag_router.fan_out_retrieval("q", top_k=3)
+        elapsed = time.monotonic() - start
+
+    assert [c["source"] for c in chunks] == ["bedrock_kb", KEYWORD]
+    assert elapsed < 0.35  # sequential would take 0.4s
+    assert set(latencies) == {"bedrock_kb", KEYWORD}
+    assert all(isinstance(v, float) for v in latencies.values())
+
+
+def test_slow_backend_is_dropped_at_deadline():
+    deadlines = {"bedrock_kb": 0.5, KEYWORD: 0.2}
+    with patch.object(rag_router, "query_bedrock_knowledge_base", _kb), \
+         patch.object(rag_router, "query_keyword", _slow_os), \
+         patch.dict(rag_router.BACKEND_DEADLINES, deadlines):
+        start = time.monotonic()
+        chunks, latencies = rag_router.fan_out_retrieval("q", top_k=3)
+        elapsed = time.monotonic() - start
+
+    assert [c["source"] for c in chunks] == ["bedrock_kb"]
+    assert latencies[KEYWORD] == "timeout"
+    assert elapsed < 0.5
+
+
+def test_backend_with_stragglers_in_flight_is_skipped():
+    exhausted = rag_router.threading.BoundedSemaphore(1)
+    exhausted.acquire()
+    with patch.object(rag_router, "query_bedrock_knowledge_base", _kb), \
+         patch.object(rag_router, "query_keyword", _os), \
+         patch.dict(rag_router._inflight, {KEYWORD: exhausted}):
+        chunks, latencies = rag_router.fan_out_retrieval("q", top_k=3)
+
+    assert [c["source"] for c in chunks] == ["bedrock_kb"]
+    assert latencies[KEYWORD] == "busy"
+
+
+def test_failed_backend_is_recorded_as_error():
+    def _boom(query, top_k, metadata_filter=None):
+        raise RuntimeError("down")
+
+    with patch.object(rag_router, "query_bedrock_knowledge_base", _boom), \
+         patch.object(rag_router, "query_keyword", _os):
+        chunks, latencies = rag_router.fan_out_retrieval("q", top_k=3)
+
+    assert [c["source"] for c in chunks] == [KEYWORD]
+    assert latencies["bedrock_kb"] == "error"
+
+
+def test_mmr_lambda_is_read_per_request():
+    chunks = [{"content": "kb chunk", "metadata": {"source": "kb"}, "source": "bedrock_kb", "score": 0.9}]
+    seen = []
+
+    def _select(query, pool, embed_fn, top_n, token_budget, lambda_, vectors=None):
+        seen.append(lambda_)
+        return pool
+
+    def _calibrate(pool, relevance):
+        for c in pool:
+            c["confidence"] = 1.0
+
+    with patch.object(rag_router, "CACHE_ENABLED", False), \
+         patch.object(rag_router, "fan_out_retrieval", lambda *a, **k: ([dict(c) for c in chunks], {"bedrock_kb": 1.0})), \
+         patch.object(rag_router, "rerank_ambiguous", lambda q, pool, n, fn: pool), \
+         patch.object(rag_router, "embed_pool", lambda *a: None), \
+         patch.object(rag_router, "calibrate_confidence", _calibrate), \
+         patch.object(rag_router, "mmr_select", _select):
+        for value in (0.3, 0.9):
+            with patch.object(rag_router, "get_config_value", lambda key, default=None: value if key == "rag_mmr_lambda" else default):
+                rag_router.hybrid_rag_router("q", top_k=1)
+
+    assert seen == [0.3, 0.9]
+
+
+def test_calibration_and_mmr_share_one_embedding_call():
+    chunks = [
+        {"content": "kb chunk", "metadata": {"source": "kb"}, "source": "bedrock_kb", "score": 0.9},
+        {"content": "good keyword chunk", "metadata": {"source": "os"}, "source": KEYWORD, "score": 9.0},
+        {"content": "weak keyword chunk", "metadata": {"source": "os"}, "source": KEYWORD, "score": 3.0},
+    ]
+    vectors = {"q": [1.0, 0.0], "kb chunk": [0.6, 0.8], "good keyword chunk": [0.9, 0.1], "weak keyword chunk": [0.1, 0.9]}
+    calls = []
+
+    def _embed(texts):
+        calls.append(len(texts))
+        return np.asarray([vectors[t] for t in texts], dtype=np.float32)
+
+    with patch.object(rag_router, "CACHE_ENABLED", False), \
+         patch.object(rag_router, "fan_out_retrieval", lambda *a, **k: ([dict(c) for c in chunks], {"bedrock_kb": 1.0})), \
+         patch.object(rag_router, "rerank_ambiguous", lambda q, pool, n, fn: pool), \
+         patch.object(rag_router, "_embed_batch", _embed):
+        result = rag_router.hybrid_rag_router("q", top_k=3)
+
+    assert calls == [4]
+    assert result[0]["metadata"]["chunks_used"] == 2
+    assert "weak keyword chunk" not in result[0]["content"]
+
+
+def test_packed_sentences_stay_under_their_own_citation():
+    def filler(topic):
+        return " ".join(f"{topic} note {i} covers unrelated detail." for i in range(20))
+
+    chunks = [
+        {"content": f"Alpha overview. {filler('Network')}", "metadata": {"title": "A", "page": 1, "source": "srcA"},
+         "source": "bedrock_kb", "score": 0.9},
+        {"content": f"{filler('Storage')} The refund policy allows returns within 30 days.",
+         "metadata": {"title": "B", "page": 2, "source": "srcB"}, "source": "bedrock_kb", "score": 0.8},
+    ]
+
+    def _embed(texts):
+        return np.asarray([[1.0, 0.1] if "refund" in t.lower() else [0.1, 1.0] for t in texts], dtype=np.float32)
+
+    with patch.object(rag_router, "CACHE_ENABLED", False), \
+         patch.object(rag_router, "CONTEXT_TOKEN_BUDGET", 120), \
+         patch.object(rag_router, "fan_out_retrieval", lambda *a, **k: ([dict(c) for c in chunks], {"bedrock_kb": 1.0})), \
+         patch.object(rag_router, "rerank_ambiguous", lambda q, pool, n, fn: pool), \
+         patch.object(rag_router, "_embed_batch", _embed), \
+         patch.object(rag_router, "mmr_select", lambda query, pool, *a, **k: pool), \
+         patch.object(context_packer, "_embed_batch", _embed):
+        content = rag_router.hybrid_rag_router("refund policy", top_k=2)[0]["content"]
+
+    blocks = content.split("\n\n")
+    assert blocks[0].startswith("[A] (Page 1) from srcA:")
+    assert blocks[1].startswith("[B] (Page 2) from srcB:")
+    assert "refund policy" in blocks[1] and "refund" not in blocks[0].lower()
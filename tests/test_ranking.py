@@ -0,0 +1,73 @@
+# tests/test_ranking.py
+
+import numpy as np
+from unittest.mock import MagicMock, patch
+
+from chatbot import ranking
+from chatbot.utils import embeddings
+
+
+def _fake_batch(vectors):
+    return MagicMock(side_effect=lambda texts: np.asarray([vectors[t] for t in texts], dtype=np.float32))
+
+
+def test_rank_uses_one_batch_call_and_sorts_by_cosine():
+    vectors = {"q": [1, 0], "a": [0, 1], "b": [1, 1], "c": [2, 0.1]}
+    embed = _fake_batch(vectors)
+    chunks = [{"content": t} for t in ("a", "b", "c")]
+
+    with patch.object(ranking, "embed_texts_huggingface", embed):
+        ranked = ranking.rank_with_huggingface("q", chunks)
+
+    assert embed.call_count == 1
+    assert [c["content"] for c in ranked] == ["c", "b", "a"]
+    assert abs(ranked[1]["score"] - 1 / np.sqrt(2)) < 1e-5
+
+
+def test_bedrock_rerank_falls_back_to_huggingface():
+    hf = _fake_batch({"q": [1, 0], "a": [1, 0]})
+    with patch.object(ranking, "embed_texts_bedrock", side_effect=RuntimeError("down")), \
+         patch.object(ranking, "embed_texts_huggingface", hf):
+        ranked = ranking.rank_with_bedrock("q", [{"content": "a"}])
+
+    assert ranked[0]["score"] > 0.99
+
+
+def test_score_matrix_matches_pairwise_cosine():
+    rng = np.random.default_rng(0)
+    query, matrix = rng.standard_normal(8), rng.standard_normal((5, 8))
+    expected = [ranking.cosine_similarity(query, row) for row in matrix]
+    assert np.allclose(ranking.score_matrix(query, matrix), expected, atol=1e-5)
+
+
+def test_cohere_batches_texts_into_single_request():
+    body = MagicMock()
+    body.read.return_value = b'{"embeddings": [[1.0, 0.0], [0.0, 1.0]]}'
+    with patch.object(embeddings, "BEDROCK_EMBEDDING_MODEL_ID", "cohere.embed-english-v3"), \
+         patch.object(embeddings, "CACHE_ENABLED", False), \
+         patch.object(embeddings.bedrock, "invoke_model", return_value={"body": body}) as invoke:
+        matrix = embeddings.embed_texts_bedrock(["x", "y"])
+
+    assert invoke.call_count == 1
+    assert matrix.shape == (2, 2)
+
+
+def test_titan_fan_out_from_saturated_bedrock_pool_does_not_deadlock():
+    import threading
+    from chatbot.utils.bedrock_client import executor
+
+    workers = executor._max_workers
+    barrier = threading.Barrier(workers)
+
+    def retrieval_leg():
+        barrier.wait(timeout=5)
+        return embeddings.embed_texts_bedrock(["a", "bb"])
+
+    with patch.object(embeddings, "BEDROCK_EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0"), \
+         patch.object(embeddings, "CACHE_ENABLED", False), \
+         patch.object(embeddings, "_embed_titan", side_effect=lambda text: [float(len(text)), 1.0]):
+        # Every shared-pool worker blocks on a Titan batch, as retrieval legs do
+        futures = [executor.submit(retrieval_leg) for _ in range(workers)]
+        results = [f.result(timeout=5) for f in futures]
+
+    assert all(r.shape == (2, 2) for r in results)
@@ -0,0 +1,84 @@
+# tests/test_rate_limiter.py
+
+import time
+import pytest
+from unittest.mock import patch
+from chatbot.utils.rate_limiter import (
+    AdaptiveRateLimiter,
+    BedrockThrottledError,
+    call_with_retry,
+    configure_limiter,
+    get_limiter,
+    is_throttling_error,
+)
+
+
+class FakeClientError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code, "Message": code}}
+
+
+def test_is_throttling_error():
+    assert is_throttling_error(FakeClientError("ThrottlingException"))
+    assert not is_throttling_error(FakeClientError("ValidationException"))
+    assert not is_throttling_error(ValueError("boom"))
+
+
+def test_aimd_adjusts_rate():
+    limiter = AdaptiveRateLimiter("test-model", rate=4.0, increase=1.0, decrease=0.5)
+    limiter.on_throttle()
+    assert limiter.rate == 2.0
+    limiter.on_success()
+    assert limiter.rate == 3.0
+    assert limiter.metrics()["throttled"] == 1
+
+
+def test_acquire_respects_deadline():
+    limiter = AdaptiveRateLimiter("slow-model", rate=0.5, burst=1)
+    assert limiter.acquire(time.monotonic() + 1)
+    assert not limiter.acquire(time.monotonic() + 0.05)
+    assert limiter.metrics()["deadline_exceeded"] == 1
+
+
+@patch("chatbot.utils.rate_limiter.time.sleep")
+def test_call_with_retry_recovers_from_throttling(mock_sleep):
+    outcomes = [FakeClientError("ThrottlingException"), "ok"]
+
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert call_with_retry("retry-model", flaky, deadline_s=10) == "ok"
+    assert get_limiter("retry-model").metrics()["throttled"] == 1
+    mock_sleep.assert_called_once()
+
+
+def test_call_with_retry_raises_other_errors_immediately():
+    def invalid():
+        raise FakeClientError("ValidationException")
+
+    with pytest.raises(FakeClientError):
+        call_with_retry("invalid-model", invalid, deadline_s=10)
+
+
+def test_call_with_retry_gives_up_at_deadline():
+    def always_throttled():
+        raise FakeClientError("ThrottlingException")
+
+    with pytest.raises(BedrockThrottledError):
+        call_with_retry("busy-model", always_throttled, deadline_s=0.2)
+
+
+def test_configured_limiter_overrides_claude_defaults():
+    limiter = configure_limiter("test-embed-model", rate=50.0, burst=32)
+    assert get_limiter("test-embed-model") is limiter
+
+    start = time.monotonic()
+    assert all(limiter.acquire(time.monotonic() + 1) for _ in range(20))
+    assert time.monotonic() - start < 0.1  # a 20-text rerank pool goes out in one burst
+
+    configure_limiter("test-embed-model", burst=4)
+    assert limiter.burst == 4 and limiter.rate == 50.0
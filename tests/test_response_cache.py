@@ -0,0 +1,79 @@
+# tests/test_response_cache.py
+
+import numpy as np
+from unittest.mock import patch
+from chatbot.utils import config_loader
+from chatbot.utils.response_cache import ResponseCache, normalize_prompt, response_cache, cache_enabled
+
+MODEL_ID = "anthropic.claude-3-sonnet"
+
+
+def _fake_embed(text: str) -> np.ndarray:
+    # Bag-of-letters vector: near-identical prompts land close together
+    vec = np.zeros(26, dtype=np.float32)
+    for ch in text:
+        if "a" <= ch <= "z":
+            vec[ord(ch) - 97] += 1
+    return vec
+
+
+def test_normalize_prompt():
+    assert normalize_prompt("  Build a   Serverless pipeline!! ") == "build a serverless pipeline"
+    assert normalize_prompt("What is 2+2?") != normalize_prompt("What is 2-2?")
+    assert normalize_prompt("C++ vs C#") == "c++ vs c#"
+
+
+def test_exact_hit_and_miss():
+    cache = ResponseCache()
+    assert cache.get("What is a VPC?", "", MODEL_ID) is None
+    cache.put("What is a VPC?", "", MODEL_ID, "A virtual network.")
+
+    assert cache.get("what is a vpc", "", MODEL_ID) == "A virtual network."
+    assert cache.get("What is a VPC?", "other context", MODEL_ID) is None
+    stats = cache.stats()
+    assert stats["exact_hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_semantic_hit_requires_same_context():
+    cache = ResponseCache(similarity_threshold=0.9, embed_fn=_fake_embed)
+    cache.put("build a serverless pipeline with S3 and Lambda", "", MODEL_ID, "Use S3 events.")
+
+    assert cache.get("build serverless pipeline with S3 and Lambda", "", MODEL_ID) == "Use S3 events."
+    assert cache.get("build serverless pipeline with S3 and Lambda", "rag ctx", MODEL_ID) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    cache.put("one", "", MODEL_ID, "1")
+    cache.put("two", "", MODEL_ID, "2")
+    cache.get("one", "", MODEL_ID)
+    cache.put("three", "", MODEL_ID, "3")
+
+    assert cache.get("two", "", MODEL_ID) is None
+    assert cache.get("one", "", MODEL_ID) == "1"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = ResponseCache(ttl_seconds=10)
+    with patch("chatbot.utils.response_cache.time.time", return_value=1000.0):
+        cache.put("What is IAM?", "", MODEL_ID, "Identity and access.")
+    with patch("chatbot.utils.response_cache.time.time", return_value=1011.0):
+        assert cache.get("What is IAM?", "", MODEL_ID) is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_dashboard_settings_apply_without_restart(tmp_path, monkeypatch):
+    config_path = tmp_path / "dashboard_config.json"
+    monkeypatch.setattr(config_loader, "CONFIG_FILE_PATH", str(config_path))
+    config_loader.save_config({"response_cache_enabled": False, "response_cache_max_entries": 7})
+
+    assert cache_enabled() is False
+    assert response_cache.max_entries == 7
+
+    config_loader.save_config({"response_cache_enabled": True, "response_cache_similarity": 0.9})
+    assert cache_enabled() is True
+    assert response_cache.similarity_threshold == 0.9
+    assert response_cache.max_entries == 512
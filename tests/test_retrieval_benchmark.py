@@ -0,0 +1,24 @@
+# tests/test_retrieval_benchmark.py
+
+from benchmarks import retrieval_benchmark
+from benchmarks.fixtures import Corpus
+
+
+def test_corpus_is_deterministic():
+    a, b = Corpus(500, seed=3), Corpus(500, seed=3)
+    assert a.chunk(42) == b.chunk(42)
+    assert a.queries(3) == b.queries(3)
+
+
+def test_benchmark_report_shape():
+    report = retrieval_benchmark.run([1000], n_queries=5, top_k=5)
+
+    assert [r["target"] for r in report["results"]] == list(retrieval_benchmark.TARGETS)
+    for row in report["results"]:
+        assert set(row["latency_ms"]) == {"p50", "p95", "p99", "mean"}
+        assert 0.0 <= row["recall_at_k"] <= 1.0
+        assert row["peak_rss_mb"] > 0
+    by_target = {r["target"]: r for r in report["results"]}
+    assert by_target["get_relevant_chunks"]["recall_at_k"] > 0.8
+    assert by_target["rerank_chunks"]["embed_calls_per_query"] == 1.0
+    assert by_target["hybrid_rag_router"]["embed_calls_per_query"] == 1.0
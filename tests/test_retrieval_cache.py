@@ -0,0 +1,73 @@
+# tests/test_retrieval_cache.py
+
+from unittest.mock import patch
+
+from chatbot.rag import retrieval_cache as rc
+from chatbot.rag.retrieval_cache import RetrievalCache, bump_corpus_version, get_corpus_version
+
+RESULT = [{"content": "ctx", "metadata": {"source": "kb"}}]
+
+
+def test_near_identical_queries_share_a_key():
+    config = {"top_k": 5}
+    assert RetrievalCache.make_key("What is a VPC?", None, config) == RetrievalCache.make_key("what is a vpc", None, config)
+    assert RetrievalCache.make_key("what is a vpc", None, config) != RetrievalCache.make_key("what is a vpc", None, {"top_k": 3})
+    assert RetrievalCache.make_key("q", {"team": "a"}, config) != RetrievalCache.make_key("q", {"team": "b"}, config)
+    assert RetrievalCache.make_key("C++ lambdas", None, config) != RetrievalCache.make_key("C# lambdas", None, config)
+
+
+def test_hit_returns_copy_and_accounts_saved_cost():
+    cache = RetrievalCache()
+    cache.put("k", RESULT, cost_ms=800, cost_usd=0.002)
+
+    first = cache.get("k")
+    first[0]["metadata"]["cached"] = True
+    second = cache.get("k")
+
+    assert "cached" not in second[0]["metadata"]
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["saved_ms"] == 1600
+    assert stats["saved_usd"] == 0.004
+
+
+def test_corpus_version_bump_invalidates(tmp_path):
+    stamp = str(tmp_path / "corpus_version.json")
+    with patch.object(rc, "CORPUS_VERSION_PATH", stamp), \
+         patch.object(rc, "get_corpus_version", lambda path=stamp: get_corpus_version(path)):
+        cache = RetrievalCache()
+        cache.put("k", RESULT, cost_ms=10)
+        assert cache.get("k") == RESULT
+
+        assert bump_corpus_version(stamp) == 1
+        assert cache.get("k") is None
+        assert cache.stats()["stale"] == 1
+
+
+def test_result_computed_across_a_bump_is_not_served(tmp_path):
+    stamp = str(tmp_path / "corpus_version.json")
+    with patch.object(rc, "get_corpus_version", lambda path=stamp: get_corpus_version(path)):
+        cache = RetrievalCache()
+        started_at = get_corpus_version(stamp)   # retrieval starts...
+        bump_corpus_version(stamp)               # ...ingestion lands mid-flight
+        cache.put("k", RESULT, cost_ms=10, version=started_at)
+
+        assert cache.get("k") is None
+
+
+def test_ttl_expiry():
+    cache = RetrievalCache(ttl_seconds=0)
+    cache.put("k", RESULT, cost_ms=10)
+    assert cache.get("k") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_eviction_prefers_cheap_entries():
+    cache = RetrievalCache(max_entries=2)
+    cache.put("expensive", RESULT, cost_ms=5000)
+    cache.put("cheap", RESULT, cost_ms=5)
+    cache.put("new", RESULT, cost_ms=100)
+
+    assert cache.get("expensive") is not None
+    assert cache.get("cheap") is None
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,79 @@
+# tests/test_rolling_summarizer.py
+
+import pytest
+
+from chatbot.memory.summarizer import RollingSummarizer
+
+
+def _turns(n, start=0, words=5):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i} " + "word " * words}
+            for i in range(start, start + n)]
+
+
+class RecordingFold:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, summary, turns, max_tokens):
+        self.calls.append((summary, [t["content"].split()[1] for t in turns]))
+        return (summary + " " + ",".join(t["content"].split()[1] for t in turns)).strip()
+
+
+def test_only_new_turns_are_folded():
+    fold = RecordingFold()
+    summarizer = RollingSummarizer(fold_fn=fold)
+    history = _turns(4)
+    summarizer.summarize("c1", history)
+    history += _turns(2, start=4)
+    summary = summarizer.summarize("c1", history)
+
+    assert [turns for _, turns in fold.calls] == [["0", "1", "2", "3"], ["4", "5"]]
+    assert fold.calls[1][0] == "0,1,2,3"
+    assert summary == "0,1,2,3 4,5"
+
+
+def test_fold_input_is_bounded_per_call():
+    fold = RecordingFold()
+    summarizer = RollingSummarizer(fold_fn=fold, fold_max_tokens=20)
+    summarizer.summarize("c1", _turns(12, words=10))  # ~12 tokens per turn
+
+    assert len(fold.calls) == 12
+    assert all(len(turns) == 1 for _, turns in fold.calls)
+
+
+def test_diverged_transcript_starts_a_new_summary():
+    fold = RecordingFold()
+    summarizer = RollingSummarizer(fold_fn=fold)
+    summarizer.summarize("c1", _turns(4))
+    summary = summarizer.summarize("c1", _turns(2, start=10))
+
+    assert summary == "10,11"
+
+
+def test_failed_fold_keeps_high_water_mark():
+    fold = RecordingFold()
+    summarizer = RollingSummarizer(fold_fn=fold)
+    summarizer.summarize("c1", _turns(4))
+
+    def broken(*args):
+        raise RuntimeError("throttled")
+
+    summarizer.fold_fn = broken
+    with pytest.raises(RuntimeError):
+        summarizer.summarize("c1", _turns(6))
+
+    summarizer.fold_fn = fold
+    assert summarizer.summarize("c1", _turns(6)) == "0,1,2,3 4,5"
+
+
+def test_fold_bypasses_the_response_cache():
+    from unittest.mock import patch
+    from chatbot import agent
+    from chatbot.memory import summarizer
+
+    with patch.object(agent, "cache_enabled", return_value=True), \
+         patch.object(agent.response_cache, "get", return_value="another conversation's summary") as get, \
+         patch.object(agent, "_invoke_claude", return_value="folded summary"):
+        assert summarizer.fold_turns("", _turns(2)) == "folded summary"
+
+    get.assert_not_called()
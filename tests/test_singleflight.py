@@ -0,0 +1,46 @@
+# tests/test_singleflight.py
+
+import time
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from chatbot.utils.singleflight import SingleFlight, make_key
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow_call(prompt):
+        calls.append(prompt)
+        release.wait(timeout=5)
+        return f"answer:{prompt}"
+
+    key = make_key("claude", "model", "same prompt")
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(flight.do, key, slow_call, "same prompt") for _ in range(5)]
+        while flight.stats()["coalesced"] < 4:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result(timeout=5) for f in futures]
+
+    assert results == ["answer:same prompt"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_exception_propagates_and_key_is_released():
+    flight = SingleFlight()
+
+    def boom():
+        raise RuntimeError("throttled")
+
+    with pytest.raises(RuntimeError):
+        flight.do("k", boom)
+    assert flight.do("k", lambda: "recovered") == "recovered"
+
+
+def test_make_key_is_order_stable():
+    assert make_key("kb", {"a": 1, "b": 2}) == make_key("kb", {"b": 2, "a": 1})
+    assert make_key("kb", "q", 5) != make_key("kb", "q", 6)
@@ -0,0 +1,70 @@
+# tests/test_streaming_retrieval.py
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from chatbot.rag import retrieval_layer
+
+
+def _pages(n_pages, page_size=2):
+    pages = []
+    for p in range(n_pages):
+        results = [{"content": f"relevant chunk {p}-{i}", "metadata": {"source": f"doc{p}"}, "score": 0.9}
+                   for i in range(page_size)]
+        pages.append({"retrievalResults": results, "nextToken": f"t{p + 1}" if p < n_pages - 1 else None})
+    return pages
+
+
+def _embed(texts):
+    return np.asarray([[1.0, 0.0] if "relevant" in t or t == "q" else [0.0, 1.0] for t in texts], dtype=np.float32)
+
+
+def _patched(agent):
+    return patch.multiple(
+        retrieval_layer,
+        bedrock_agent=agent,
+        RETRIEVAL_BACKEND="bedrock",
+        embedding_engine="bedrock",
+        KB_PAGE_SIZE=2,
+        STREAM_SCORE_BATCH=2,
+        _embed_batch=_embed,
+    )
+
+
+def test_stream_stops_fetching_pages_once_top_k_is_reached():
+    agent = MagicMock()
+    agent.retrieve.side_effect = _pages(5)
+    with _patched(agent):
+        chunks = list(retrieval_layer.stream_relevant_chunks("q", top_k=3))
+
+    assert len(chunks) == 3
+    assert agent.retrieve.call_count == 2
+    assert agent.retrieve.call_args.kwargs["nextToken"] == "t1"
+
+
+def test_low_scoring_chunks_are_filtered_out():
+    agent = MagicMock()
+    page = _pages(1)[0]
+    page["retrievalResults"].append({"content": "noise", "metadata": {}, "score": 0.9})
+    agent.retrieve.side_effect = [page]
+    with _patched(agent):
+        chunks = retrieval_layer.get_relevant_chunks("q", top_k=5)
+
+    assert [c["content"] for c in chunks] == ["relevant chunk 0-0", "relevant chunk 0-1"]
+
+
+def test_cancel_event_stops_the_pipeline():
+    agent = MagicMock()
+    agent.retrieve.side_effect = _pages(5)
+    cancel = threading.Event()
+    with _patched(agent):
+        stream = retrieval_layer.stream_relevant_chunks("q", top_k=10, cancel=cancel)
+        first = next(stream)
+        cancel.set()
+        rest = list(stream)
+
+    assert first["content"] == "relevant chunk 0-0"
+    assert len(rest) <= 1  # at most the remainder of the already-scored batch
+    assert agent.retrieve.call_count == 1
@@ -0,0 +1,16 @@
+# tests/test_synthesizer.py
+
+from chatbot.utils.synthesizer import synthesize_chunks
+
+
+def test_chunks_are_cited_in_order_and_repeats_dropped():
+    chunks = [
+        {"content": "VPCs isolate networks.", "metadata": {"title": "VPC", "page": 2, "source": "s3://kb/vpc.pdf"}},
+        {"content": "VPCs isolate networks.", "metadata": {"title": "VPC copy", "source": "os"}},
+        {"content": "Subnets split a VPC.", "metadata": {"title": "Subnets", "page": 5, "source": "s3://kb/net.pdf"}},
+    ]
+
+    text = synthesize_chunks(chunks)
+
+    assert text == ("[VPC] (Page 2) from s3://kb/vpc.pdf:\nVPCs isolate networks.\n\n"
+                    "[Subnets] (Page 5) from s3://kb/net.pdf:\nSubnets split a VPC.")
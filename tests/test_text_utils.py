@@ -0,0 +1,13 @@
+# tests/test_text_utils.py
+
+from chatbot.utils.text_utils import clean_text
+
+
+def test_clean_text_normalizes_whitespace_and_control_characters():
+    raw = "Amazon\u00a0VPC\u200b  lets you\t\tisolate\x07 resources.\r\n\r\n\r\n\r\nSubnets   split it."
+    assert clean_text(raw) == "Amazon VPC lets you isolate resources.\n\nSubnets split it."
+
+
+def test_clean_text_accepts_bedrock_content_objects():
+    assert clean_text({"text": "  \ufb01le  systems "}) == "file systems"
+    assert clean_text(None) == ""